@@ -1,28 +1,42 @@
 import os
 import json
+import hashlib
 import uuid
 from pathlib import Path
 from typing import List, Dict, Any
 import streamlit as st
 import pandas as pd
-from config import PDF_DIR, DATA_DIR # DATA_DIR 추가
-from ingest import build_index, clear_pdfs, clear_index # clear_index 임포트
-# [수정] get_raw_project_data만 임포트합니다.
-from rag import get_raw_project_data 
-from semantic_normalizer import normalize_project
-from rules_engine import apply_all_checkbox_rules
+from config import JOB_WORKERS
+from workspace import get_workspace, new_workspace_id, evict_workspaces
+from ingest import clear_pdfs, clear_index # clear_index 임포트
+# 인덱스 생성과 경력 추출은 작업 큐의 워커 프로세스에서 실행됩니다.
+from job_queue import get_job_queue, start_workers
+from extraction_jobs import (
+    submit_ingest_job,
+    get_ingest_job,
+    start_extraction_job,
+    get_extraction_job,
+    cancel_extraction_job,
+)
+from semantic_normalizer import normalize_projects
+from rules_config import get_rule_set
+from project_archive import rescore_archive
+from rules_engine import apply_checkbox_rules_batch
 # [수정] 새로운 계산 함수 임포트
 from report_utils import (
     group_rules_by_category,
     build_project_summary_text,
     get_form_layout,
     get_project_calculations,
-    get_project_calculations_as_json
+    get_project_calculations_as_json,
+    build_calculation_summary_text,
 )
 
 
 st.set_page_config(page_title="경력인정 자동완성 데모", layout="wide")
 
+EXTRACTION_QUERY = "모든 프로젝트 이력을 JSON 리스트로 종합"
+
 st.title("경력인정 자동완성 Demo")
 
 st.markdown("""
@@ -49,19 +63,83 @@ uploaded_files = st.sidebar.file_uploader(
 if "processed_files" not in st.session_state:
     st.session_state.processed_files = set()
 
-# This block now cleans, saves, AND builds the index all at once.
-if uploaded_files:
-    # Create a unique hash of current uploaded files
-    current_files_hash = hash(tuple(f.name for f in uploaded_files))
+# 백그라운드 작업자 프로세스 시작 (JOB_WORKERS=0이면 `python job_queue.py`로 별도 실행)
+if JOB_WORKERS > 0:
+    start_workers(JOB_WORKERS)
+
+# 세션별 작업 공간 (업로드/인덱스/디버그 파일 분리). 새로고침 시 URL의 ID로 복구
+if "workspace_id" not in st.session_state:
+    try:
+        workspace = get_workspace(st.query_params.get("ws") or new_workspace_id())
+    except ValueError:
+        workspace = get_workspace(new_workspace_id())
+    st.session_state["workspace_id"] = workspace.workspace_id
+    st.query_params["ws"] = workspace.workspace_id
+workspace = get_workspace(st.session_state["workspace_id"])
+
+# 새로고침 후에도 URL에 남은 작업 ID로 진행 중인 작업에 다시 연결
+if "ingest_job_id" not in st.session_state and st.query_params.get("job"):
+    st.session_state["ingest_job_id"] = st.query_params["job"]
+
+
+def _files_key(files) -> str:
+    """Content hash of an uploaded file set (identical uploads share jobs)."""
+    digest = hashlib.sha256()
+    for f in sorted(files, key=lambda f: f.name):
+        digest.update(f.name.encode("utf-8"))
+        digest.update(f.getvalue())
+    return digest.hexdigest()[:16]
+
+
+INGEST_STAGE_LABELS = {
+    "load": "페이지 읽는 중",
+    "split": "문서 분할 중",
+    "repair": "OCR 보정 중",
+    "normalize": "LLM 정규화 중",
+    "embed": "임베딩 생성 중",
+    "save": "인덱스 저장 중",
+    "chain": "경력 추출 예약 중",
+}
+
+
+def _wait_for_ingest(job) -> None:
+    """Poll the ingest job and show per-stage / per-page progress in the sidebar."""
+    status_box = st.sidebar.empty()
+    progress_bar = st.sidebar.progress(0)
+    while not job.wait(timeout=0.5):
+        label = INGEST_STAGE_LABELS.get(job.stage, "대기 중")
+        if job.progress_total:
+            progress_bar.progress(min(job.progress_current / job.progress_total, 1.0))
+            status_box.info(f"{label}: {job.message} ({job.progress_current}/{job.progress_total})")
+        else:
+            status_box.info(f"{label} {job.message}".strip())
+    status_box.empty()
+    progress_bar.empty()
 
+
+def _show_ingest_failures(job) -> None:
+    """Show files the ingest worker could not read (reported in the job result)."""
+    for failure in (job.result or {}).get("failures", []):
+        st.sidebar.warning(f"{failure['file']}: {failure['error']}" if failure.get("file") else failure["error"])
+
+
+current_files_hash = _files_key(uploaded_files) if uploaded_files else None
+
+# This block now cleans and saves the files, then queues the index build.
+if uploaded_files:
     # Only process if this is a NEW set of files
     if current_files_hash not in st.session_state.processed_files:
         saved_files_map = {}
-        with st.spinner("파일을 처리하고 AI 메모리를 생성하는 중..."):
+        with st.spinner("파일을 저장하는 중..."):
+
+            # 0. Stop working on the previous file set
+            cancel_extraction_job(st.session_state)
 
-            # 1. Clear all old PDFs AND the old index
-            clear_pdfs()
-            clear_index()
+            # 1. Clear this session's old PDFs AND old index, and free idle workspaces
+            #    (never those of queued/running jobs)
+            clear_pdfs(workspace)
+            clear_index(workspace)
+            evict_workspaces(keep=[workspace.workspace_id, *get_job_queue().active_workspaces()])
 
             # 2. Save new files with UUID names
             for f in uploaded_files:
@@ -70,30 +148,44 @@ if uploaded_files:
 
                 # Create a short, unique filename
                 safe_name = f"{uuid.uuid4().hex}{file_extension}"
-                save_path = PDF_DIR / safe_name
+                save_path = workspace.pdf_dir / safe_name
 
                 with open(save_path, "wb") as out:
-                    out.write(f.read())
+                    out.write(f.getvalue())
 
                 saved_files_map[safe_name] = original_name
 
             # 3. Save the name map for the ingest script
-            map_save_path = DATA_DIR / "uuid_name_map.json"
+            map_save_path = workspace.name_map_path
             with open(map_save_path, "w", encoding="utf-8") as f_map:
                 json.dump(saved_files_map, f_map, ensure_ascii=False, indent=2)
 
-            # 4. Build new index immediately
-            build_index()
+            # 4. Queue the index build (a background extraction follows automatically)
+            ingest_job = submit_ingest_job(st.session_state, current_files_hash, EXTRACTION_QUERY)
+            st.query_params["job"] = ingest_job.job_id
 
             # Mark these files as processed
             st.session_state.processed_files.add(current_files_hash)
 
-        st.sidebar.success(f"✅ {len(saved_files_map)}개 파일로 AI 메모리 생성 완료!")
-        st.sidebar.info("이제 '분석 실행' 버튼을 누르세요.")
-    else:
-        # Files already processed, just show status
-        st.sidebar.success(f"✅ {len(uploaded_files)}개 파일 준비됨")
-        st.sidebar.info("'분석 실행' 버튼을 누르세요.")
+ingest_job = get_ingest_job(st.session_state)
+if ingest_job is not None:
+    if current_files_hash is None:
+        current_files_hash = ingest_job.files_key  # Reattached after a refresh
+    if not ingest_job.done:
+        _wait_for_ingest(ingest_job)
+    _show_ingest_failures(ingest_job)
+
+    if ingest_job.status == "done":
+        st.sidebar.success(f"✅ AI 메모리 생성 완료 ({(ingest_job.result or {}).get('chunks', 0)}개 청크)")
+        job = get_extraction_job(st.session_state, current_files_hash)
+        if job is not None and job.done:
+            st.sidebar.info(f"백그라운드 추출 완료 ({len(job.projects())}건). '분석 실행' 버튼을 누르세요.")
+        elif job is not None:
+            st.sidebar.info(f"백그라운드 추출 진행 중 ({len(job.projects())}건). '분석 실행' 버튼을 누르세요.")
+        else:
+            st.sidebar.info("'분석 실행' 버튼을 누르세요.")
+    elif ingest_job.status == "failed":
+        st.sidebar.error(f"AI 메모리 생성 중 오류: {ingest_job.error}")
 
 
 st.sidebar.header("2. 분석 실행")
@@ -101,14 +193,51 @@ st.sidebar.caption("업로드된 파일의 내용을 종합하여 양식을 채
 
 run_button = st.sidebar.button("✔️ 양식 자동 채우기 실행")
 
+st.sidebar.header("3. 저장된 결과 재채점")
+st.sidebar.caption("규칙이나 정규화 로직을 바꾼 뒤, 저장된 추출 결과 전체를 LLM 호출 없이 다시 계산합니다.")
+rescore_button = st.sidebar.button("🔁 전체 재채점")
+
 
 # --- Main action ----------------------------------------------------
 if run_button:
     try:
-        with st.spinner("AI가 문서를 분석하고 경력을 추출 중입니다... 잠시만 기다려 주세요."):
-            query = "모든 프로젝트 이력을 JSON 리스트로 종합"
-            # [수정] 이제 raw_project_data는 리스트(List[Dict])입니다.
-            raw_project_data: List[Dict[str, Any]] = get_raw_project_data(query)
+        normalized_projects = []
+        streamed_raw = []  # normalized_projects의 원본 (수리 후 결과와 비교용)
+        job = get_extraction_job(st.session_state, current_files_hash)
+        if job is None:
+            job = start_extraction_job(st.session_state, EXTRACTION_QUERY, current_files_hash)
+
+        # 백그라운드 작업에 연결: 완료되었으면 즉시, 진행 중이면 추출되는 대로 표시
+        preview_cols = ["engineer_name", "project_name", "client_raw", "client_type", "start_date", "end_date"]
+        stream_status = st.empty()
+        stream_table = st.empty()
+        shown = 0
+        while True:
+            finished = job.wait(timeout=0.5)
+            projects = job.projects()
+            if len(projects) > shown:
+                streamed_raw.extend(projects[shown:])
+                normalized_projects.extend(normalize_projects(projects[shown:]))
+                shown = len(projects)
+                if not finished:
+                    preview_df = pd.DataFrame(normalized_projects)
+                    stream_table.dataframe(
+                        preview_df[[c for c in preview_cols if c in preview_df.columns]],
+                        use_container_width=True,
+                    )
+            if finished:
+                break
+            if job.status == "queued":
+                stream_status.info("AI 작업 대기 중입니다... 다른 작업이 끝나면 시작됩니다.")
+            elif job.stage == "repair":
+                stream_status.info(f"누락/오류 항목을 다시 추출하는 중입니다... ({shown}건 추출됨)")
+            else:
+                stream_status.info(f"AI가 경력을 추출 중입니다... ({shown}건 추출됨)")
+        stream_status.empty()
+        stream_table.empty()
+        if job.status == "failed":
+            raise RuntimeError(job.error)
+        raw_project_data = projects
 
         if not raw_project_data:
             st.error("추출된 프로젝트 이력이 없습니다. PDF 파일을 업로드했는지 확인해 주세요.")
@@ -121,26 +250,26 @@ if run_button:
             st.write("- AI 모델(Ollama)이 응답하지 않거나 오류가 발생했습니다")
             st.info("터미널/콘솔에서 [INGEST]와 [RAG] 로그를 확인하세요.")
         else:
-            # [수정] 모든 프로젝트를 순회하며 정규화 및 규칙 적용
-            all_projects_rules = []
-            for raw_project in raw_project_data:
-                normalized_project = normalize_project(raw_project)
-                project_rules_series = apply_all_checkbox_rules(normalized_project)
-                all_projects_rules.append(project_rules_series)
-            
-            # [수정] 리스트를 DataFrame으로 변환
-            projects_df = pd.DataFrame(all_projects_rules)
+            # 정규화는 추출되는 대로 완료됨 (스트림 종료 후 수리된 행이 있으면 다시 정규화);
+            # 규칙은 전체 프로젝트에 한 번에 적용
+            if streamed_raw != raw_project_data:
+                normalized_projects = normalize_projects(raw_project_data)
+            rule_set = get_rule_set()  # 한 번 가져와서 결과 전체에 같은 버전 사용
+            projects_df = apply_checkbox_rules_batch(normalized_projects, rule_set)
             
             # [수정] 결과 1은 첫 번째 프로젝트를 대표로 사용
-            project_rules_series = all_projects_rules[0]
+            project_rules_series = projects_df.iloc[0]
 
 
             # --- [결과 1: 체크박스 폼] ---
             st.subheader("결과 1: 경력인정 가이드 자동 체크 (대표 프로젝트 기준)")
-            st.caption(f"총 {len(projects_df)}개의 프로젝트가 추출되었습니다. 아래는 첫 번째 프로젝트의 자동 체크 결과입니다.")
+            st.caption(
+                f"총 {len(projects_df)}개의 프로젝트가 추출되었습니다. 아래는 첫 번째 프로젝트의 자동 체크 결과입니다. "
+                f"(규칙 버전 {rule_set.version})"
+            )
 
             form_layout = get_form_layout()
-            grouped_rules = group_rules_by_category()
+            grouped_rules = group_rules_by_category(rule_set.rules)
 
             def render_checkbox_row(checked: bool, label: str) -> str:
                 box = "☑" if checked else "☐"
@@ -247,6 +376,14 @@ if run_button:
                 
                 # [수정] "해당"과 "비해당"을 별도로 렌더링
                 st.markdown(f"**{d_career['classification_label']}**")
+                if d_career["중복 참여기간"]:
+                    st.warning(
+                        f"참여기간이 겹치는 프로젝트 {len(d_career['중복 참여기간'])}쌍 - "
+                        f"겹치는 기간은 {d_career['중복 참여기간 처리']}되었습니다."
+                    )
+                    with st.expander("중복 참여기간 보기"):
+                        for record_str in d_career["중복 참여기간"]:
+                            st.markdown(f"• {record_str}")
                 
                 with st.expander(f"✅ 해당분야 용역참여실적 ({len(d_career['해당분야 용역참여실적'])}건)"):
                     if not d_career['해당분야 용역참여실적']:
@@ -277,6 +414,14 @@ if run_button:
                     for record_str in d_job["용역참여실적"]:
                         st.markdown(f"• {record_str}")
 
+                # 같은 계산 결과(캐시)에서 텍스트 리포트 생성
+                st.download_button(
+                    label="📥 경력 사항 텍스트 리포트 다운로드",
+                    data=build_calculation_summary_text(projects_df),
+                    file_name="경력인정_경력사항.txt",
+                    mime="text/plain",
+                )
+
                 # --- 3. JSON 다운로드 버튼 추가 ---
                 st.markdown("---")
                 st.subheader("📥 JSON 다운로드")
@@ -317,5 +462,24 @@ if run_button:
     except Exception as e:
         st.error(f"예상치 못한 오류 발생: {e}")
 
+elif rescore_button:
+    changes = rescore_archive()
+    st.subheader("재채점 결과")
+    st.caption(f"규칙 버전 {get_rule_set().version} 기준")
+    if not changes:
+        st.success("점수가 바뀐 기술인이 없습니다.")
+    else:
+        st.warning(f"{len(changes)}명의 결과가 바뀌었습니다.")
+        st.dataframe(pd.DataFrame([
+            {
+                "성명": c["engineer_name"],
+                "파일셋": c["source_hash"][:12],
+                "변경 항목": ", ".join(c["changed"]),
+                "평점 (이전 → 이후)": f"{(c['before'] or {}).get('score', '-')} → {(c['after'] or {}).get('score', '-')}",
+                "직무 평점 (이전 → 이후)": f"{(c['before'] or {}).get('job_score', '-')} → {(c['after'] or {}).get('job_score', '-')}",
+            }
+            for c in changes
+        ]), use_container_width=True)
+
 else:
     st.info("좌측 사이드바에서 PDF를 업로드하면 분석이 시작됩니다.")
\ No newline at end of file
@@ -0,0 +1,164 @@
+"""
+Client (발주처) type classification.
+
+The same clients repeat across thousands of archived projects, so:
+1. Known agencies are looked up in a registry loaded from a data file
+   (CLIENT_REGISTRY_PATH, client_registry.json) - an exact dict hit on the
+   name with spaces removed
+   Registry entries must give the same type as the keyword lists: the
+   registry only speeds up lookups. Reclassifying a client changes
+   recognition_rate_rule (civil_60) and with it stored scores.
+2. Other names go through one Aho-Corasick pass (rule_matcher.AhoCorasick)
+   over the keywords of every client type; the first type in
+   CLIENT_TYPE_KEYWORDS order with a matching keyword wins, as in the
+   original keyword lists
+3. Results are memoized in a bounded LRU cache
+
+stats() reports how lookups were resolved (memo, registry, keyword, default).
+"""
+import json
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from config import CLIENT_REGISTRY_PATH
+from rule_matcher import AhoCorasick
+
+DEFAULT_CLIENT_TYPE = "기타"
+
+# (client type, keywords) in priority order
+CLIENT_TYPE_KEYWORDS: List[Tuple[str, List[str]]] = [
+    ("기초자치단체", ["기초자치단체", "시청", "구청", "군청", "군"]),
+    ("광역자치단체", ["광역자치단체", "도청", "특별시", "광역시", "경기도", "경기도건설본부"]),
+    ("정부투자기관", ["정부투자기관", "공사", "공단", "한국도로공사"]),
+    ("국가", ["국토교통부", "국토관리청", "국가", "환경부"]),
+    ("민간", ["주식회사", "(주)", "㈜", "유한회사"]),
+]
+
+_MEMO_SIZE = 10000
+
+
+def _key(client_raw: str) -> str:
+    return client_raw.replace(" ", "")
+
+
+def load_client_registry(path: Path = CLIENT_REGISTRY_PATH) -> Dict[str, str]:
+    """
+    Load the known-agency registry.
+
+    Returns:
+        {agency name without spaces: client type}; empty if the file is
+        missing or invalid (classification then falls back to keywords)
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        agencies = data["agencies"]
+    except FileNotFoundError:
+        print(f"[CLIENT] Registry {path} not found; using keywords only")
+        return {}
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        print(f"[CLIENT] WARN: Ignoring invalid registry {path}: {e}")
+        return {}
+
+    known_types = {t for t, _ in CLIENT_TYPE_KEYWORDS} | {DEFAULT_CLIENT_TYPE}
+    registry = {}
+    for name, client_type in agencies.items():
+        if client_type not in known_types:
+            print(f"[CLIENT] WARN: Skipping {name!r}: unknown client type {client_type!r}")
+            continue
+        registry[_key(name)] = client_type
+    print(f"[CLIENT] Loaded {len(registry)} agencies (registry {data.get('version', '?')})")
+    return registry
+
+
+class ClientClassifier:
+    """
+    Registry + keyword automaton + memo cache.
+
+    Args:
+        registry: {agency name without spaces: client type}
+        keywords: (client type, keywords) in priority order
+        memo_size: Maximum number of memoized names
+    """
+
+    def __init__(self, registry: Dict[str, str],
+                 keywords: List[Tuple[str, List[str]]] = CLIENT_TYPE_KEYWORDS,
+                 memo_size: int = _MEMO_SIZE):
+        self.registry = registry
+        self._types = [client_type for client_type, _ in keywords]
+        priority: Dict[str, int] = {}
+        for rank, (_, words) in enumerate(keywords):
+            for word in words:
+                priority.setdefault(word, rank)  # A keyword listed twice keeps its first type
+        self._automaton = AhoCorasick(priority.keys())
+        self._keyword_rank = list(priority.values())
+
+        self._memo: "OrderedDict[str, str]" = OrderedDict()
+        self._memo_size = memo_size
+        self._lock = threading.Lock()
+        self._counts = {"memo": 0, "registry": 0, "keyword": 0, "default": 0}
+
+    def _resolve(self, key: str) -> Tuple[str, str]:
+        """Classify an uncached name; returns (client type, source)."""
+        client_type = self.registry.get(key)
+        if client_type is not None:
+            return client_type, "registry"
+        matches = self._automaton.search(key)
+        if matches:
+            return self._types[min(self._keyword_rank[i] for i in matches)], "keyword"
+        return DEFAULT_CLIENT_TYPE, "default"
+
+    def classify(self, client_raw: Optional[str]) -> str:
+        """
+        Classify a client name.
+
+        Returns:
+            국가, 광역자치단체, 기초자치단체, 정부투자기관, 민간 or 기타
+        """
+        if not client_raw:
+            return DEFAULT_CLIENT_TYPE
+        key = _key(client_raw)
+        with self._lock:
+            cached = self._memo.get(key)
+            if cached is not None:
+                self._memo.move_to_end(key)
+                self._counts["memo"] += 1
+                return cached
+
+        client_type, source = self._resolve(key)
+        with self._lock:
+            self._counts[source] += 1
+            self._memo[key] = client_type
+            if len(self._memo) > self._memo_size:
+                self._memo.popitem(last=False)
+        return client_type
+
+    def stats(self) -> Dict[str, float]:
+        """Lookup counts by source, plus memo and registry hit rates."""
+        with self._lock:
+            counts = dict(self._counts)
+            memo_entries = len(self._memo)
+        lookups = sum(counts.values())
+        resolved = lookups - counts["memo"]
+        return {
+            **counts,
+            "lookups": lookups,
+            "memo_entries": memo_entries,
+            "memo_hit_rate": round(counts["memo"] / lookups, 3) if lookups else 0.0,
+            "registry_hit_rate": round(counts["registry"] / resolved, 3) if resolved else 0.0,
+        }
+
+
+_classifier: Optional[ClientClassifier] = None
+_classifier_lock = threading.Lock()
+
+
+def get_client_classifier() -> ClientClassifier:
+    """Return the shared classifier (registry loaded on first use)."""
+    global _classifier
+    with _classifier_lock:
+        if _classifier is None:
+            _classifier = ClientClassifier(load_client_registry())
+    return _classifier
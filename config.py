@@ -20,13 +20,92 @@ RAW_UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
 PDF_DIR.mkdir(parents=True, exist_ok=True)
 INDEX_DIR.mkdir(parents=True, exist_ok=True)
 
+# Per-session workspaces (own uploads, index and debug files) for concurrent users.
+# PDF_DIR / INDEX_DIR above remain the default workspace for command-line use.
+WORKSPACES_DIR = DATA_DIR / "workspaces"
+WORKSPACES_DIR.mkdir(parents=True, exist_ok=True)
+WORKSPACE_TTL_HOURS = float(os.getenv("WORKSPACE_TTL_HOURS", "24"))         # Idle workspaces older than this are deleted
+WORKSPACE_MAX_COUNT = int(os.getenv("WORKSPACE_MAX_COUNT", "50"))           # Least recently used beyond this are deleted
+WORKSPACE_MAX_DISK_MB = int(os.getenv("WORKSPACE_MAX_DISK_MB", "5000"))     # Total disk cap for all workspaces
+WORKSPACE_MIN_IDLE_SECONDS = float(os.getenv("WORKSPACE_MIN_IDLE_SECONDS", "900"))  # Recently used workspaces are never evicted
+
 # LLM Configuration - Using Ollama (local model)
 OLLAMA_BASE_URL = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
+# Comma-separated list of Ollama servers to load-balance over (defaults to OLLAMA_BASE_URL)
+OLLAMA_BASE_URLS = [
+    u.strip() for u in os.getenv("OLLAMA_BASE_URLS", OLLAMA_BASE_URL).split(",") if u.strip()
+]
 # IMPORTANT: gemma3:4b is too small for Korean text extraction
 # Use a larger model for accurate results:
 OLLAMA_MODEL = os.getenv("OLLAMA_MODEL", "gemma3:27b")  # Recommended for Korean
 # Alternative models: "gemma2:9b", "llama3.1:8b"
 
+# Optional small model tried first; rows failing validation escalate to OLLAMA_MODEL.
+# Leave empty to always use OLLAMA_MODEL. Example: "gemma3:4b"
+# When set, extraction does not stream (the cascade validates whole responses).
+OLLAMA_FAST_MODEL = os.getenv("OLLAMA_FAST_MODEL", "")
+
+# Ollama client (shared connection pool for rag and llm_helper)
+OLLAMA_TIMEOUT = float(os.getenv("OLLAMA_TIMEOUT", "120"))                   # Default per-call timeout (seconds)
+OLLAMA_MAX_CONCURRENCY = int(os.getenv("OLLAMA_MAX_CONCURRENCY", "4"))       # Parallel requests per backend
+OLLAMA_MAX_RETRIES = int(os.getenv("OLLAMA_MAX_RETRIES", "2"))
+OLLAMA_RETRY_BACKOFF = float(os.getenv("OLLAMA_RETRY_BACKOFF", "1.0"))      # Seconds, doubled per retry
+OLLAMA_BACKEND_REPROBE_SECONDS = float(os.getenv("OLLAMA_BACKEND_REPROBE_SECONDS", "30"))  # Ejected backend re-probe delay
+# How long Ollama keeps the model (and its prompt KV-cache) loaded after a request
+OLLAMA_KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE", "30m")
+# Context window requested from Ollama (num_ctx). Kept fixed across calls: changing
+# it forces a model reload and discards the prompt cache.
+OLLAMA_NUM_CTX = int(os.getenv("OLLAMA_NUM_CTX", "16384"))
+OLLAMA_RESPONSE_TOKENS = int(os.getenv("OLLAMA_RESPONSE_TOKENS", "4096"))  # Reserved for the generated JSON
+
+# Extraction mode: "single" sends the whole context in one request,
+# "map_reduce" extracts page-aligned segments concurrently and merges them
+EXTRACTION_MODE = os.getenv("EXTRACTION_MODE", "single")
+MAP_REDUCE_SEGMENT_CHARS = int(os.getenv("MAP_REDUCE_SEGMENT_CHARS", "6000"))  # Max characters per segment
+MAP_REDUCE_MAX_WORKERS = int(os.getenv("MAP_REDUCE_MAX_WORKERS", "4"))         # Concurrent segment requests
+
+# Re-ask the LLM for just the missing/invalid fields of rows that fail validation
+REPAIR_DEFECTIVE_ROWS = os.getenv("REPAIR_DEFECTIVE_ROWS", "true").lower() == "true"
+REPAIR_TOP_K = int(os.getenv("REPAIR_TOP_K", "8"))          # Chunks searched per defective row
+REPAIR_MAX_ROWS = int(os.getenv("REPAIR_MAX_ROWS", "20"))   # Upper bound on repair calls per extraction
+
+# Stream the single-request extraction so the UI can show rows as they are generated
+# (ignored while OLLAMA_FAST_MODEL is set)
+STREAM_EXTRACTION = os.getenv("STREAM_EXTRACTION", "true").lower() == "true"
+
+# LLM normalization of OCR chunks at ingest (llm_helper.normalize_chunks_with_llm).
+# Only chunks whose ocr_repair.noise_score reaches the threshold are sent, packed
+# several per request and run concurrently; the rule-based repair handles the rest
+USE_LLM_NORMALIZE = os.getenv("USE_LLM_NORMALIZE", "true").lower() == "true"
+LLM_NORMALIZE_NOISE_THRESHOLD = float(os.getenv("LLM_NORMALIZE_NOISE_THRESHOLD", "0.15"))
+
+# LLM response cache (shared by normalization and extraction)
+USE_LLM_CACHE = os.getenv("USE_LLM_CACHE", "true").lower() == "true"
+LLM_CACHE_PATH = DATA_DIR / "llm_cache.sqlite3"
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "5000"))
+LLM_CACHE_MAX_MB = int(os.getenv("LLM_CACHE_MAX_MB", "200"))
+
+# Background job queue (ingest / extraction run in worker processes, state in SQLite)
+JOB_DB_PATH = DATA_DIR / "jobs.sqlite3"
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))                   # Worker processes started by the app (0 = run `python job_queue.py` separately)
+JOB_STALE_SECONDS = float(os.getenv("JOB_STALE_SECONDS", "120"))   # Running job without heartbeat for this long is requeued
+
+# Known agencies (발주처 -> client type) checked before the keyword fallback, see client_classifier.py
+CLIENT_REGISTRY_PATH = Path(os.getenv("CLIENT_REGISTRY_PATH", str(BASE_DIR / "client_registry.json")))
+
+# Count overlapping participation periods of one engineer once (a day on both a
+# 100% and a 60% project counts as 100%); false sums every project's days
+MERGE_OVERLAPPING_PERIODS = os.getenv("MERGE_OVERLAPPING_PERIODS", "true").lower() == "true"
+
+# Archive of extracted projects (re-scored without OCR/LLM when rules change, see project_archive.py)
+ARCHIVE_DB_PATH = DATA_DIR / "project_archive.sqlite3"
+ARCHIVE_EXTRACTIONS = os.getenv("ARCHIVE_EXTRACTIONS", "true").lower() == "true"
+
+# Checkbox rule set (versioned JSON; reloaded when the file changes, see rules_config.py)
+RULES_PATH = Path(os.getenv("RULES_PATH", str(BASE_DIR / "checkbox_rules.json")))
+RULES_CACHE_DIR = DATA_DIR / "rules_cache"                                        # Compiled matchers keyed by content hash
+RULES_RELOAD_CHECK_SECONDS = float(os.getenv("RULES_RELOAD_CHECK_SECONDS", "2"))  # How often the rule file is re-checked
+
 # Note: Cloud API keys (Anthropic, OpenAI) are commented out
 # Uncomment and set environment variables if switching to cloud models
 # ANTHROPIC_API_KEY = os.getenv("ANTHROPIC_API_KEY")
@@ -0,0 +1,105 @@
+"""
+Date parsing for extracted project periods.
+
+One precompiled pattern accepts the forms found in career documents:
+- YYYY-MM-DD / YYYY.MM.DD / YYYY/MM/DD (e.g. 2023-01-15, 2023.1.5.)
+- YY.MM.DD (e.g. 95.01.23; two-digit years after this year are 19xx)
+- YYYY-MM / YYYY.MM / YY.MM (day 1 of the month)
+
+Before matching, full-width digits and separators (２０２３．０１) and
+common OCR digit confusions (O -> 0, l/I/| -> 1, S -> 5, B -> 8, Z -> 2)
+are normalized. Results are kept in a bounded LRU cache, since the same
+dates repeat across the start/end columns and across calculations.
+parse_date_column parses a whole column, each distinct value once.
+"""
+import calendar
+import re
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, Optional
+
+import numpy as np
+import pandas as pd
+
+_CACHE_SIZE = 4096
+
+_TRANSLATION = str.maketrans({
+    **{chr(0xFF10 + i): str(i) for i in range(10)},          # Full-width digits
+    "－": "-", "‐": "-", "‑": "-", "–": "-", "—": "-", "−": "-",
+    "．": ".", "。": ".", "｡": ".",
+    "／": "/",
+    "　": " ",
+    # OCR digit confusions
+    "O": "0", "o": "0", "D": "0", "Q": "0",
+    "l": "1", "I": "1", "|": "1", "!": "1",
+    "S": "5", "s": "5", "B": "8", "Z": "2", "z": "2",
+})
+
+_DATE_RE = re.compile(
+    r"""
+    ^\s*
+    (?P<year>\d{4}|\d{2})
+    \s*(?P<sep>[-./])\s*
+    (?P<month>\d{1,2})
+    (?:\s*(?P=sep)\s*(?P<day>\d{1,2}))?
+    \s*\.?\s*$
+    """,
+    re.VERBOSE,
+)
+
+def expand_two_digit_year(year: int) -> int:
+    """
+    Expand a two-digit year: 20xx unless that is after the current year, else 19xx.
+
+    Same rule as strptime's %y followed by "not in the future"; ocr_repair and
+    the extraction prompts (prompts.py) use it too.
+    """
+    return 2000 + year if 2000 + year <= datetime.now().year else 1900 + year
+
+
+@lru_cache(maxsize=_CACHE_SIZE)
+def _parse_text(text: str) -> Optional[datetime]:
+    match = _DATE_RE.match(text.translate(_TRANSLATION))
+    if match is not None:
+        year, month = int(match["year"]), int(match["month"])
+        day = int(match["day"]) if match["day"] else 1
+        if len(match["year"]) == 2:
+            year = expand_two_digit_year(year)
+        if 1 <= month <= 12 and 1 <= day <= calendar.monthrange(year, month)[1]:
+            return datetime(year, month, day)
+
+    print(f"[DATE] Unparsable date: {text!r}")  # Once per distinct value (cached)
+    return None
+
+
+def parse_date(value: Any) -> Optional[datetime]:
+    """
+    Parse one date string.
+
+    Args:
+        value: Date string (other types and blank strings give None)
+
+    Returns:
+        datetime at midnight, or None if the value is not a recognized date
+    """
+    if not isinstance(value, str):
+        return None
+    text = value.strip()
+    if not text:
+        return None
+    return _parse_text(text)
+
+
+def parse_date_column(values: pd.Series) -> pd.Series:
+    """
+    Parse a whole column of date strings, each distinct value once.
+
+    Returns:
+        datetime64 Series with the same index (NaT where parsing failed)
+    """
+    codes, uniques = pd.factorize(values, use_na_sentinel=True)
+    parsed = np.array(
+        [parse_date(v) or np.datetime64("NaT") for v in uniques] + [np.datetime64("NaT")],
+        dtype="datetime64[ns]",
+    )
+    return pd.Series(parsed[codes], index=values.index)  # Code -1 (missing) picks the trailing NaT
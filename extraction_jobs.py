@@ -0,0 +1,177 @@
+"""
+Per-session view of the background ingest / extraction jobs.
+
+Uploading a file set queues an ingest job (job_queue) that chains a
+speculative extraction as soon as the index is built, so by the time the
+user presses the run button the results are often ready. Jobs run against
+the session's workspace (session_state["workspace_id"]). The session only
+keeps job ids; job state lives in the queue database, which lets a
+refreshed browser reattach through the id kept in the URL. Uploading a
+different file set cancels the previous jobs.
+
+The script thread polls these handles and renders progress itself;
+nothing here touches Streamlit APIs.
+"""
+import time
+from typing import Any, Dict, List, Optional
+
+from job_queue import FINAL_STATUSES, get_job_queue
+
+
+class QueuedJob:
+    """
+    Handle to one queued job; attributes reflect the last refresh().
+
+    Attributes:
+        status: "queued", "running", "done", "failed" or "cancelled"
+        stage / progress_current / progress_total / message: Latest progress report
+        error: Error message when status is "failed"
+    """
+
+    def __init__(self, job_id: str):
+        self.job_id = job_id
+        self._job: Dict[str, Any] = {}
+        self.refresh()
+
+    def refresh(self) -> "QueuedJob":
+        self._job = get_job_queue().get(self.job_id) or {"status": "cancelled", "params": {}}
+        return self
+
+    @property
+    def status(self) -> str:
+        return self._job["status"]
+
+    @property
+    def stage(self) -> str:
+        return self._job.get("stage") or ""
+
+    @property
+    def progress_current(self) -> int:
+        return self._job.get("progress_current") or 0
+
+    @property
+    def progress_total(self) -> int:
+        return self._job.get("progress_total") or 0
+
+    @property
+    def message(self) -> str:
+        return self._job.get("message") or ""
+
+    @property
+    def error(self) -> Optional[str]:
+        return self._job.get("error")
+
+    @property
+    def result(self) -> Any:
+        return self._job.get("result")
+
+    @property
+    def files_key(self) -> Optional[str]:
+        return self._job["params"].get("files_key")
+
+    @property
+    def done(self) -> bool:
+        return self.status in FINAL_STATUSES
+
+    @property
+    def cancelled(self) -> bool:
+        return self.status == "cancelled"
+
+    def wait(self, timeout: Optional[float] = None, interval: float = 0.5) -> bool:
+        """Poll until the job finishes; returns False on timeout."""
+        deadline = None if timeout is None else time.time() + timeout
+        while not self.refresh().done:
+            if deadline is not None and time.time() >= deadline:
+                return False
+            time.sleep(interval if deadline is None else max(0.0, min(interval, deadline - time.time())))
+        return True
+
+    def cancel(self) -> None:
+        if not self.done:
+            print(f"[JOB] Cancelling {self._job.get('kind')} job {self.job_id}")
+        get_job_queue().cancel(self.job_id)
+        self.refresh()
+
+
+class ExtractionJob(QueuedJob):
+    """Extraction job; its result is the project list (partial while running)."""
+
+    def projects(self) -> List[Dict[str, Any]]:
+        return list(self.result or [])
+
+
+def submit_ingest_job(session_state: Any, files_key: str, query: str) -> QueuedJob:
+    """
+    Queue index building for an uploaded file set, chained with a speculative
+    extraction, cancelling the session's previous jobs.
+
+    Args:
+        session_state: st.session_state (keeps the job ids and workspace_id)
+        files_key: Content hash of the uploaded file set
+        query: Retrieval query for the chained extraction
+
+    Returns:
+        The ingest job (an identical queued/running job is reused)
+    """
+    cancel_extraction_job(session_state)
+    workspace_id = session_state.get("workspace_id")
+    extract_params = {"query": query, "files_key": files_key, "workspace": workspace_id}
+    job_id = get_job_queue().submit(
+        "ingest",
+        {"files_key": files_key, "workspace": workspace_id, "then": {"kind": "extract", "params": extract_params}},
+    )
+    session_state["ingest_job_id"] = job_id
+    print(f"[JOB] Ingest job {job_id} for file set {files_key}")
+    return QueuedJob(job_id)
+
+
+def get_ingest_job(session_state: Any) -> Optional[QueuedJob]:
+    job_id = session_state.get("ingest_job_id")
+    return QueuedJob(job_id) if job_id else None
+
+
+def start_extraction_job(session_state: Any, query: str, files_key: Optional[str]) -> ExtractionJob:
+    """
+    Queue an extraction over the current index (used when no chained job exists).
+
+    Returns:
+        The extraction job (also remembered in session_state)
+    """
+    job_id = get_job_queue().submit(
+        "extract", {"query": query, "files_key": files_key, "workspace": session_state.get("workspace_id")}
+    )
+    session_state["extraction_job_id"] = job_id
+    return ExtractionJob(job_id)
+
+
+def get_extraction_job(session_state: Any, files_key: Optional[str]) -> Optional[ExtractionJob]:
+    """
+    Return the session's extraction job for this file set, if it is still
+    usable (not cancelled or failed). The chained job of the ingest job is
+    preferred over one started from the run button.
+    """
+    ingest = get_ingest_job(session_state)
+    candidates = []
+    if ingest is not None and ingest.status == "done" and ingest.result and ingest.result.get("next_job"):
+        candidates.append(ingest.result["next_job"])
+    if session_state.get("extraction_job_id"):
+        candidates.append(session_state["extraction_job_id"])
+
+    for job_id in candidates:
+        job = ExtractionJob(job_id)
+        if job.files_key == files_key and job.status not in ("cancelled", "failed"):
+            return job
+    return None
+
+
+def cancel_extraction_job(session_state: Any) -> None:
+    """Cancel and forget the session's ingest and extraction jobs, if any."""
+    ingest = get_ingest_job(session_state)
+    job_ids = [session_state.pop("extraction_job_id", None)]
+    if ingest is not None:
+        session_state.pop("ingest_job_id", None)
+        ingest.cancel()
+        if ingest.result and ingest.result.get("next_job"):
+            job_ids.append(ingest.result["next_job"])
+    for job_id in filter(None, job_ids):
+        QueuedJob(job_id).cancel()
@@ -5,7 +5,8 @@ This module handles:
 - PDF text extraction (native + OCR fallback)
 - OCR processing for image-based PDFs
 - Document chunking and text splitting
-- LLM-based text normalization
+- Rule-based OCR repair (always) and LLM-based text normalization
+  (optional, only for the noisiest chunks)
 - FAISS vector index creation
 
 The hybrid approach ensures reliable text extraction from both
@@ -14,7 +15,7 @@ text-based and scanned/image-based PDF documents.
 import os
 import re
 import json
-from typing import List, Dict
+from typing import Callable, List, Dict, Optional
 from pathlib import Path
 
 import streamlit as st
@@ -29,24 +30,36 @@ from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_community.vectorstores import FAISS
 from langchain_huggingface import HuggingFaceEmbeddings
 
-from config import PDF_DIR, INDEX_DIR, DATA_DIR
+from config import PDF_DIR, INDEX_DIR, DATA_DIR, USE_LLM_NORMALIZE, LLM_NORMALIZE_NOISE_THRESHOLD
+from workspace import Workspace, get_workspace
+from job_queue import JobCancelled
 from llm_helper import normalize_chunks_with_llm
+from ocr_repair import repair_chunks
 
-# Feature flag for LLM normalization
-# WARNING: Enabling this will significantly slow down indexing (5-10+ minutes)
-# Only enable for heavily distorted OCR text
-USE_LLM_NORMALIZE = False  # Changed from True to False for performance
+# progress(stage, current, total, message) - see job_queue.JobContext.progress
+ProgressCallback = Callable[..., None]
 
-def clear_pdfs() -> int:
+
+def _report(progress: Optional[ProgressCallback], stage: str, current: int = 0, total: int = 0,
+            message: str = "") -> None:
+    if progress is not None:
+        progress(stage, current, total, message)
+
+
+def clear_pdfs(workspace: Optional[Workspace] = None) -> int:
     """
     Delete all PDF files in the PDF directory.
 
+    Args:
+        workspace: Workspace to clear (default: the global PDF_DIR)
+
     Returns:
         Number of files deleted
     """
+    pdf_dir = workspace.pdf_dir if workspace else PDF_DIR
     print("[CLEANUP] Deleting old PDFs...")
     deleted_count = 0
-    for f in Path(PDF_DIR).glob("*.pdf"):
+    for f in Path(pdf_dir).glob("*.pdf"):
         try:
             f.unlink()
             deleted_count += 1
@@ -56,17 +69,21 @@ def clear_pdfs() -> int:
     return deleted_count
 
 
-def clear_index() -> int:
+def clear_index(workspace: Optional[Workspace] = None) -> int:
     """
     Delete all files in the FAISS index directory.
 
+    Args:
+        workspace: Workspace to clear (default: the global INDEX_DIR)
+
     Returns:
         Number of files deleted
     """
+    index_dir = workspace.index_dir if workspace else INDEX_DIR
     print("[CLEANUP] Deleting old FAISS index...")
     deleted_count = 0
-    INDEX_DIR.mkdir(parents=True, exist_ok=True)
-    for f in Path(INDEX_DIR).glob("*.*"):  # Match .faiss, .pkl, etc.
+    index_dir.mkdir(parents=True, exist_ok=True)
+    for f in Path(index_dir).glob("*.*"):  # Match .faiss, .pkl, etc.
         try:
             f.unlink()
             deleted_count += 1
@@ -121,7 +138,8 @@ def _clean_text(text: str) -> str:
     text = re.sub(r"\n{3,}", "\n\n", text)
     return text.strip()
 
-def ocr_pdf_to_docs(pdf_path: str, source_name: str) -> List[Document]:
+def ocr_pdf_to_docs(pdf_path: str, source_name: str,
+                    progress: Optional[ProgressCallback] = None) -> List[Document]:
     """
     OCR the entire PDF file.
 
@@ -132,6 +150,7 @@ def ocr_pdf_to_docs(pdf_path: str, source_name: str) -> List[Document]:
     Args:
         pdf_path: Path to PDF file
         source_name: Original filename for metadata
+        progress: Optional callback, called once per page
 
     Returns:
         List of Document objects (one per page with text)
@@ -141,6 +160,7 @@ def ocr_pdf_to_docs(pdf_path: str, source_name: str) -> List[Document]:
         total_pages = len(doc)
         print(f"[INGEST] {source_name}: Running OCR on {total_pages} pages...")
         for i, page in enumerate(doc):
+            _report(progress, "load", i + 1, total_pages, f"{source_name} (OCR)")
             mat = fitz.Matrix(OCR_DPI_SCALE, OCR_DPI_SCALE)
             pix = page.get_pixmap(matrix=mat, alpha=False)
             pil = _pixmap_to_pil(pix)
@@ -154,7 +174,8 @@ def ocr_pdf_to_docs(pdf_path: str, source_name: str) -> List[Document]:
         print(f"[INGEST] {source_name}: OCR complete, extracted {len(docs)}/{total_pages} pages")
     return docs
 
-def hybrid_load_pdf(pdf_path: str, source_name: str) -> List[Document]:
+def hybrid_load_pdf(pdf_path: str, source_name: str,
+                    progress: Optional[ProgressCallback] = None) -> List[Document]:
     """
     Hybrid PDF loading with intelligent OCR fallback.
 
@@ -169,6 +190,7 @@ def hybrid_load_pdf(pdf_path: str, source_name: str) -> List[Document]:
     Args:
         pdf_path: Path to PDF file
         source_name: Original filename for metadata
+        progress: Optional callback, called once per page
 
     Returns:
         List of Document objects with extracted text
@@ -184,7 +206,7 @@ def hybrid_load_pdf(pdf_path: str, source_name: str) -> List[Document]:
     if not native_docs:
         # Entire file likely image-only: OCR the whole thing
         print(f"[INGEST] {source_name}: No native text found, using full OCR")
-        return ocr_pdf_to_docs(pdf_path, source_name)
+        return ocr_pdf_to_docs(pdf_path, source_name, progress)
 
     # 2) OCR weak pages only
     ocr_replacements: Dict[int, Document] = {}
@@ -193,6 +215,7 @@ def hybrid_load_pdf(pdf_path: str, source_name: str) -> List[Document]:
 
     with fitz.open(pdf_path) as pdf:
         for i, d in enumerate(native_docs):
+            _report(progress, "load", i + 1, len(native_docs), source_name)
             raw = (d.page_content or "").strip()
             if len(raw) >= MIN_TEXT_CHARS:
                 # mark native extraction
@@ -233,12 +256,26 @@ def hybrid_load_pdf(pdf_path: str, source_name: str) -> List[Document]:
     return merged
 
 
-def load_pdfs_from_folder(folder: str) -> List[Document]:
+def load_pdfs_from_folder(folder: str, progress: Optional[ProgressCallback] = None,
+                          name_map_path: Optional[Path] = None,
+                          failures: Optional[List[Dict[str, str]]] = None) -> List[Document]:
+    """
+    Load every PDF of a folder.
+
+    Ingest runs in worker processes without a Streamlit context, so files
+    that cannot be read are reported through `failures` (shown by the app)
+    instead of st.warning / st.error.
+
+    Args:
+        failures: Optional list that receives {"file": original name, "error": message}
+            per failed file (file is "" when the folder has no PDF)
+    """
     docs: List[Document] = []
+    failures = failures if failures is not None else []
     pdf_files_found = False
 
     # Load UUID->Name map (optional)
-    name_map_path = DATA_DIR / "uuid_name_map.json"
+    name_map_path = name_map_path or DATA_DIR / "uuid_name_map.json"
     name_map: Dict[str, str] = {}
     if name_map_path.exists():
         with open(name_map_path, "r", encoding="utf-8") as f:
@@ -253,34 +290,55 @@ def load_pdfs_from_folder(folder: str) -> List[Document]:
         print(f"[INGEST] Loading {fname} (Original: {original_name})")
 
         try:
-            loaded_docs = hybrid_load_pdf(path, original_name)
+            loaded_docs = hybrid_load_pdf(path, original_name, progress)
             if not loaded_docs:
                 print(f"[INGEST] {fname}: No text extracted (native+OCR).")
-                st.warning(f"{original_name}: 텍스트를 추출하지 못했습니다.")
+                failures.append({"file": original_name, "error": "텍스트를 추출하지 못했습니다."})
                 continue
 
             docs.extend(loaded_docs)
+        except JobCancelled:
+            raise  # Raised by the progress callback; stop instead of loading the next file
         except Exception as e:
             print(f"[INGEST] Error loading {fname}: {e}")
-            st.error(f"{original_name} 파일을 읽는 중 오류 발생: {e}")
+            failures.append({"file": original_name, "error": f"파일을 읽는 중 오류 발생: {e}"})
 
     if not pdf_files_found:
-        print("[INGEST] No PDF files found in data/pdfs/ folder.")
-        st.warning("data/pdfs/ 폴더에 PDF 파일이 없습니다. 먼저 파일을 업로드해주세요.")
+        print(f"[INGEST] No PDF files found in {folder}.")
+        failures.append({"file": "", "error": "업로드 폴더에 PDF 파일이 없습니다. 먼저 파일을 업로드해주세요."})
 
     return docs
 
 
 # BULD INDEX 
-def build_index():
+def build_index(progress: Optional[ProgressCallback] = None, workspace: Optional[Workspace] = None,
+                failures: Optional[List[Dict[str, str]]] = None) -> int:
+    """
+    Build the FAISS index from the PDFs of a workspace.
+
+    Args:
+        progress: Optional callback progress(stage, current, total, message),
+            called per page while loading and once per later stage
+            (split, repair, normalize, embed, save)
+        workspace: Workspace to index (default: the global PDF_DIR / INDEX_DIR)
+        failures: Optional list that receives per-file load failures
+            (see load_pdfs_from_folder)
+
+    Returns:
+        Number of indexed chunks (0 if no document was loaded)
+    """
+    workspace = workspace or get_workspace()
+
     # 1) Clear ONLY the old index
-    clear_index()
+    clear_index(workspace)
 
-    print(f"[INGEST] Loading PDFs from {PDF_DIR}")
-    docs = load_pdfs_from_folder(str(PDF_DIR))
+    print(f"[INGEST] Loading PDFs from {workspace.pdf_dir}")
+    docs = load_pdfs_from_folder(str(workspace.pdf_dir), progress, workspace.name_map_path, failures)
     if not docs:
         print("[INGEST] No documents loaded, skipping index build.")
-        return
+        return 0
+
+    _report(progress, "split", message=f"{len(docs)} pages")
 
     # 2) Split documents
     splitter = RecursiveCharacterTextSplitter(
@@ -296,12 +354,27 @@ def build_index():
     if not split_docs:
         raise ValueError("[INGEST] No text chunks after splitting. Check OCR or loaders.")
 
-    # 3) LLM normalization (optional)
+    # 3) Rule-based OCR repair (fast, every chunk)
+    _report(progress, "repair", message=f"{len(split_docs)} chunks")
+    split_docs = repair_chunks(split_docs)
+
+    # 4) LLM normalization (USE_LLM_NORMALIZE, noisy chunks only)
     if USE_LLM_NORMALIZE:
-        split_docs = normalize_chunks_with_llm(split_docs)
+        noisy_idx = [
+            i for i, d in enumerate(split_docs)
+            if d.metadata.get("ocr_noise", 0.0) >= LLM_NORMALIZE_NOISE_THRESHOLD
+        ]
+        print(f"[INGEST] {len(noisy_idx)}/{len(split_docs)} chunks above noise threshold "
+              f"{LLM_NORMALIZE_NOISE_THRESHOLD}, sending to LLM normalizer")
+        _report(progress, "normalize", message=f"{len(noisy_idx)} noisy chunks")
+        if noisy_idx:
+            normalized = normalize_chunks_with_llm([split_docs[i] for i in noisy_idx])
+            for i, d in zip(noisy_idx, normalized):
+                split_docs[i] = d
         print(f"[INGEST] Chunks after LLM normalization: {len(split_docs)}")
 
-    # 4) Embeddings & FAISS
+    # 5) Embeddings & FAISS
+    _report(progress, "embed", message=f"{len(split_docs)} chunks")
     print(f"[INGEST] Loading embedding model (first time may take 1-2 min to download)...")
     embeddings = HuggingFaceEmbeddings(
         model_name="jhgan/ko-sroberta-multitask",
@@ -312,13 +385,18 @@ def build_index():
     print(f"[INGEST] Creating FAISS index from {len(split_docs)} chunks...")
     vectorstore = FAISS.from_documents(split_docs, embeddings)
 
-    print(f"[INGEST] Saving index to {INDEX_DIR}...")
-    vectorstore.save_local(str(INDEX_DIR))
+    _report(progress, "save")
+    print(f"[INGEST] Saving index to {workspace.index_dir}...")
+    vectorstore.save_local(str(workspace.index_dir))
     print(f"[INGEST] ✅ FAISS index saved successfully!")
+    return len(split_docs)
 
 if __name__ == "__main__":
     try:
-        build_index()
+        load_failures: List[Dict[str, str]] = []
+        build_index(failures=load_failures)
+        for failure in load_failures:
+            st.sidebar.warning(f"{failure['file']}: {failure['error']}" if failure["file"] else failure["error"])
         st.sidebar.success("인덱스 생성 완료.")
     except Exception as e:
         st.sidebar.error(f"인덱스 생성 중 오류: {e}")
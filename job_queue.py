@@ -0,0 +1,460 @@
+"""
+Local background job queue for ingest and extraction.
+
+Jobs are rows in a SQLite database (no broker): the Streamlit app submits
+them and polls their state, worker processes claim and run them. Because
+the state lives on disk, a browser refresh can reattach to a running job
+and a second identical submission returns the existing job.
+
+- Job kinds: "ingest" (build_index) and "extract" (project extraction);
+  an ingest job can chain a follow-up job that is submitted when it succeeds
+- Progress: stage name plus current/total (pages while loading PDFs,
+  projects while extracting) and a free-text message
+- Cancellation is cooperative: the worker stops at its next progress report
+- Workers send heartbeats while a job runs; running jobs whose worker
+  died are requeued after JOB_STALE_SECONDS. Each heartbeat also marks the
+  job's workspace as used, and workspaces of queued/running jobs are kept
+  by evict_workspaces callers (active_workspaces)
+
+Run workers outside the app (e.g. as a separate systemd unit) with:
+    python job_queue.py --workers 2
+"""
+import argparse
+import hashlib
+import json
+import multiprocessing
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from config import JOB_DB_PATH, JOB_WORKERS, JOB_STALE_SECONDS
+from workspace import Workspace
+
+ACTIVE_STATUSES = ("queued", "running")
+FINAL_STATUSES = ("done", "failed", "cancelled")
+POLL_INTERVAL = 0.5  # Seconds between queue polls of an idle worker
+
+
+class JobCancelled(Exception):
+    """Raised inside a handler when its job was cancelled."""
+
+
+class JobQueue:
+    """
+    SQLite-backed job store shared by the app and the worker processes.
+
+    A new connection is opened per operation (as in llm_cache.LLMCache),
+    and claims use BEGIN IMMEDIATE so two workers never take the same job.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    kind TEXT NOT NULL,
+                    params TEXT NOT NULL,
+                    dedupe_key TEXT,
+                    status TEXT NOT NULL,
+                    stage TEXT NOT NULL DEFAULT '',
+                    progress_current INTEGER NOT NULL DEFAULT 0,
+                    progress_total INTEGER NOT NULL DEFAULT 0,
+                    message TEXT NOT NULL DEFAULT '',
+                    result TEXT,
+                    error TEXT,
+                    worker TEXT,
+                    created_at REAL NOT NULL,
+                    started_at REAL,
+                    finished_at REAL,
+                    heartbeat REAL
+                )
+                """
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs(status, created_at)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_dedupe ON jobs(dedupe_key)")
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(str(self.path), timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    @staticmethod
+    def make_dedupe_key(kind: str, params: Dict[str, Any]) -> str:
+        """Hash (kind, params) into a deduplication key."""
+        material = json.dumps({"kind": kind, "params": params}, ensure_ascii=False, sort_keys=True)
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    def submit(self, kind: str, params: Dict[str, Any], dedupe_key: Optional[str] = None,
+               reuse_done: bool = False) -> str:
+        """
+        Queue a job, or return the identical job that is already queued/running.
+
+        Args:
+            kind: Handler name ("ingest" or "extract")
+            params: JSON-serializable handler parameters
+            dedupe_key: Identity of the job (default: hash of kind and params)
+            reuse_done: Also return an identical job that already finished
+                successfully (only when its result is still valid)
+
+        Returns:
+            Job id
+        """
+        dedupe_key = dedupe_key or self.make_dedupe_key(kind, params)
+        statuses = ACTIVE_STATUSES + (("done",) if reuse_done else ())
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                f"SELECT id FROM jobs WHERE dedupe_key = ? AND status IN ({','.join('?' * len(statuses))}) "
+                "ORDER BY created_at DESC LIMIT 1",
+                (dedupe_key, *statuses),
+            ).fetchone()
+            if row is not None:
+                conn.execute("COMMIT")
+                print(f"[JOBS] Reusing {kind} job {row['id']} (identical job exists)")
+                return row["id"]
+            job_id = uuid.uuid4().hex
+            conn.execute(
+                "INSERT INTO jobs (id, kind, params, dedupe_key, status, created_at) "
+                "VALUES (?, ?, ?, ?, 'queued', ?)",
+                (job_id, kind, json.dumps(params, ensure_ascii=False), dedupe_key, time.time()),
+            )
+            conn.execute("COMMIT")
+        except sqlite3.Error:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+        print(f"[JOBS] Queued {kind} job {job_id}")
+        return job_id
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Returns:
+            Job dict (params/result decoded from JSON), or None if unknown
+        """
+        conn = self._connect()
+        try:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        finally:
+            conn.close()
+        if row is None:
+            return None
+        job = dict(row)
+        job["params"] = json.loads(job["params"])
+        job["result"] = json.loads(job["result"]) if job["result"] is not None else None
+        return job
+
+    def claim(self, worker: str) -> Optional[Dict[str, Any]]:
+        """Atomically take the oldest queued job for a worker (None if the queue is empty)."""
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT id FROM jobs WHERE status = 'queued' ORDER BY created_at LIMIT 1"
+            ).fetchone()
+            if row is not None:
+                conn.execute(
+                    "UPDATE jobs SET status = 'running', worker = ?, started_at = ?, heartbeat = ? "
+                    "WHERE id = ?",
+                    (worker, now, now, row["id"]),
+                )
+            conn.execute("COMMIT")
+        except sqlite3.Error:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+        return self.get(row["id"]) if row is not None else None
+
+    def _update(self, job_id: str, **fields: Any) -> None:
+        assignments = ", ".join(f"{k} = ?" for k in fields)
+        conn = self._connect()
+        try:
+            conn.execute(f"UPDATE jobs SET {assignments} WHERE id = ?", (*fields.values(), job_id))
+        finally:
+            conn.close()
+
+    def report_progress(self, job_id: str, stage: str, current: int = 0, total: int = 0,
+                        message: str = "") -> str:
+        """
+        Record progress and refresh the heartbeat.
+
+        Returns:
+            The job's current status (so workers can notice cancellation)
+        """
+        self._update(job_id, stage=stage, progress_current=current, progress_total=total,
+                     message=message, heartbeat=time.time())
+        job = self.get(job_id)
+        return job["status"] if job else "cancelled"
+
+    def set_result(self, job_id: str, result: Any) -> None:
+        """Store a (partial) result while the job is still running."""
+        self._update(job_id, result=json.dumps(result, ensure_ascii=False), heartbeat=time.time())
+
+    def finish(self, job_id: str, result: Any = None) -> None:
+        # A job cancelled while it was finishing stays cancelled
+        conn = self._connect()
+        try:
+            conn.execute(
+                "UPDATE jobs SET status = 'done', result = ?, finished_at = ? "
+                "WHERE id = ? AND status = 'running'",
+                (json.dumps(result, ensure_ascii=False), time.time(), job_id),
+            )
+        finally:
+            conn.close()
+
+    def heartbeat(self, job_id: str) -> None:
+        self._update(job_id, heartbeat=time.time())
+
+    def fail(self, job_id: str, error: str) -> None:
+        self._update(job_id, status="failed", error=error, finished_at=time.time())
+
+    def cancel(self, job_id: str) -> None:
+        """Cancel a queued or running job (running jobs stop at their next progress report)."""
+        conn = self._connect()
+        try:
+            conn.execute(
+                "UPDATE jobs SET status = 'cancelled', finished_at = ? "
+                "WHERE id = ? AND status IN ('queued', 'running')",
+                (time.time(), job_id),
+            )
+        finally:
+            conn.close()
+
+    def active_workspaces(self) -> List[str]:
+        """Workspace ids of queued and running jobs (must not be evicted)."""
+        conn = self._connect()
+        try:
+            placeholders = ",".join("?" * len(ACTIVE_STATUSES))
+            rows = conn.execute(f"SELECT params FROM jobs WHERE status IN ({placeholders})", ACTIVE_STATUSES).fetchall()
+        finally:
+            conn.close()
+        workspaces = {json.loads(row["params"]).get("workspace") for row in rows}
+        return sorted(w for w in workspaces if w)
+
+    def requeue_stale(self, stale_seconds: float = JOB_STALE_SECONDS) -> int:
+        """
+        Put running jobs whose worker stopped sending heartbeats back in the queue.
+
+        Returns:
+            Number of requeued jobs
+        """
+        conn = self._connect()
+        try:
+            cur = conn.execute(
+                "UPDATE jobs SET status = 'queued', worker = NULL, stage = '', message = 'requeued' "
+                "WHERE status = 'running' AND heartbeat < ?",
+                (time.time() - stale_seconds,),
+            )
+            count = cur.rowcount
+        finally:
+            conn.close()
+        if count:
+            print(f"[JOBS] Requeued {count} stale job(s)")
+        return count
+
+
+class JobContext:
+    """Handle passed to job handlers for progress reporting and follow-up jobs."""
+
+    def __init__(self, queue: JobQueue, job: Dict[str, Any]):
+        self.queue = queue
+        self.job = job
+
+    def progress(self, stage: str, current: int = 0, total: int = 0, message: str = "") -> None:
+        """
+        Report progress.
+
+        Raises:
+            JobCancelled: If the job was cancelled in the meantime
+        """
+        if self.queue.report_progress(self.job["id"], stage, current, total, message) == "cancelled":
+            raise JobCancelled(self.job["id"])
+
+    def partial(self, result: Any) -> None:
+        """Publish a partial result that pollers can display before the job ends."""
+        self.queue.set_result(self.job["id"], result)
+
+
+# ---- Handlers ----
+
+def _run_ingest(params: Dict[str, Any], ctx: JobContext) -> Dict[str, Any]:
+    from ingest import build_index
+    from workspace import get_workspace
+
+    # Per-file load failures; workers have no Streamlit context, so the app shows them
+    failures: List[Dict[str, str]] = []
+    try:
+        chunks = build_index(progress=ctx.progress, workspace=get_workspace(params.get("workspace")),
+                             failures=failures)
+    except BaseException:
+        if failures:
+            ctx.partial({"chunks": 0, "failures": failures})  # Kept on the failed/cancelled job
+        raise
+    result: Dict[str, Any] = {"chunks": chunks or 0, "failures": failures}
+    follow_up = params.get("then")
+    if follow_up and chunks:
+        ctx.progress("chain", message=follow_up["kind"])  # Not if cancelled meanwhile
+        # Chained job: same files, so key it on this ingest job
+        result["next_job"] = ctx.queue.submit(
+            follow_up["kind"], follow_up["params"],
+            dedupe_key=ctx.queue.make_dedupe_key(follow_up["kind"], {**follow_up["params"], "after": ctx.job["id"]}),
+        )
+    return result
+
+
+def _run_extract(params: Dict[str, Any], ctx: JobContext) -> List[Dict[str, Any]]:
+    from config import ARCHIVE_EXTRACTIONS, EXTRACTION_MODE, STREAM_EXTRACTION
+    from project_archive import archive_extraction
+    from rag import cascade_enabled, get_raw_project_data, repair_project_data, stream_raw_project_data
+
+    query = params["query"]
+    workspace_id = params.get("workspace")
+    # The fast-model cascade validates whole responses, so it uses the blocking path
+    if STREAM_EXTRACTION and EXTRACTION_MODE != "map_reduce" and not cascade_enabled():
+        projects: List[Dict[str, Any]] = []
+        ctx.progress("extract", message="retrieving chunks")
+        stream = stream_raw_project_data(query, workspace_id=workspace_id)
+        try:
+            for project in stream:
+                projects.append(project)
+                ctx.partial(projects)
+                ctx.progress("extract", len(projects), message="projects extracted")
+        finally:
+            stream.close()
+        # Streamed rows are unvalidated; repair them before they are archived
+        ctx.progress("repair", len(projects), message="re-extracting defective rows")
+        repaired = repair_project_data(projects, workspace_id=workspace_id)
+        if repaired is not projects:
+            projects = repaired
+            ctx.partial(projects)
+    else:
+        ctx.progress("extract", message=f"{EXTRACTION_MODE} extraction" + (" (cascade)" if cascade_enabled() else ""))
+        projects = get_raw_project_data(query, workspace_id=workspace_id)
+
+    if ARCHIVE_EXTRACTIONS:
+        archive_extraction(params.get("files_key"), projects)
+    return projects
+
+
+JOB_HANDLERS: Dict[str, Callable[[Dict[str, Any], JobContext], Any]] = {
+    "ingest": _run_ingest,
+    "extract": _run_extract,
+}
+
+
+# ---- Workers ----
+
+def run_job(queue: JobQueue, job: Dict[str, Any]) -> None:
+    """Run one claimed job and record its outcome."""
+    job_id, kind = job["id"], job["kind"]
+    if kind not in JOB_HANDLERS:
+        queue.fail(job_id, f"Unknown job kind: {kind}")
+        return
+    print(f"[JOBS] Worker {os.getpid()} running {kind} job {job_id}")
+    started = time.time()
+
+    # Keep the heartbeat alive during long steps without progress reports
+    # (one OCR page, a blocking LLM call) so the job is not requeued, and
+    # keep the job's workspace marked as used so it is not evicted meanwhile
+    finished = threading.Event()
+    workspace_id = job["params"].get("workspace")
+
+    def beat() -> None:
+        while not finished.wait(JOB_STALE_SECONDS / 4):
+            queue.heartbeat(job_id)
+            if workspace_id:
+                try:
+                    Workspace.for_id(workspace_id).touch()
+                except (OSError, ValueError) as e:
+                    print(f"[JOBS] Could not mark workspace {workspace_id} as used: {e}")
+
+    threading.Thread(target=beat, name="job-heartbeat", daemon=True).start()
+    try:
+        result = JOB_HANDLERS[kind](job["params"], JobContext(queue, job))
+    except JobCancelled:
+        print(f"[JOBS] {kind} job {job_id} cancelled")
+        return
+    except Exception as e:
+        print(f"[JOBS] {kind} job {job_id} failed: {e}")
+        queue.fail(job_id, f"{type(e).__name__}: {e}")
+        return
+    finally:
+        finished.set()
+    queue.finish(job_id, result)
+    print(f"[JOBS] {kind} job {job_id} done in {time.time() - started:.1f}s")
+
+
+def worker_loop(db_path: str, stop: Optional[Any] = None) -> None:
+    """Claim and run jobs until `stop` (an Event) is set."""
+    queue = JobQueue(Path(db_path))
+    worker = f"{os.uname().nodename if hasattr(os, 'uname') else 'local'}:{os.getpid()}"
+    print(f"[JOBS] Worker {worker} started")
+    while stop is None or not stop.is_set():
+        queue.requeue_stale()
+        job = queue.claim(worker)
+        if job is None:
+            time.sleep(POLL_INTERVAL)
+            continue
+        run_job(queue, job)
+
+
+_queue: Optional[JobQueue] = None
+_workers: List[multiprocessing.Process] = []
+_queue_lock = threading.Lock()
+
+
+def get_job_queue() -> JobQueue:
+    """Return the shared job queue."""
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            _queue = JobQueue(JOB_DB_PATH)
+    return _queue
+
+
+def start_workers(count: int = JOB_WORKERS) -> int:
+    """
+    Start worker processes for this app process (idempotent; dead workers
+    are replaced). Uses the "spawn" start method so workers do not inherit
+    Streamlit's threads.
+
+    Returns:
+        Number of live workers
+    """
+    get_job_queue()  # Create the schema before workers race to do it
+    with _queue_lock:
+        _workers[:] = [p for p in _workers if p.is_alive()]
+        ctx = multiprocessing.get_context("spawn")
+        while len(_workers) < count:
+            p = ctx.Process(target=worker_loop, args=(str(JOB_DB_PATH),), name="job-worker", daemon=True)
+            p.start()
+            _workers.append(p)
+        return len(_workers)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run background job workers.")
+    parser.add_argument("--workers", type=int, default=max(JOB_WORKERS, 1))
+    args = parser.parse_args()
+    if args.workers == 1:
+        worker_loop(str(JOB_DB_PATH))
+    else:
+        processes = [
+            multiprocessing.Process(target=worker_loop, args=(str(JOB_DB_PATH),), name="job-worker")
+            for _ in range(args.workers)
+        ]
+        for p in processes:
+            p.start()
+        for p in processes:
+            p.join()
@@ -0,0 +1,135 @@
+"""
+Incremental JSON parsing for streamed LLM output.
+
+The extraction prompt asks the model for a JSON array of project objects.
+When the response is streamed token by token, each project object can be
+parsed as soon as its closing brace arrives instead of waiting for the
+whole array, and a malformed tail only loses the object it belongs to.
+"""
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+
+class JSONArrayStreamParser:
+    """
+    Extract complete top-level objects from a JSON array fed in pieces.
+
+    Only brace depth and string state are tracked, so surrounding noise
+    (markdown fences, a missing closing bracket, trailing text) is ignored.
+    A bare object without the array wrapper is emitted the same way.
+
+    Usage:
+        parser = JSONArrayStreamParser()
+        for piece in stream:
+            for obj in parser.feed(piece):
+                ...
+    """
+
+    def __init__(self):
+        self._buffer = ""
+        self._pos = 0          # Next character of _buffer to scan
+        self._start = -1       # Start index of the object being read
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self.emitted = 0
+        self.skipped: List[str] = []  # Raw text of objects that failed to parse
+
+    def feed(self, text: str) -> List[Dict[str, Any]]:
+        """
+        Add streamed text and return the objects completed by it.
+
+        Args:
+            text: Next piece of the streamed response
+
+        Returns:
+            List of newly completed objects (possibly empty)
+        """
+        if not text:
+            return []
+        self._buffer += text
+        completed: List[Dict[str, Any]] = []
+
+        buf = self._buffer
+        i = self._pos
+        while i < len(buf):
+            ch = buf[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                if self._depth > 0:
+                    self._in_string = True
+            elif ch == "{":
+                if self._depth == 0:
+                    self._start = i
+                self._depth += 1
+            elif ch == "}" and self._depth > 0:
+                self._depth -= 1
+                if self._depth == 0:
+                    obj = self._decode(buf[self._start:i + 1])
+                    if obj is not None:
+                        completed.append(obj)
+                    self._start = -1
+            i += 1
+
+        # Drop text that can no longer be part of an object
+        if self._depth == 0:
+            self._buffer = ""
+            self._pos = 0
+        else:
+            self._buffer = buf[self._start:]
+            self._pos = i - self._start
+            self._start = 0
+        return completed
+
+    def close(self) -> str:
+        """
+        Finish the stream.
+
+        Returns:
+            The unterminated object text left in the buffer ("" if none)
+        """
+        leftover = self._buffer if self._depth > 0 else ""
+        if leftover:
+            self.skipped.append(leftover)
+        self._buffer = ""
+        self._pos = 0
+        self._start = -1
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        return leftover
+
+    def _decode(self, raw: str) -> Optional[Dict[str, Any]]:
+        try:
+            obj = json.loads(raw)
+        except json.JSONDecodeError:
+            self.skipped.append(raw)
+            return None
+        if not isinstance(obj, dict):
+            self.skipped.append(raw)
+            return None
+        self.emitted += 1
+        return obj
+
+
+def salvage_json_objects(text: str) -> Tuple[List[Dict[str, Any]], List[str]]:
+    """
+    Parse every well-formed top-level object out of a complete response.
+
+    Args:
+        text: Full LLM output (fenced, truncated or otherwise noisy)
+
+    Returns:
+        (objects, skipped) - skipped holds the raw text of malformed or
+        unterminated objects
+    """
+    parser = JSONArrayStreamParser()
+    objects = parser.feed(text or "")
+    parser.close()
+    return objects, parser.skipped
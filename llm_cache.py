@@ -0,0 +1,221 @@
+"""
+Persistent LLM response cache.
+
+Responses are stored in a SQLite database keyed by a hash of
+(model, endpoint, prompt, options), so re-running normalization or
+extraction on unchanged text returns without calling Ollama.
+
+- Safe for several Streamlit sessions/processes (SQLite WAL + busy timeout)
+- LRU eviction by entry count and by total response size
+- Empty results ("", "[]", "{}") and, for JSON-format requests, unparseable
+  responses are never stored, so one bad generation is not replayed on
+  every retry
+- Hit/miss counters for monitoring
+"""
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from config import LLM_CACHE_PATH, USE_LLM_CACHE, LLM_CACHE_MAX_ENTRIES, LLM_CACHE_MAX_MB
+
+
+def is_cacheable_response(response: Any, options: Optional[Dict[str, Any]] = None) -> bool:
+    """
+    Check whether a model response is worth caching.
+
+    Args:
+        response: Response text
+        options: Cache options; a "format" entry means the response must be JSON
+
+    Returns:
+        False for empty text, empty JSON values ([], {}, "", null) and, when
+        JSON was requested, text that does not parse
+    """
+    if not isinstance(response, str) or not response.strip():
+        return False
+    try:
+        parsed = json.loads(response)
+    except ValueError:
+        return not (options or {}).get("format")
+    return parsed not in ([], {}, "", None)
+
+
+class LLMCache:
+    """
+    Disk-backed LLM response cache with LRU and size-based eviction.
+
+    A new SQLite connection is opened per operation, so one instance can be
+    shared between threads; writes use BEGIN IMMEDIATE so concurrent
+    processes serialize on the database lock instead of corrupting it.
+    """
+
+    def __init__(self, path: Path, max_entries: int = 5000, max_bytes: int = 200 * 1024 * 1024):
+        self.path = Path(path)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS llm_cache (
+                    key TEXT PRIMARY KEY,
+                    model TEXT,
+                    response TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_access REAL NOT NULL,
+                    hit_count INTEGER NOT NULL DEFAULT 0
+                )
+                """
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_cache_access ON llm_cache(last_access)")
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(str(self.path), timeout=30, isolation_level=None)
+
+    @staticmethod
+    def make_key(model: str, endpoint: str, prompt: str, options: Optional[Dict[str, Any]] = None) -> str:
+        """Hash (model, endpoint, prompt, options) into a cache key."""
+        material = json.dumps(
+            {"model": model, "endpoint": endpoint, "prompt": prompt, "options": options or {}},
+            ensure_ascii=False,
+            sort_keys=True,
+        )
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    def get(self, model: str, endpoint: str, prompt: str, options: Optional[Dict[str, Any]] = None) -> Optional[str]:
+        """
+        Look up a cached response.
+
+        Returns:
+            Cached response text, or None on a miss (or if the cache is unreadable)
+        """
+        key = self.make_key(model, endpoint, prompt, options)
+        try:
+            conn = self._connect()
+            try:
+                row = conn.execute("SELECT response FROM llm_cache WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    conn.execute(
+                        "UPDATE llm_cache SET last_access = ?, hit_count = hit_count + 1 WHERE key = ?",
+                        (time.time(), key),
+                    )
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            print(f"[CACHE] Lookup failed: {e}")
+            row = None
+
+        with self._lock:
+            if row is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return row[0] if row is not None else None
+
+    def put(self, model: str, endpoint: str, prompt: str, response: str,
+            options: Optional[Dict[str, Any]] = None) -> None:
+        """
+        Store a response and evict least-recently-used entries over the limits.
+
+        Responses rejected by is_cacheable_response are skipped.
+        """
+        if not is_cacheable_response(response, options):
+            print(f"[CACHE] Skipping empty or unparseable {endpoint} response")
+            return
+        key = self.make_key(model, endpoint, prompt, options)
+        now = time.time()
+        size = len(response.encode("utf-8"))
+        try:
+            conn = self._connect()
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                conn.execute(
+                    "INSERT OR REPLACE INTO llm_cache (key, model, response, size, created_at, last_access) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (key, model, response, size, now, now),
+                )
+                self._evict(conn)
+                conn.execute("COMMIT")
+            except sqlite3.Error:
+                conn.execute("ROLLBACK")
+                raise
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            print(f"[CACHE] Store failed: {e}")
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        count, total = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM llm_cache").fetchone()
+        if count <= self.max_entries and total <= self.max_bytes:
+            return
+
+        victims = []
+        for key, size in conn.execute("SELECT key, size FROM llm_cache ORDER BY last_access ASC"):
+            if count <= self.max_entries and total <= self.max_bytes:
+                break
+            victims.append((key,))
+            count -= 1
+            total -= size
+        conn.executemany("DELETE FROM llm_cache WHERE key = ?", victims)
+        print(f"[CACHE] Evicted {len(victims)} least-recently-used entr{'y' if len(victims) == 1 else 'ies'}")
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters for this process and the on-disk cache size."""
+        try:
+            conn = self._connect()
+            try:
+                entries, total = conn.execute(
+                    "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM llm_cache"
+                ).fetchone()
+            finally:
+                conn.close()
+        except sqlite3.Error:
+            entries, total = 0, 0
+        with self._lock:
+            hits, misses = self.hits, self.misses
+        lookups = hits + misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / lookups, 3) if lookups else 0.0,
+            "entries": entries,
+            "total_bytes": total,
+        }
+
+    def clear(self) -> None:
+        """Delete all cached responses."""
+        conn = self._connect()
+        try:
+            conn.execute("DELETE FROM llm_cache")
+        finally:
+            conn.close()
+
+
+_cache: Optional[LLMCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_llm_cache() -> Optional[LLMCache]:
+    """
+    Return the shared LLM cache, or None when USE_LLM_CACHE is disabled.
+    """
+    global _cache
+    if not USE_LLM_CACHE:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = LLMCache(
+                LLM_CACHE_PATH,
+                max_entries=LLM_CACHE_MAX_ENTRIES,
+                max_bytes=LLM_CACHE_MAX_MB * 1024 * 1024,
+            )
+    return _cache
@@ -4,23 +4,32 @@ LLM helper module for text normalization using Ollama.
 Provides functions to clean and normalize OCR-extracted text
 using local LLM models via Ollama API.
 """
-import hashlib
+import asyncio
+import re
 import requests
-from typing import List
+from typing import Dict, List, Tuple
 from langchain_core.documents import Document
 
-from config import OLLAMA_BASE_URL, OLLAMA_MODEL
+from config import OLLAMA_BASE_URL, USE_LLM_NORMALIZE
+from ollama_client import get_ollama_client
 
-# Feature flag: Enable/disable LLM normalization
-# WARNING: Enabling this will significantly slow down indexing
-USE_LLM_NORMALIZE = False  # Disabled by default for performance 
+# Batched normalization: several chunks are packed into one delimited prompt
+# and packs are sent concurrently (bounded by OLLAMA_MAX_CONCURRENCY)
+MIN_NORMALIZE_CHARS = 120        # Smaller chunks (headings, fragments) are kept as-is
+NORMALIZE_BATCH_CHARS = 6000     # Max chunk text per packed request
+NORMALIZE_BATCH_MAX_CHUNKS = 8   # Max chunks per packed request
+NORMALIZE_MIN_LENGTH_RATIO = 0.5 # Reject outputs that shrink/grow the chunk beyond these ratios
+NORMALIZE_MAX_LENGTH_RATIO = 1.5
 
+_PACKED_BLOCK_RE = re.compile(r"<<<CHUNK (\d+)>>>\s*(.*?)\s*<<<END \1>>>", re.DOTALL)
 
-# LLM_CACHE_PATH = DATA_DIR / "llm"
 
 def ollama_generate(prompt: str, timeout: int = 60) -> str:
     """
-    Calls Ollama /api/generate endpoint.
+    Calls Ollama /api/generate endpoint through the shared client.
+
+    Uses the pooled connection, retries and the persistent LLM cache
+    provided by ollama_client.
 
     Args:
         prompt: The text prompt to send to the model
@@ -33,13 +42,7 @@ def ollama_generate(prompt: str, timeout: int = 60) -> str:
         requests.exceptions.RequestException: If the request fails
     """
     try:
-        resp = requests.post(
-            f"{OLLAMA_BASE_URL}/api/generate",
-            json={"model": OLLAMA_MODEL, "prompt": prompt, "stream": False},
-            timeout=timeout
-        )
-        resp.raise_for_status()
-        data = resp.json()
+        data = get_ollama_client().generate(prompt, timeout=timeout)
         return data.get("response", "").strip()
     except requests.exceptions.Timeout:
         print(f"[LLM] Request timeout after {timeout}s")
@@ -52,9 +55,15 @@ def ollama_generate(prompt: str, timeout: int = 60) -> str:
         print(f"[LLM] Unexpected error: {e}")
         raise
 
-def _hash_text(text: str) -> str:
-    """Generate SHA256 hash for text (used for caching)."""
-    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+async def aollama_generate(prompt: str, timeout: int = 60) -> str:
+    """
+    Async variant of ollama_generate for concurrent batches.
+
+    Concurrency is bounded by the shared client (OLLAMA_MAX_CONCURRENCY).
+    """
+    data = await get_ollama_client().agenerate(prompt, timeout=timeout)
+    return data.get("response", "").strip()
 
 
 def normalize_text_via_llm(text: str) -> str:
@@ -76,9 +85,7 @@ def normalize_text_via_llm(text: str) -> str:
     
     if not text or not text.strip():
         return text
-    
-    key = _hash_text(text) 
-    
+
     prompt = f""""You are a text normalizer for OCR outputs.
     - Fix broken spacing and line-break hyphenations (e.g., "de-\nfault" -> "default").
     - Remove page headers/footers/artifacts if obviously repeated noise.
@@ -97,20 +104,127 @@ def normalize_text_via_llm(text: str) -> str:
         print(f"[LLM] Normalize failed: {e}")
         normalized = text
 
-    # cache[key] = normalized
-    # _save_llm_cache(cache)
     return normalized
 
 
-def normalize_chunks_with_llm(split_docs: List[Document]) -> List[Document]:
+def _build_packed_prompt(texts: List[str]) -> str:
+    """Build one normalization prompt for several chunks, each wrapped in markers."""
+    blocks = "\n\n".join(
+        f"<<<CHUNK {i}>>>\n{text}\n<<<END {i}>>>" for i, text in enumerate(texts, 1)
+    )
+    return f"""You are a text normalizer for OCR outputs.
+The input contains {len(texts)} independent text chunks, each wrapped in <<<CHUNK n>>> ... <<<END n>>> markers.
+For EACH chunk:
+- Fix broken spacing and line-break hyphenations (e.g., "de-\nfault" -> "default").
+- Remove page headers/footers/artifacts if obviously repeated noise.
+- Keep the original meaning; DO NOT summarize or omit real content.
+- Never move text between chunks.
+
+Return ALL {len(texts)} chunks in the same order and with the same markers,
+as PLAIN TEXT only (no markdown, no explanations).
+
+{blocks}"""
+
+
+def _pack_chunks(items: List[Tuple[int, str]]) -> List[List[Tuple[int, str]]]:
+    """Group (index, text) items into packs bounded by size and chunk count."""
+    packs: List[List[Tuple[int, str]]] = []
+    current: List[Tuple[int, str]] = []
+    current_len = 0
+    for item in items:
+        size = len(item[1])
+        if current and (current_len + size > NORMALIZE_BATCH_CHARS
+                        or len(current) >= NORMALIZE_BATCH_MAX_CHUNKS):
+            packs.append(current)
+            current, current_len = [], 0
+        current.append(item)
+        current_len += size
+    if current:
+        packs.append(current)
+    return packs
+
+
+def _is_valid_normalization(original: str, cleaned: str) -> bool:
+    """Reject empty outputs and outputs that dropped or invented too much text."""
+    if not cleaned or not cleaned.strip():
+        return False
+    ratio = len(cleaned) / max(len(original), 1)
+    return NORMALIZE_MIN_LENGTH_RATIO <= ratio <= NORMALIZE_MAX_LENGTH_RATIO
+
+
+def _split_packed_response(response: str, count: int) -> Dict[int, str]:
+    """
+    Split a packed response back into chunks.
+
+    Returns:
+        Mapping of 1-based chunk position -> text, for markers that appear
+        exactly once; missing or duplicated positions are left out.
+    """
+    found: Dict[int, List[str]] = {}
+    for match in _PACKED_BLOCK_RE.finditer(response):
+        pos = int(match.group(1))
+        if 1 <= pos <= count:
+            found.setdefault(pos, []).append(match.group(2))
+    return {pos: texts[0] for pos, texts in found.items() if len(texts) == 1}
+
+
+async def _normalize_pack(pack: List[Tuple[int, str]]) -> Dict[int, str]:
+    """
+    Normalize one pack; chunks that fail validation are retried alone.
+
+    Returns:
+        Mapping of chunk index -> normalized text (only successful chunks)
+    """
+    results: Dict[int, str] = {}
+    retry: List[Tuple[int, str]] = []
+
+    if len(pack) > 1:
+        try:
+            response = await aollama_generate(_build_packed_prompt([t for _, t in pack]), timeout=120)
+            parts = _split_packed_response(response.replace("\u000c", " "), len(pack))
+        except Exception as e:
+            print(f"[LLM] Packed normalize failed ({len(pack)} chunks): {e}")
+            parts = {}
+        for pos, (idx, text) in enumerate(pack, 1):
+            cleaned = parts.get(pos, "").strip()
+            if _is_valid_normalization(text, cleaned):
+                results[idx] = cleaned
+            else:
+                retry.append((idx, text))
+    else:
+        retry = list(pack)
+
+    for idx, text in retry:
+        # Same fallback as normalize_text_via_llm: keep the original on failure
+        cleaned = await asyncio.to_thread(normalize_text_via_llm, text)
+        if _is_valid_normalization(text, cleaned):
+            results[idx] = cleaned
+    return results
+
+
+async def _normalize_packs(packs: List[List[Tuple[int, str]]]) -> Dict[int, str]:
+    merged: Dict[int, str] = {}
+    for result in await asyncio.gather(*(_normalize_pack(p) for p in packs)):
+        merged.update(result)
+    return merged
+
+
+def normalize_chunks_with_llm(split_docs: List[Document], batched: bool = True) -> List[Document]:
     """
     Normalize a list of document chunks using LLM.
 
-    Small chunks (<120 chars) are skipped to save processing time.
+    Small chunks (<MIN_NORMALIZE_CHARS) are skipped to save processing time.
     Normalized chunks are marked with llm_normalized=True in metadata.
 
+    In batched mode several chunks are packed into one delimited prompt and
+    the packs run concurrently; the answers are split back out per chunk and
+    validated, and chunks whose answer is missing or implausible are retried
+    on their own.
+
     Args:
         split_docs: List of document chunks
+        batched: Use packed, concurrent requests (default) instead of one
+                 sequential request per chunk
 
     Returns:
         List of normalized document chunks
@@ -119,13 +233,16 @@ def normalize_chunks_with_llm(split_docs: List[Document]) -> List[Document]:
         print("[LLM] LLM normalization is disabled (USE_LLM_NORMALIZE=False)")
         return split_docs
 
+    if batched:
+        return _normalize_chunks_batched(split_docs)
+
     print(f"[LLM] Normalizing {len(split_docs)} document chunks...")
     normalized_docs: List[Document] = []
 
     for i, d in enumerate(split_docs):
         txt = d.page_content or ""
         # Skip tiny chunks (often headings or short fragments)
-        if len(txt) < 120:
+        if len(txt) < MIN_NORMALIZE_CHARS:
             normalized_docs.append(d)
             continue
 
@@ -143,4 +260,30 @@ def normalize_chunks_with_llm(split_docs: List[Document]) -> List[Document]:
             normalized_docs.append(d)
 
     print(f"[LLM] Normalization complete")
-    return normalized_docs
\ No newline at end of file
+    return normalized_docs
+
+
+def _normalize_chunks_batched(split_docs: List[Document]) -> List[Document]:
+    items = [
+        (i, d.page_content)
+        for i, d in enumerate(split_docs)
+        if d.page_content and len(d.page_content) >= MIN_NORMALIZE_CHARS
+    ]
+    packs = _pack_chunks(items)
+    print(f"[LLM] Normalizing {len(items)}/{len(split_docs)} document chunks in {len(packs)} packed requests...")
+
+    cleaned_by_index = asyncio.run(_normalize_packs(packs)) if packs else {}
+
+    normalized_docs: List[Document] = []
+    for i, d in enumerate(split_docs):
+        cleaned = cleaned_by_index.get(i)
+        if cleaned and cleaned != d.page_content:
+            # Keep original metadata + mark as normalized
+            md = {**(d.metadata or {}), "llm_normalized": True}
+            normalized_docs.append(Document(page_content=cleaned, metadata=md))
+        else:
+            normalized_docs.append(d)
+
+    changed = sum(1 for d in normalized_docs if (d.metadata or {}).get("llm_normalized"))
+    print(f"[LLM] Normalization complete ({changed} chunks changed)")
+    return normalized_docs
@@ -0,0 +1,225 @@
+"""
+Rule-based OCR repair for Korean career documents.
+
+A deterministic pre-pass that runs on every chunk before indexing:
+- Fixes known Hangul misreads from a maintained confusion table
+  (label-only misreads such as 성영 -> 성명 only in label position)
+- Normalizes dates to YYYY-MM-DD (or YYYY-MM), only in date context for
+  two-digit years and year-month forms
+- Rejoins broken line wraps
+- Collapses whitespace
+
+It also computes a per-chunk noise score (0.0 = clean, 1.0 = garbage) so
+that the expensive LLM normalizer only runs on the worst chunks.
+"""
+import re
+from typing import Dict, List, Tuple
+
+from langchain_core.documents import Document
+
+from date_parser import expand_two_digit_year
+
+# ---- Confusion table: OCR misread -> correct form ----
+# Only add entries that are never valid words themselves, so native-text
+# chunks pass through unchanged.
+OCR_CONFUSIONS: Dict[str, str] = {
+    # 인적사항
+    "셩명": "성명",
+    "성멍": "성명",
+    "생년윌일": "생년월일",
+    # 섹션 제목
+    "기술경럭": "기술경력",
+    "기슬경력": "기술경력",
+    "기술경혁": "기술경력",
+    "건설사엄관리": "건설사업관리",
+    "건설사업관라": "건설사업관리",
+    # 표 머리글
+    "사업멍": "사업명",
+    "사엄명": "사업명",
+    "용억명": "용역명",
+    "용역멍": "용역명",
+    "공사멍": "공사명",
+    "발주쳐": "발주처",
+    "밭주처": "발주처",
+    "발추처": "발주처",
+    "발주기곤": "발주기관",
+    "참여기칸": "참여기간",
+    "참어기간": "참여기간",
+    "담당엄무": "담당업무",
+    "담당업우": "담당업무",
+    "담담업무": "담당업무",
+    "공총": "공종",
+    # 발주처 / 회사명
+    "주식희사": "주식회사",
+    "주식회시": "주식회사",
+    "유한희사": "유한회사",
+    "광억시": "광역시",
+    "굉역시": "광역시",
+    "한국도로공시": "한국도로공사",
+    "국토관리칭": "국토관리청",
+}
+
+_CONFUSION_RE = re.compile(
+    "|".join(re.escape(k) for k in sorted(OCR_CONFUSIONS, key=len, reverse=True))
+)
+
+# Misreads that are also valid text (성영 is a given name), fixed only in
+# label position: at the start of a line, followed by ":"
+_LABEL_CONFUSIONS: Dict[str, str] = {
+    "성영": "성명",
+}
+_LABEL_CONFUSION_RE = re.compile(
+    r"^(\s*)(" + "|".join(re.escape(k) for k in _LABEL_CONFUSIONS) + r")(?=\s*[:：])",
+    re.MULTILINE,
+)
+
+# 2005.03.31 / 2005. 3. 31 / 2005-3-31 / 2005/03/31 / 2005년 3월 31일 / 05.03.31
+# Two-digit years are only dates in date context (see _replace_ymd): after a
+# 기간/일자 label or "~" (the optional "context" group), before "~", or with 년
+_DATE_YMD_RE = re.compile(
+    r"(?P<context>(?:기간|일자)\s*[:：]?\s*|~\s*)?"
+    r"(?<![\d.])(\d{4}|\d{2})\s*([.\-/년])\s*(\d{1,2})\s*[.\-/월]\s*(\d{1,2})(?:\s*일)?(?![\d])"
+    r"(?P<range>(?=\s*~))?"
+)
+# 2005.03 / 2005년 3월 (year-month only): 19xx/20xx years in date context only
+# (년/월 markers, a 기간/일자 label or an adjacent "~"), so lengths and amounts
+# such as "L=1250.5m" or "2019.5억원" are left alone
+_DATE_YM_RE = re.compile(
+    r"(?P<context>(?:기간|일자)\s*[:：]?\s*|~\s*)?"
+    r"(?<![\d.\-])((?:19|20)\d{2})\s*([.년])\s*(\d{1,2})(?P<marker>\s*월)?(?![\d.\-])"
+    r"(?P<range>(?=\s*~))?"
+)
+
+_HSPACE_RE = re.compile(r"[ \t\u00a0\u3000]+")
+_HYPHEN_WRAP_RE = re.compile(r"([A-Za-z])-\n([a-z])")
+_RANGE_WRAP_RE = re.compile(r"\s*~\s*\n\s*")
+
+_ALLOWED_CHAR_RE = re.compile(r"[가-힣A-Za-z0-9\s.,:;()\[\]\-~/%·&'\"㈜+*#@!?=_<>|]")
+_JAMO_RE = re.compile(r"[ㄱ-ㅎㅏ-ㅣ]")
+
+
+def _expand_year(year: str) -> int:
+    """Two-digit years follow date_parser.expand_two_digit_year (same rule as the extraction prompt)."""
+    return expand_two_digit_year(int(year)) if len(year) == 2 else int(year)
+
+
+def _replace_ymd(match: re.Match) -> str:
+    year, separator, month, day = match.group(2), match.group(3), int(match.group(4)), int(match.group(5))
+    context = match.group("context") or ""
+    if not (1 <= month <= 12 and 1 <= day <= 31):
+        return match.group(0)
+    if len(year) == 2 and not (context or separator == "년" or match.group("range") is not None):
+        return match.group(0)  # e.g. "v 12.03.15", clause or version numbers
+    return f"{context}{_expand_year(year):04d}-{month:02d}-{day:02d}"
+
+
+def _replace_ym(match: re.Match) -> str:
+    year, separator, month = match.group(2), match.group(3), int(match.group(4))
+    context = match.group("context") or ""
+    if not 1 <= month <= 12:
+        return match.group(0)
+    if not (context or separator == "년" or match.group("marker") or match.group("range") is not None):
+        return match.group(0)  # e.g. "2019.5억원"
+    return f"{context}{int(year):04d}-{month:02d}"
+
+
+def normalize_dates(text: str) -> str:
+    """Rewrite recognizable dates as YYYY-MM-DD / YYYY-MM; invalid dates are left alone."""
+    text = _DATE_YMD_RE.sub(_replace_ymd, text)
+    return _DATE_YM_RE.sub(_replace_ym, text)
+
+
+def _rejoin_wraps(text: str) -> str:
+    """
+    Rejoin lines broken inside a word, a date range or an open parenthesis.
+
+    A line with an unclosed "(" absorbs only the next line (with a space),
+    so a missing ")" cannot swallow the rest of the chunk.
+    """
+    text = _HYPHEN_WRAP_RE.sub(r"\1\2", text)
+    text = _RANGE_WRAP_RE.sub(" ~ ", text)
+
+    lines = text.split("\n")
+    joined: List[str] = []
+    can_join = False
+    for line in lines:
+        if can_join and line.strip():
+            joined[-1] = joined[-1].rstrip() + " " + line.strip()
+            can_join = False
+        else:
+            joined.append(line)
+            can_join = line.count("(") > line.count(")")
+    return "\n".join(joined)
+
+
+def _collapse_whitespace(text: str) -> str:
+    text = text.replace("\x0c", " ")
+    text = _HSPACE_RE.sub(" ", text)
+    text = "\n".join(line.strip() for line in text.split("\n"))
+    text = re.sub(r"\n{3,}", "\n\n", text)
+    return text.strip()
+
+
+def repair_ocr_text(text: str) -> Tuple[str, int]:
+    """
+    Apply all deterministic repairs to one text.
+
+    Args:
+        text: Raw (OCR or native) chunk text
+
+    Returns:
+        (repaired text, number of confusion-table fixes applied)
+    """
+    if not text:
+        return text, 0
+    text = _collapse_whitespace(text)
+    text, fixes = _CONFUSION_RE.subn(lambda m: OCR_CONFUSIONS[m.group(0)], text)
+    text, label_fixes = _LABEL_CONFUSION_RE.subn(lambda m: m.group(1) + _LABEL_CONFUSIONS[m.group(2)], text)
+    text = normalize_dates(text)  # Before rejoining, so dates are whole tokens
+    text = _rejoin_wraps(text)
+    return text, fixes + label_fixes
+
+
+def noise_score(text: str) -> float:
+    """
+    Estimate how garbled a chunk is (0.0 = clean, 1.0 = unusable).
+
+    Combines the share of unexpected symbols, stray Hangul jamo (a strong
+    sign of broken syllables) and single-syllable tokens ("기 술 경 력").
+    """
+    stripped = re.sub(r"\s+", "", text or "")
+    if not stripped:
+        return 0.0
+    odd_ratio = sum(1 for c in stripped if not _ALLOWED_CHAR_RE.match(c)) / len(stripped)
+    jamo_ratio = len(_JAMO_RE.findall(stripped)) / len(stripped)
+    tokens = text.split()
+    single_ratio = (
+        sum(1 for t in tokens if len(t) == 1 and "가" <= t <= "힣") / len(tokens)
+        if tokens else 0.0
+    )
+    return round(min(1.0, 2.0 * odd_ratio + 5.0 * jamo_ratio + 0.5 * single_ratio), 3)
+
+
+def repair_chunks(docs: List[Document]) -> List[Document]:
+    """
+    Repair every chunk and record its noise score.
+
+    Adds metadata:
+        ocr_noise: noise_score() of the repaired text
+        ocr_repairs: number of confusion-table fixes
+
+    Args:
+        docs: Document chunks
+
+    Returns:
+        New list of repaired Document chunks (inputs are not modified)
+    """
+    repaired: List[Document] = []
+    total_fixes = 0
+    for d in docs:
+        text, fixes = repair_ocr_text(d.page_content or "")
+        total_fixes += fixes
+        md = {**(d.metadata or {}), "ocr_noise": noise_score(text), "ocr_repairs": fixes}
+        repaired.append(Document(page_content=text, metadata=md))
+    print(f"[OCR] Repaired {len(docs)} chunks ({total_fixes} confusion fixes)")
+    return repaired
@@ -0,0 +1,433 @@
+"""
+Shared Ollama HTTP client.
+
+One pooled requests.Session is used by every module that talks to Ollama
+(rag extraction, llm_helper normalization), so calls reuse TCP connections
+instead of opening a new one per request. The client also provides:
+
+- Load balancing over several Ollama servers (OLLAMA_BASE_URLS): requests go
+  to the least-loaded healthy backend, failing backends are ejected and
+  re-probed later, and each backend has its own concurrency cap
+  (OLLAMA_MAX_CONCURRENCY)
+- Retries with exponential backoff for connection errors, timeouts and 5xx
+  (a retry goes to another backend when one is available)
+- Per-call timeouts
+- An asyncio API (achat / agenerate) for running many requests in parallel
+- Transparent use of the persistent LLM cache (llm_cache.py)
+"""
+import asyncio
+import json
+import threading
+import time
+import weakref
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from config import (
+    OLLAMA_BASE_URLS, OLLAMA_MODEL, OLLAMA_TIMEOUT,
+    OLLAMA_MAX_CONCURRENCY, OLLAMA_MAX_RETRIES, OLLAMA_RETRY_BACKOFF,
+    OLLAMA_BACKEND_REPROBE_SECONDS,
+)
+from llm_cache import LLMCache, get_llm_cache
+
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+# Statuses that mean the server itself is unavailable (eject the backend)
+UNHEALTHY_STATUS_CODES = {502, 503, 504}
+PROBE_TIMEOUT = 3.0
+
+
+class Backend:
+    """One Ollama server and its load/health state (guarded by BackendPool)."""
+
+    def __init__(self, url: str, max_concurrency: int):
+        self.url = url.rstrip("/")
+        self.max_concurrency = max(1, max_concurrency)
+        self.in_flight = 0
+        self.total_requests = 0
+        self.failures = 0
+        self.healthy = True
+        self.ejected_until = 0.0
+
+
+class BackendPool:
+    """
+    Least-loaded selection over several Ollama backends.
+
+    - acquire() returns the healthy backend with the fewest in-flight requests
+      that is below its concurrency cap, waiting when all are busy
+    - release(ok=False) ejects the backend for OLLAMA_BACKEND_REPROBE_SECONDS;
+      after that it is re-probed (GET /api/tags) before receiving traffic
+    """
+
+    def __init__(self, urls: List[str], max_concurrency: int, session: requests.Session,
+                 reprobe_seconds: float = OLLAMA_BACKEND_REPROBE_SECONDS):
+        if not urls:
+            raise ValueError("At least one Ollama backend URL is required")
+        self.backends = [Backend(u, max_concurrency) for u in urls]
+        self.session = session
+        self.reprobe_seconds = reprobe_seconds
+        self._cond = threading.Condition()
+
+    @property
+    def capacity(self) -> int:
+        return sum(b.max_concurrency for b in self.backends)
+
+    def _probe(self, backend: Backend) -> bool:
+        try:
+            resp = self.session.get(f"{backend.url}/api/tags", timeout=PROBE_TIMEOUT)
+            return resp.status_code == 200
+        except requests.exceptions.RequestException:
+            return False
+
+    def _reprobe_due(self, force: bool = False) -> None:
+        """
+        Probe ejected backends whose ejection period has passed (outside the lock).
+
+        Args:
+            force: Probe every ejected backend regardless of its ejection period
+        """
+        now = time.time()
+        with self._cond:
+            due = [b for b in self.backends if not b.healthy and (force or b.ejected_until <= now)]
+            for b in due:
+                b.ejected_until = now + self.reprobe_seconds  # one prober at a time
+        for b in due:
+            ok = self._probe(b)
+            with self._cond:
+                if ok:
+                    b.healthy = True
+                    b.failures = 0
+                    print(f"[OLLAMA] Backend {b.url} is healthy again")
+                    self._cond.notify_all()
+
+    def acquire(self, exclude: Optional[Backend] = None, wait_timeout: Optional[float] = None) -> Backend:
+        """
+        Reserve a slot on the least-loaded healthy backend.
+
+        Args:
+            exclude: Backend to avoid if another one is usable (used for retries)
+            wait_timeout: Max seconds to wait for a free slot (None = forever)
+
+        Raises:
+            requests.exceptions.ConnectionError: If no backend is healthy
+            TimeoutError: If no slot frees up within wait_timeout
+        """
+        deadline = time.time() + wait_timeout if wait_timeout is not None else None
+        while True:
+            self._reprobe_due()
+            with self._cond:
+                all_ejected = not any(b.healthy for b in self.backends)
+            if all_ejected:
+                # Nothing to fall back to: check right away instead of failing for a full period
+                self._reprobe_due(force=True)
+            with self._cond:
+                healthy = [b for b in self.backends if b.healthy]
+                if not healthy:
+                    raise requests.exceptions.ConnectionError(
+                        "No healthy Ollama backend: " + ", ".join(b.url for b in self.backends)
+                    )
+                free = [b for b in healthy if b.in_flight < b.max_concurrency]
+                if exclude is not None and len(free) > 1:
+                    free = [b for b in free if b is not exclude] or free
+                if free:
+                    backend = min(free, key=lambda b: (b.in_flight / b.max_concurrency, b.total_requests))
+                    backend.in_flight += 1
+                    backend.total_requests += 1
+                    return backend
+                remaining = None if deadline is None else deadline - time.time()
+                if remaining is not None and remaining <= 0:
+                    raise TimeoutError("Timed out waiting for a free Ollama backend slot")
+                # Wake up periodically so ejected backends get re-probed
+                self._cond.wait(timeout=min(remaining or self.reprobe_seconds, self.reprobe_seconds))
+
+    def release(self, backend: Backend, ok: bool = True) -> None:
+        """Return a slot; ok=False ejects the backend until its next probe."""
+        with self._cond:
+            backend.in_flight = max(0, backend.in_flight - 1)
+            if not ok:
+                backend.failures += 1
+                if backend.healthy:
+                    print(f"[OLLAMA] Ejecting backend {backend.url} for {self.reprobe_seconds:.0f}s")
+                backend.healthy = False
+                backend.ejected_until = time.time() + self.reprobe_seconds
+            self._cond.notify_all()
+
+    def status(self) -> List[Dict[str, Any]]:
+        """Snapshot of backend load and health (for monitoring)."""
+        with self._cond:
+            return [
+                {
+                    "url": b.url,
+                    "healthy": b.healthy,
+                    "in_flight": b.in_flight,
+                    "max_concurrency": b.max_concurrency,
+                    "total_requests": b.total_requests,
+                    "failures": b.failures,
+                }
+                for b in self.backends
+            ]
+
+
+class OllamaClient:
+    """
+    Pooled, thread-safe client for the Ollama HTTP API.
+
+    Sync methods (chat, generate, stream_chat) can be called from any thread;
+    the async methods run the same requests in worker threads under an
+    asyncio.Semaphore so a batch can keep the model servers saturated without
+    overloading them.
+
+    Args:
+        base_urls: Ollama server URLs (default: OLLAMA_BASE_URLS)
+        max_concurrency: Concurrent requests allowed per backend
+    """
+
+    def __init__(
+        self,
+        base_urls: Optional[List[str]] = None,
+        model: str = OLLAMA_MODEL,
+        max_concurrency: int = OLLAMA_MAX_CONCURRENCY,
+        max_retries: int = OLLAMA_MAX_RETRIES,
+        retry_backoff: float = OLLAMA_RETRY_BACKOFF,
+        timeout: float = OLLAMA_TIMEOUT,
+    ):
+        urls = base_urls or OLLAMA_BASE_URLS
+        self.model = model
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.timeout = timeout
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=len(urls), pool_maxsize=max(1, max_concurrency))
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self.pool = BackendPool(urls, max_concurrency, self.session)
+        # One semaphore per event loop (asyncio.run creates a new loop each time)
+        self._async_slots: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = \
+            weakref.WeakKeyDictionary()
+        self._async_slots_lock = threading.Lock()
+
+    # ---- low level ----
+
+    def _send(self, path: str, payload: Dict[str, Any], timeout: Optional[float],
+              stream: bool = False) -> Tuple[requests.Response, Backend]:
+        """
+        POST to a pooled backend with retries.
+
+        The returned backend slot is still held; the caller must call
+        self.pool.release(backend) once the response has been consumed.
+
+        Raises:
+            requests.exceptions.RequestException: After the last retry fails
+        """
+        timeout = timeout or self.timeout
+        attempt = 0
+        previous: Optional[Backend] = None
+        while True:
+            backend = self.pool.acquire(exclude=previous)
+            try:
+                resp = self.session.post(f"{backend.url}{path}", json=payload, timeout=timeout, stream=stream)
+                if resp.status_code in RETRY_STATUS_CODES and attempt < self.max_retries:
+                    resp.close()
+                    raise requests.exceptions.HTTPError(f"{resp.status_code} from {backend.url}", response=resp)
+                resp.raise_for_status()
+                return resp, backend
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout,
+                    requests.exceptions.HTTPError) as e:
+                status = getattr(getattr(e, "response", None), "status_code", None)
+                # A slow generation (Timeout) or a model error (500) does not make the server unhealthy
+                unhealthy = isinstance(e, requests.exceptions.ConnectionError) or status in UNHEALTHY_STATUS_CODES
+                self.pool.release(backend, ok=not unhealthy)
+                retryable = status is None or status in RETRY_STATUS_CODES
+                if not retryable or attempt >= self.max_retries:
+                    raise
+                delay = self.retry_backoff * (2 ** attempt)
+                attempt += 1
+                previous = backend
+                print(f"[OLLAMA] {type(e).__name__} on {backend.url}{path}, "
+                      f"retry {attempt}/{self.max_retries} in {delay:.1f}s")
+                time.sleep(delay)
+            except BaseException:
+                # Any other failure (ChunkedEncodingError, InvalidURL, ...) must not leak the slot
+                self.pool.release(backend)
+                raise
+
+    @staticmethod
+    def _cache_options(payload: Dict[str, Any]) -> Dict[str, Any]:
+        return {"format": payload.get("format"), **(payload.get("options") or {})}
+
+    @staticmethod
+    def _cache_put(cache: LLMCache, cache_args: Tuple[str, str, str, Dict[str, Any]], text: str) -> None:
+        """Store a response under cache_args (empty/unparseable ones are skipped by the cache)."""
+        model, path, prompt, options = cache_args
+        cache.put(model, path, prompt, text, options)
+
+    # ---- sync API ----
+
+    def chat(
+        self,
+        messages: List[Dict[str, str]],
+        model: Optional[str] = None,
+        format: Any = None,
+        options: Optional[Dict[str, Any]] = None,
+        timeout: Optional[float] = None,
+        use_cache: bool = True,
+        **extra: Any,
+    ) -> Dict[str, Any]:
+        """
+        Call /api/chat (non-streaming).
+
+        Args:
+            messages: Chat messages
+            model: Model name (default: client model)
+            format: Ollama "format" field ("json" or a JSON schema)
+            options: Ollama "options" (temperature, num_ctx, ...)
+            timeout: Per-call timeout in seconds
+            use_cache: Read/write the persistent LLM cache
+            **extra: Additional top-level payload fields (e.g. keep_alive)
+
+        Returns:
+            Ollama response JSON. Cache hits carry "cached": True.
+        """
+        payload = {"model": model or self.model, "messages": messages, "stream": False, **extra}
+        if format is not None:
+            payload["format"] = format
+        if options:
+            payload["options"] = options
+        prompt = json.dumps(messages, ensure_ascii=False)
+        return self._request("/api/chat", payload, prompt, timeout, use_cache)
+
+    def generate(
+        self,
+        prompt: str,
+        model: Optional[str] = None,
+        options: Optional[Dict[str, Any]] = None,
+        timeout: Optional[float] = None,
+        use_cache: bool = True,
+        **extra: Any,
+    ) -> Dict[str, Any]:
+        """
+        Call /api/generate (non-streaming). Arguments as in chat().
+
+        Returns:
+            Ollama response JSON. Cache hits carry "cached": True.
+        """
+        payload = {"model": model or self.model, "prompt": prompt, "stream": False, **extra}
+        if options:
+            payload["options"] = options
+        return self._request("/api/generate", payload, prompt, timeout, use_cache)
+
+    def _request(self, path: str, payload: Dict[str, Any], prompt: str,
+                 timeout: Optional[float], use_cache: bool) -> Dict[str, Any]:
+        content_key = "message" if path == "/api/chat" else "response"
+        cache = get_llm_cache() if use_cache else None
+        cache_args = (payload["model"], path, prompt, self._cache_options(payload))
+        if cache:
+            cached = cache.get(*cache_args)
+            if cached is not None:
+                body = {"role": "assistant", "content": cached} if content_key == "message" else cached
+                return {"model": payload["model"], content_key: body, "done": True, "cached": True}
+
+        resp, backend = self._send(path, payload, timeout)
+        try:
+            data = resp.json()
+        finally:
+            self.pool.release(backend)
+
+        if cache:
+            body = data.get(content_key, {})
+            text = (body.get("content", "") if isinstance(body, dict) else body or "").strip()
+            self._cache_put(cache, cache_args, text)
+        return data
+
+    def stream_chat(
+        self,
+        messages: List[Dict[str, str]],
+        model: Optional[str] = None,
+        format: Any = None,
+        options: Optional[Dict[str, Any]] = None,
+        timeout: Optional[float] = None,
+        use_cache: bool = True,
+        **extra: Any,
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Call /api/chat with streaming. Arguments as in chat().
+
+        Yields:
+            Streamed response chunks. A cache hit yields a single final chunk.
+        """
+        payload = {"model": model or self.model, "messages": messages, "stream": True, **extra}
+        if format is not None:
+            payload["format"] = format
+        if options:
+            payload["options"] = options
+
+        # The cache key ignores "stream", so blocking and streaming calls share entries
+        cache = get_llm_cache() if use_cache else None
+        cache_args = (payload["model"], "/api/chat", json.dumps(messages, ensure_ascii=False),
+                      self._cache_options(payload))
+        if cache:
+            cached = cache.get(*cache_args)
+            if cached is not None:
+                yield {"model": payload["model"], "message": {"role": "assistant", "content": cached},
+                       "done": True, "cached": True}
+                return
+
+        pieces: List[str] = []
+        # timeout is per read, so a long generation is fine while tokens keep coming
+        resp, backend = self._send("/api/chat", payload, timeout, stream=True)
+        ok = True
+        try:
+            with resp:
+                for line in resp.iter_lines():
+                    if not line:
+                        continue
+                    chunk = json.loads(line)
+                    pieces.append(chunk.get("message", {}).get("content", ""))
+                    yield chunk
+                    if chunk.get("done"):
+                        # Only complete generations are cached
+                        if cache:
+                            self._cache_put(cache, cache_args, "".join(pieces).strip())
+                        break
+        except requests.exceptions.ConnectionError:
+            ok = False
+            raise
+        finally:
+            self.pool.release(backend, ok=ok)
+
+    # ---- async API ----
+
+    def _async_semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        with self._async_slots_lock:
+            sem = self._async_slots.get(loop)
+            if sem is None:
+                sem = self._async_slots[loop] = asyncio.Semaphore(self.pool.capacity)
+        return sem
+
+    async def achat(self, messages: List[Dict[str, str]], **kwargs: Any) -> Dict[str, Any]:
+        """Async chat(); at most pool.capacity requests run at once."""
+        async with self._async_semaphore():
+            return await asyncio.to_thread(self.chat, messages, **kwargs)
+
+    async def agenerate(self, prompt: str, **kwargs: Any) -> Dict[str, Any]:
+        """Async generate(); at most pool.capacity requests run at once."""
+        async with self._async_semaphore():
+            return await asyncio.to_thread(self.generate, prompt, **kwargs)
+
+
+_client: Optional[OllamaClient] = None
+_client_lock = threading.Lock()
+
+
+def get_ollama_client() -> OllamaClient:
+    """Return the process-wide shared Ollama client."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = OllamaClient()
+    return _client
@@ -0,0 +1,291 @@
+"""
+Archive of extracted projects, with batch re-scoring.
+
+Every successful extraction is stored with the hash of its source file set
+(the files_key of the upload): the raw LLM output, the normalized projects
+and a per-engineer score summary. When the rules (checkbox_rules.json) or
+the normalization / calculation logic change, rescore_archive() reapplies
+normalize_projects, the checkbox rules and the career calculation to every
+stored extraction in one batch - no OCR or LLM calls - scores every
+engineer of every file set with one get_period_summary_by_engineer call, and
+reports the engineers whose results changed.
+
+Run from the command line with:
+    python project_archive.py --rescore
+"""
+import argparse
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+
+from config import ARCHIVE_DB_PATH
+from report_utils import get_period_summary_by_engineer
+from rules_config import RuleSet, get_rule_set
+from rules_engine import apply_checkbox_rules_batch
+from semantic_normalizer import normalize_projects
+
+# Score summary fields compared by rescore_archive
+SCORE_FIELDS = ("score", "total_score_months", "job_score", "total_job_months", "checked_rule_ids")
+
+
+class ProjectArchive:
+    """
+    SQLite-backed store of extracted projects, one row per source file set.
+
+    A new connection is opened per operation (as in llm_cache.LLMCache).
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS archived_sources (
+                    source_hash TEXT PRIMARY KEY,
+                    projects TEXT NOT NULL,
+                    normalized TEXT NOT NULL,
+                    scores TEXT NOT NULL,
+                    rule_set_version TEXT,
+                    project_count INTEGER NOT NULL,
+                    stored_at REAL NOT NULL,
+                    scored_at REAL NOT NULL
+                )
+                """
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(str(self.path), timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def store(self, source_hash: str, projects: List[Dict[str, Any]], normalized: List[Dict[str, Any]],
+              scores: Dict[str, Dict[str, Any]], rule_set_version: Optional[str]) -> None:
+        """
+        Store (or replace) the extraction of one source file set.
+
+        Args:
+            source_hash: Content hash of the source file set
+            projects: Raw extracted projects (LLM output)
+            normalized: The projects after normalize_projects
+            scores: Engineer name -> score summary (see score_projects)
+            rule_set_version: Rule set version the scores were computed with
+        """
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute(
+                "INSERT OR REPLACE INTO archived_sources "
+                "(source_hash, projects, normalized, scores, rule_set_version, project_count, stored_at, scored_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (source_hash, _dumps(projects), _dumps(normalized), _dumps(scores),
+                 rule_set_version, len(projects), now, now),
+            )
+        finally:
+            conn.close()
+
+    def update_scores(self, source_hash: str, normalized: List[Dict[str, Any]],
+                      scores: Dict[str, Dict[str, Any]], rule_set_version: Optional[str]) -> None:
+        """Replace the normalized projects and scores of a stored extraction."""
+        conn = self._connect()
+        try:
+            conn.execute(
+                "UPDATE archived_sources SET normalized = ?, scores = ?, rule_set_version = ?, scored_at = ? "
+                "WHERE source_hash = ?",
+                (_dumps(normalized), _dumps(scores), rule_set_version, time.time(), source_hash),
+            )
+        finally:
+            conn.close()
+
+    def get(self, source_hash: str) -> Optional[Dict[str, Any]]:
+        """
+        Returns:
+            Stored extraction (JSON columns decoded), or None if unknown
+        """
+        conn = self._connect()
+        try:
+            row = conn.execute("SELECT * FROM archived_sources WHERE source_hash = ?", (source_hash,)).fetchone()
+        finally:
+            conn.close()
+        return _decode(row) if row is not None else None
+
+    def load_all(self) -> List[Dict[str, Any]]:
+        """Return every stored extraction, oldest first."""
+        conn = self._connect()
+        try:
+            rows = conn.execute("SELECT * FROM archived_sources ORDER BY stored_at").fetchall()
+        finally:
+            conn.close()
+        return [_decode(row) for row in rows]
+
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, ensure_ascii=False, default=str)
+
+
+def _decode(row: sqlite3.Row) -> Dict[str, Any]:
+    entry = dict(row)
+    for key in ("projects", "normalized", "scores"):
+        entry[key] = json.loads(entry[key])
+    return entry
+
+
+def _engineer_scores(projects_df: pd.DataFrame, owners: List[str]) -> Dict[str, Dict[str, Dict[str, Any]]]:
+    """
+    Compute the score summary of every engineer in a rule-evaluated DataFrame.
+
+    All engineers of all owners (file sets) are scored in one batch.
+
+    Args:
+        projects_df: Rule-evaluated projects
+        owners: Owning source hash of each row
+
+    Returns:
+        {owner: {engineer: summary}}
+    """
+    names = projects_df.get("engineer_name", pd.Series("", index=projects_df.index)).fillna("").astype(str)
+    names = [name or "(이름 없음)" for name in names]
+    keys = pd.Series([f"{owner}\x1f{name}" for owner, name in zip(owners, names)], name="group")
+    summary = get_period_summary_by_engineer(projects_df.reset_index(drop=True), keys)
+
+    checked: Dict[str, List[Any]] = {}
+    for key, rule_ids in zip(keys, projects_df["checked_rule_ids"]):
+        checked.setdefault(key, []).append(rule_ids)
+
+    scores: Dict[str, Dict[str, Dict[str, Any]]] = {}
+    for key, row in summary.iterrows():
+        owner, name = key.split("\x1f", 1)
+        scores.setdefault(owner, {})[name] = {
+            "score": row["career_score"],
+            "total_score_months": int(row["total_score_months"]),
+            "job_score": row["job_score"],
+            "total_job_months": int(row["total_job_months"]),
+            "checked_rule_ids": checked[key],
+        }
+    return scores
+
+
+def score_projects(projects: List[Dict[str, Any]], rule_set: Optional[RuleSet] = None) -> Dict[str, Any]:
+    """
+    Normalize, rule-evaluate and score one extraction.
+
+    Args:
+        projects: Raw extracted projects (not modified)
+        rule_set: Rule set to apply (default: the current one)
+
+    Returns:
+        {"normalized": [...], "scores": {engineer: summary}, "rule_set_version": str}
+    """
+    rule_set = rule_set or get_rule_set()
+    normalized = normalize_projects(projects)
+    projects_df = apply_checkbox_rules_batch(normalized, rule_set)
+    scores = _engineer_scores(projects_df, [""] * len(projects_df)).get("", {}) if not projects_df.empty else {}
+    return {"normalized": normalized, "scores": scores, "rule_set_version": rule_set.version}
+
+
+def archive_extraction(source_hash: str, projects: List[Dict[str, Any]]) -> None:
+    """Score and store a finished extraction (failures are logged, not raised)."""
+    if not source_hash or not projects:
+        return
+    try:
+        scored = score_projects(projects)
+        get_project_archive().store(
+            source_hash, projects, scored["normalized"], scored["scores"], scored["rule_set_version"]
+        )
+        print(f"[ARCHIVE] Stored {len(projects)} project(s) for file set {source_hash[:12]}")
+    except Exception as e:
+        print(f"[ARCHIVE] Failed to store extraction {source_hash[:12]}: {e}")
+
+
+def rescore_archive(archive: Optional[ProjectArchive] = None) -> List[Dict[str, Any]]:
+    """
+    Re-run normalization, rules and calculations over the whole archive.
+
+    All stored projects are normalized and rule-evaluated as one batch, then
+    scored per source file set and engineer; the new results replace the
+    stored ones.
+
+    Returns:
+        One entry per engineer whose summary changed:
+        {"source_hash", "engineer_name", "changed": [field, ...], "before", "after"}
+    """
+    started = time.time()
+    archive = archive or get_project_archive()
+    rule_set = get_rule_set()
+    entries = archive.load_all()
+
+    raw_projects = [project for entry in entries for project in entry["projects"]]
+    owners = [entry["source_hash"] for entry in entries for _ in entry["projects"]]
+    if not raw_projects:
+        print("[ARCHIVE] Nothing to re-score")
+        return []
+
+    normalized = normalize_projects(raw_projects)
+    projects_df = apply_checkbox_rules_batch(normalized, rule_set)
+    owner_index = pd.Series(owners, index=projects_df.index)
+    scores_by_owner = _engineer_scores(projects_df, owners)
+
+    changes: List[Dict[str, Any]] = []
+    for entry in entries:
+        mask = (owner_index == entry["source_hash"]).to_numpy()
+        if not mask.any():
+            continue
+        scores = scores_by_owner.get(entry["source_hash"], {})
+        for name in sorted(set(entry["scores"]) | set(scores)):
+            before, after = entry["scores"].get(name), scores.get(name)
+            if before == after:
+                continue
+            changed = [f for f in SCORE_FIELDS if (before or {}).get(f) != (after or {}).get(f)]
+            changes.append({
+                "source_hash": entry["source_hash"],
+                "engineer_name": name,
+                "changed": changed,
+                "before": before,
+                "after": after,
+            })
+        archive.update_scores(
+            entry["source_hash"],
+            [p for p, m in zip(normalized, mask) if m],
+            scores,
+            rule_set.version,
+        )
+
+    print(f"[ARCHIVE] Re-scored {len(normalized)} project(s) from {len(entries)} file set(s) "
+          f"with rule set {rule_set.version} in {time.time() - started:.2f}s; "
+          f"{len(changes)} engineer result(s) changed")
+    return changes
+
+
+_archive: Optional[ProjectArchive] = None
+_archive_lock = threading.Lock()
+
+
+def get_project_archive() -> ProjectArchive:
+    """Return the shared project archive."""
+    global _archive
+    with _archive_lock:
+        if _archive is None:
+            _archive = ProjectArchive(ARCHIVE_DB_PATH)
+    return _archive
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Inspect or re-score the project archive.")
+    parser.add_argument("--rescore", action="store_true", help="re-score every stored extraction")
+    args = parser.parse_args()
+    if args.rescore:
+        for change in rescore_archive():
+            before, after = change["before"] or {}, change["after"] or {}
+            print(f"{change['engineer_name']} ({change['source_hash'][:12]}): " + ", ".join(
+                f"{f} {before.get(f)!r} -> {after.get(f)!r}" for f in change["changed"] if f != "checked_rule_ids"
+            ) + (" [checked rules changed]" if "checked_rule_ids" in change["changed"] else ""))
+    else:
+        for entry in get_project_archive().load_all():
+            print(f"{entry['source_hash'][:12]}  {entry['project_count']:4d} project(s)  "
+                  f"rules {entry['rule_set_version']}  engineers: {', '.join(entry['scores'])}")
@@ -0,0 +1,244 @@
+"""
+Prompt templates for LLM extraction.
+
+Ollama reuses the KV-cache of a loaded model when a request starts with
+the same tokens as the previous one. Templates therefore keep all static
+content (system message, instructions, examples) in a fixed prefix and
+append the variable document text last, so consecutive extractions only
+pay prompt evaluation for the new chunks.
+
+PromptEvalStats measures how much prompt-eval time that reuse saves, using
+the prompt_eval_count / prompt_eval_duration fields of Ollama responses.
+"""
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+
+class PromptTemplate:
+    """
+    Chat prompt split into a static system prefix and a variable user part.
+
+    Args:
+        system: Static system content (identical for every request)
+        user: User message template; fields are filled with str.format
+    """
+
+    def __init__(self, system: str, user: str):
+        self.system = system
+        self.user = user
+
+    def render(self, **fields: Any) -> str:
+        """Fill the user template (field values are inserted verbatim)."""
+        return self.user.format(**fields)
+
+    def messages(self, user_content: str) -> List[Dict[str, str]]:
+        """Chat messages with the static prefix first and the variable content last."""
+        return [
+            {"role": "system", "content": self.system},
+            {"role": "user", "content": user_content},
+        ]
+
+
+# Two-digit year rule of date_parser.expand_two_digit_year, spelled out for the
+# model. Fixed for the life of the process, so the static prefix stays stable.
+_YEAR_PIVOT = datetime.now().year % 100
+TWO_DIGIT_YEAR_RULE = f"20xx for 00-{_YEAR_PIVOT:02d}, 19xx for {_YEAR_PIVOT + 1:02d}-99"
+
+# Enforce JSON array output
+JSON_ARRAY_SYSTEM_MSG = "You are a data extraction assistant. You MUST output a valid JSON array starting with [ and ending with ]. NEVER output a single object. ALWAYS output an array of objects, even if there is only one item."
+
+EXTRACTION_INSTRUCTIONS = """You are extracting construction project career data from Korean documents.
+
+TASK: Extract ALL construction projects from the "기술경력" section ONLY of the DOCUMENT CHUNKS
+(given in the user message) into a JSON array.
+
+CRITICAL SECTION FILTERING:
+- ONLY extract projects from section "1. 기술경력" (Technical Career)
+- IGNORE section "2. 건설사업관리" (Construction Management)
+- IGNORE any sections about "감리", "감독", "건설사업관리"
+- Focus on the table rows under "1. 기술경력"
+
+STEP 1 - FIND ENGINEER NAME (성명):
+The engineer's name appears in headers with patterns like:
+- "성명: 정환철" or "성영: 정환철" (OCR may misread 성명 as 성영)
+- "이름: 정환철"
+- Look for "성명", "성영", "이름" followed by ":" and a Korean name
+
+CRITICAL: Korean names are typically 3 characters (e.g., "정환철", "김철수", "이영희")
+- Extract the COMPLETE 3-character name
+- This name is THE SAME for ALL projects
+
+STEP 2 - FIND ALL PROJECTS FROM "1. 기술경력" SECTION:
+Each project is a separate row in the table under "1. 기술경력".
+Extract these fields for EACH project row:
+
+Required fields (extract ALL available information):
+- engineer_name: Use the COMPLETE name from STEP 1 (SAME for all projects, usually 3 characters)
+- project_name: Full project/contract name (사업명, 용역명, 공사명) - extract the COMPLETE name
+- client: Ordering organization (발주처, 발주기관, 발주청) - extract the COMPLETE organization name
+- start_date: Start date (YYYY-MM-DD format) - MUST have a value, search carefully
+- end_date: End date (YYYY-MM-DD format) - MUST have a value, search carefully in the same row
+- original_fields: Array of work types (공종, 분야) - can be multiple, extract ALL mentioned
+- primary_original_field: Main work type (주공종) - typically first or most prominent
+- roles: Array of job roles (담당업무, 직책) - can be multiple, extract ALL mentioned
+- primary_role: Main job role (주담당업무) - typically first or most prominent
+
+CRITICAL FOR DATES:
+- Each project row has BOTH start date AND end date
+- Look for date pairs like "2020.02.20 ~ 2021.03.15" or "2005.03.31 ~ 2005.07.29"
+- Convert ALL dates to YYYY-MM-DD format
+- VALIDATE: Days must be 01-31, months must be 01-12
+- If day is invalid (e.g., "84"), correct it (e.g., use last day of month)
+
+DATE CONVERSION RULES:
+- "2005.03.31" → "2005-03-31"
+- "05.03.31" → "2005-03-31" (assume """ + TWO_DIGIT_YEAR_RULE + """)
+- "2005.04.01" → "2005-04-01"
+- If end date is incomplete or invalid, estimate based on typical project duration
+- NEVER output invalid dates like "2021-12-84" (day 84 doesn't exist!)
+
+EXAMPLE OUTPUT (for 2 projects):
+[
+{"engineer_name":"홍길동","project_name":"학성교가설공사","client":"울산시청","start_date":"1995-01-23","end_date":"1997-08-31","original_fields":["도로","교량"],"primary_original_field":"교량","roles":["설계","감리"],"primary_role":"설계"},
+{"engineer_name":"홍길동","project_name":"번영로번영교신설공사","client":"울산광역시","start_date":"1998-03-01","end_date":"2000-12-31","original_fields":["교량"],"primary_original_field":"교량","roles":["감리"],"primary_role":"감리"}
+]
+
+CRITICAL OUTPUT RULES:
+1. Output MUST be a JSON ARRAY starting with [ and ending with ]
+2. NEVER output a single object - ALWAYS wrap in array brackets
+3. Extract ALL projects from "1. 기술경력" section (typically 5-15 projects)
+4. Each project MUST have both start_date and end_date in YYYY-MM-DD format
+5. Dates MUST be valid (days 01-31, months must be 01-12)
+6. Use THE SAME engineer_name for all projects
+7. NO markdown, NO explanations, NO extra text
+8. Output ONLY the raw JSON array
+
+EXAMPLE - Your output MUST look like this:
+[
+{"engineer_name":"정환철","project_name":"광양항서측인입철일괄임찰공사기본설계","client":"LG건설(주)","start_date":"2005-03-31","end_date":"2005-05-31","original_fields":["토목","설계"],"primary_original_field":"토목","roles":["설계"],"primary_role":"설계"},
+{"engineer_name":"정환철","project_name":"군장국가상업탄지후안도로건설공사","client":"삼성물산(주)","start_date":"2005-06-01","end_date":"2005-09-20","original_fields":["토목","설계"],"primary_original_field":"토목","roles":["설계"],"primary_role":"설계"}
+]
+"""
+
+PROJECT_EXTRACTION = PromptTemplate(
+    system=JSON_ARRAY_SYSTEM_MSG + "\n\n" + EXTRACTION_INSTRUCTIONS,
+    user='DOCUMENT CHUNKS:\n{context}\n\nBegin extraction from "1. 기술경력" section:',
+)
+
+
+class PromptEvalStats:
+    """
+    Accumulate prompt-evaluation counters from Ollama responses.
+
+    Ollama only evaluates the prompt tokens that are not already in the
+    model's KV-cache and reports that number as prompt_eval_count. The full
+    prompt size is estimated from its character count using the highest
+    tokens-per-character ratio observed (i.e. a cold request), so the
+    difference is the number of tokens served from the cache.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.requests = 0
+            self.prompt_chars = 0
+            self.evaluated_tokens = 0
+            self.eval_ns = 0
+            self._tokens_per_char = 0.0
+
+    def record(self, prompt_chars: int, response: Optional[Dict[str, Any]]) -> None:
+        """
+        Record one completed request.
+
+        Args:
+            prompt_chars: Total characters of the messages sent
+            response: Ollama response JSON (or the final streamed chunk);
+                cache hits and responses without timing fields are ignored
+        """
+        if not response or response.get("cached") or prompt_chars <= 0:
+            return
+        count = response.get("prompt_eval_count")
+        duration = response.get("prompt_eval_duration")
+        if count is None or duration is None:
+            return
+        with self._lock:
+            self.requests += 1
+            self.prompt_chars += prompt_chars
+            self.evaluated_tokens += int(count)
+            self.eval_ns += int(duration)
+            self._tokens_per_char = max(self._tokens_per_char, count / prompt_chars)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Returns:
+            requests, evaluated_tokens, eval_seconds, reused_tokens (estimate),
+            reuse_rate and saved_seconds (reused tokens x measured eval speed)
+        """
+        with self._lock:
+            estimated_total = self.prompt_chars * self._tokens_per_char
+            reused = max(0, int(round(estimated_total - self.evaluated_tokens)))
+            ns_per_token = self.eval_ns / self.evaluated_tokens if self.evaluated_tokens else 0.0
+            return {
+                "requests": self.requests,
+                "evaluated_tokens": self.evaluated_tokens,
+                "eval_seconds": round(self.eval_ns / 1e9, 2),
+                "reused_tokens": reused,
+                "reuse_rate": round(reused / estimated_total, 3) if estimated_total else 0.0,
+                "saved_seconds": round(reused * ns_per_token / 1e9, 2),
+            }
+
+
+_prompt_eval_stats = PromptEvalStats()
+
+
+def get_prompt_eval_stats() -> PromptEvalStats:
+    """Return the process-wide prompt-eval counters."""
+    return _prompt_eval_stats
+
+
+def messages_chars(messages: List[Dict[str, str]]) -> int:
+    """Total characters of a chat message list (input to PromptEvalStats.record)."""
+    return sum(len(m.get("content", "")) for m in messages)
+
+
+ROW_REPAIR = PromptTemplate(
+    system=(
+        "You fill in missing or invalid fields of ONE construction project record "
+        "extracted from Korean career documents (경력증명서).\n"
+        "- Use only information stated in the DOCUMENT CHUNKS for this exact project.\n"
+        f"- Dates are YYYY-MM-DD; two-digit years: {TWO_DIGIT_YEAR_RULE}.\n"
+        "- engineer_name is the full name from the 성명 field (usually 3 Hangul syllables).\n"
+        "- client is the 발주처 / 발주기관 of the project.\n"
+        "- Output one JSON object containing exactly the requested fields. "
+        "Use an empty string when the chunks do not state the value."
+    ),
+    user="PROJECT:\n{project}\n\nFIELDS TO FILL: {fields}\n\nDOCUMENT CHUNKS:\n{context}",
+)
+
+
+_STRING = {"type": "string"}
+_STRING_LIST = {"type": "array", "items": _STRING}
+
+# JSON schema sent in Ollama's "format" field for project extraction
+PROJECT_ARRAY_SCHEMA = {
+    "type": "array",
+    "items": {
+        "type": "object",
+        "properties": {
+            "engineer_name": _STRING,
+            "project_name": _STRING,
+            "client": _STRING,
+            "start_date": _STRING,
+            "end_date": _STRING,
+            "original_fields": _STRING_LIST,
+            "primary_original_field": _STRING,
+            "roles": _STRING_LIST,
+            "primary_role": _STRING,
+        },
+        "required": ["engineer_name", "project_name", "client", "start_date", "end_date"],
+    },
+}
@@ -5,223 +5,204 @@ This module:
 - Loads FAISS vector index of document embeddings
 - Retrieves relevant document chunks via similarity search
 - Uses Ollama LLM to extract structured project data from text
+  (single request, or map-reduce over page-aligned segments)
 - Returns parsed JSON with project information
 """
 import json
-from typing import Dict, Any, List
+import re
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, Any, Iterator, List, Optional
 import requests
 from langchain_community.vectorstores import FAISS
 from langchain_huggingface import HuggingFaceEmbeddings
+from langchain_core.documents import Document
 
-from config import INDEX_DIR, OLLAMA_BASE_URL, OLLAMA_MODEL, DATA_DIR
+from config import (
+    OLLAMA_BASE_URL, OLLAMA_MODEL, OLLAMA_FAST_MODEL,
+    EXTRACTION_MODE, MAP_REDUCE_SEGMENT_CHARS, MAP_REDUCE_MAX_WORKERS, OLLAMA_KEEP_ALIVE,
+    OLLAMA_NUM_CTX, OLLAMA_RESPONSE_TOKENS, REPAIR_DEFECTIVE_ROWS, REPAIR_TOP_K, REPAIR_MAX_ROWS,
+)
+from json_stream import JSONArrayStreamParser, salvage_json_objects
+from prompts import PROJECT_EXTRACTION, PROJECT_ARRAY_SCHEMA, ROW_REPAIR, get_prompt_eval_stats, messages_chars
+from token_budget import estimate_messages_tokens, select_within_budget
+from workspace import Workspace, get_workspace
+from ollama_client import get_ollama_client
 
 
-def _load_vectorstore() -> FAISS:
+def _load_vectorstore(workspace: Workspace) -> FAISS:
 # ... 기존 코드 ...
-    print(f"[RAG] Loading FAISS index from: {INDEX_DIR}")
+    print(f"[RAG] Loading FAISS index from: {workspace.index_dir}")
     embeddings = HuggingFaceEmbeddings(
         model_name="jhgan/ko-sroberta-multitask",
         model_kwargs={"device": "cpu"},
     )
     vectorstore = FAISS.load_local(
-        folder_path=str(INDEX_DIR),
+        folder_path=str(workspace.index_dir),
         embeddings=embeddings,
         allow_dangerous_deserialization=True,
     )
     return vectorstore
 
-def _call_ollama(prompt: str) -> str:
-# ... 기존 코드 ...
-    url = f"{OLLAMA_BASE_URL}/api/chat"
-
-    # Add system message to enforce JSON array output
-    system_msg = "You are a data extraction assistant. You MUST output a valid JSON array starting with [ and ending with ]. NEVER output a single object. ALWAYS output an array of objects, even if there is only one item."
-
-    payload = {
-        "model": OLLAMA_MODEL,
-        "messages": [
-            {"role": "system", "content": system_msg},
-            {"role": "user", "content": prompt}
-        ],
-        "stream": False,
-        "format": "json", # Request JSON format
-        "options": {"temperature": 0.0},
-    }
 
-    print(f"[RAG] Calling Ollama: {url} / model={OLLAMA_MODEL}")
+# Shared by the blocking and streaming extraction calls
+CHAT_OPTIONS = {
+    "format": PROJECT_ARRAY_SCHEMA, # Constrain output to the project array schema
+    "options": {"temperature": 0.0, "num_ctx": OLLAMA_NUM_CTX},
+    "timeout": 120, # 2 min timeout
+    "keep_alive": OLLAMA_KEEP_ALIVE, # Keep the model and its prompt cache loaded
+}
+
+
+def _build_messages(prompt: str) -> List[Dict[str, str]]:
+    """Static instruction prefix first, variable document content last."""
+    return PROJECT_EXTRACTION.messages(prompt)
+
+
+def _prompt_token_budget() -> int:
+    """Tokens available for the prompt once the response reserve is set aside."""
+    return OLLAMA_NUM_CTX - OLLAMA_RESPONSE_TOKENS
+
+
+def _context_token_budget() -> int:
+    """
+    Tokens available for document chunks: the prompt budget minus the static
+    instruction prefix, estimated for every model the extraction may use.
+    """
+    empty = _build_messages(_build_extraction_prompt(""))
+    models = [m for m in (OLLAMA_MODEL, OLLAMA_FAST_MODEL) if m]
+    fixed = max(estimate_messages_tokens(empty, m) for m in models)
+    return max(0, _prompt_token_budget() - fixed)
+
+
+def _log_token_budget(messages: List[Dict[str, str]], model: str) -> None:
+    used = estimate_messages_tokens(messages, model)
+    budget = _prompt_token_budget()
+    print(f"[RAG] Prompt tokens: ~{used} / {budget} budget (num_ctx={OLLAMA_NUM_CTX}, model={model})")
+    if used > budget:
+        print(f"[RAG] WARN: Prompt exceeds the token budget; the server may truncate it. "
+              f"Raise OLLAMA_NUM_CTX or lower top_k.")
+
+
+def _log_prompt_reuse() -> None:
+    stats = get_prompt_eval_stats().snapshot()
+    if stats["requests"] > 1:
+        print(f"[RAG] Prompt cache: ~{stats['reused_tokens']} tokens reused "
+              f"({stats['reuse_rate']:.0%}), ~{stats['saved_seconds']}s prompt-eval saved "
+              f"over {stats['requests']} requests")
+
+
+def _print_connection_error() -> None:
+    print("\n" + "="*50)
+    print("ERROR: Could not connect to Ollama.")
+    print(f"Please ensure Ollama is running at {OLLAMA_BASE_URL}")
+    print("You can run it with: `ollama serve`")
+    print("="*50 + "\n")
+
+
+def _call_ollama(prompt: str, model: Optional[str] = None) -> str:
+# ... 기존 코드 ...
+    model = model or OLLAMA_MODEL
+    print(f"[RAG] Calling Ollama: {OLLAMA_BASE_URL}/api/chat / model={model}")
     try:
-        resp = requests.post(url, json=payload, timeout=120) # 2 min timeout
-        resp.raise_for_status()
-        data = resp.json()
+        messages = _build_messages(prompt)
+        _log_token_budget(messages, model)
+        data = get_ollama_client().chat(messages, model=model, **CHAT_OPTIONS)
+        if data.get("cached"):
+            print("[RAG] LLM cache hit")
+        get_prompt_eval_stats().record(messages_chars(messages), data)
         text = data.get("message", {}).get("content", "")
         return text.strip()
     except requests.exceptions.ConnectionError:
-        print("\n" + "="*50)
-        print("ERROR: Could not connect to Ollama.")
-        print(f"Please ensure Ollama is running at {OLLAMA_BASE_URL}")
-        print("You can run it with: `ollama serve`")
-        print("="*50 + "\n")
+        _print_connection_error()
         return "[]" # Return empty list on error
     except Exception as e:
         print(f"[RAG] ERROR: Failed to call Ollama: {e}")
         return "[]"
 
 
-def get_raw_project_data(query: str, top_k: int = 25) -> List[Dict[str, Any]]: # [수정] 반환 타입이 List[Dict], top_k 증가
-# ... 기존 코드 ...
-    """
-    Synthesizes all data into a LIST of project objects.
+def _stream_ollama(prompt: str) -> Iterator[str]:
     """
-    vectorstore = _load_vectorstore()
-
-    print(f"[RAG] Searching FAISS (k={top_k}) for query: {query!r}")
-    docs = vectorstore.similarity_search(query, k=top_k)
-
-    if not docs:
-        print("[RAG] WARNING: No documents found in FAISS index!")
-        print("[RAG] This means either:")
-        print("[RAG]   1. Index is empty (no PDFs were processed)")
-        print("[RAG]   2. Embeddings failed to create")
-        print("[RAG]   3. Index file is corrupted")
-        return []
+    Call Ollama /api/chat with streaming enabled.
 
-    print(f"[RAG] Retrieved {len(docs)} document chunks from FAISS")
-    print(f"[RAG] First chunk preview (100 chars): {docs[0].page_content[:100]}...")
+    Yields:
+        Content pieces as the model generates them. On connection or
+        request errors the stream simply ends (nothing is raised), which
+        mirrors the "[]" fallback of _call_ollama.
+    """
+    print(f"[RAG] Streaming from Ollama: {OLLAMA_BASE_URL}/api/chat / model={OLLAMA_MODEL}")
+    try:
+        messages = _build_messages(prompt)
+        _log_token_budget(messages, OLLAMA_MODEL)
+        for chunk in get_ollama_client().stream_chat(messages, **CHAT_OPTIONS):
+            if chunk.get("cached"):
+                print("[RAG] LLM cache hit")
+            if chunk.get("done"):
+                get_prompt_eval_stats().record(messages_chars(messages), chunk)
+            piece = chunk.get("message", {}).get("content", "")
+            if piece:
+                yield piece
+    except requests.exceptions.ConnectionError:
+        _print_connection_error()
+    except Exception as e:
+        print(f"[RAG] ERROR: Streaming from Ollama failed: {e}")
 
-    # Debug: Show how many chunks from each source
-    from collections import Counter
-    source_counts = Counter(d.metadata.get('source', 'unknown') for d in docs)
-    print(f"[RAG] Chunks by source: {dict(source_counts)}")
 
-    context_text = "\n\n---\n\n".join(
+def _format_context(docs: List[Document]) -> str:
+    """Join retrieved chunks into the numbered context block used in prompts."""
+    return "\n\n---\n\n".join(
         f"[CHUNK {i+1} from {d.metadata.get('source', 'unknown')}]\n{d.page_content}"
         for i, d in enumerate(docs)
     )
 
-    print(f"[RAG] Total context length: {len(context_text)} characters")
 
-    # Debug: Save context to file for inspection
-    context_debug_path = DATA_DIR / "llm_debug_context.txt"
-    try:
-        with open(context_debug_path, "w", encoding="utf-8") as f:
-            f.write(context_text)
-        print(f"[RAG] Context saved to: {context_debug_path}")
-    except Exception as e:
-        print(f"[RAG] Failed to save context: {e}")
+def _build_extraction_prompt(context_text: str) -> str:
+    """
+    Build the variable (user) part of the project-extraction prompt.
 
-    # Debug: Check if engineer name pattern exists in retrieved chunks
-    import re
-    name_patterns = [r'성명[:\s]*([가-힣]{2,4})', r'이름[:\s]*([가-힣]{2,4})', r'성\s*명[:\s]*([가-힣]{2,4})']
-    found_names = []
-    for pattern in name_patterns:
-        matches = re.findall(pattern, context_text)
-        if matches:
-            found_names.extend(matches)
-    if found_names:
-        print(f"[RAG] Found potential engineer names in chunks: {set(found_names)}")
-    else:
-        print(f"[RAG] WARNING: No engineer name pattern found in retrieved chunks!")
-        print(f"[RAG] This may indicate the name is not in the top chunks or uses different format.")
-        print(f"[RAG] Suggestion: Check {context_debug_path} to see what text was retrieved")
+    The instructions and examples live in the static system prefix of
+    PROJECT_EXTRACTION so that Ollama can reuse their KV-cache; only the
+    document chunks change between requests.
+    """
+    return PROJECT_EXTRACTION.render(context=context_text)
 
-    # --- [수정] 프롬프트가 단일 객체가 아닌 'JSON 리스트'를 요청하도록 변경 ---
-    prompt = f"""You are extracting construction project career data from Korean documents.
-
-        DOCUMENT CHUNKS:
-        {context_text}
-
-        TASK: Extract ALL construction projects from the "기술경력" section ONLY into a JSON array.
-
-        CRITICAL SECTION FILTERING:
-        - ONLY extract projects from section "1. 기술경력" (Technical Career)
-        - IGNORE section "2. 건설사업관리" (Construction Management)
-        - IGNORE any sections about "감리", "감독", "건설사업관리"
-        - Focus on the table rows under "1. 기술경력"
-
-        STEP 1 - FIND ENGINEER NAME (성명):
-        The engineer's name appears in headers with patterns like:
-        - "성명: 정환철" or "성영: 정환철" (OCR may misread 성명 as 성영)
-        - "이름: 정환철"
-        - Look for "성명", "성영", "이름" followed by ":" and a Korean name
-
-        CRITICAL: Korean names are typically 3 characters (e.g., "정환철", "김철수", "이영희")
-        - Extract the COMPLETE 3-character name
-        - This name is THE SAME for ALL projects
-
-        STEP 2 - FIND ALL PROJECTS FROM "1. 기술경력" SECTION:
-        Each project is a separate row in the table under "1. 기술경력".
-        Extract these fields for EACH project row:
-
-        Required fields (extract ALL available information):
-        - engineer_name: Use the COMPLETE name from STEP 1 (SAME for all projects, usually 3 characters)
-        - project_name: Full project/contract name (사업명, 용역명, 공사명) - extract the COMPLETE name
-        - client: Ordering organization (발주처, 발주기관, 발주청) - extract the COMPLETE organization name
-        - start_date: Start date (YYYY-MM-DD format) - MUST have a value, search carefully
-        - end_date: End date (YYYY-MM-DD format) - MUST have a value, search carefully in the same row
-        - original_fields: Array of work types (공종, 분야) - can be multiple, extract ALL mentioned
-        - primary_original_field: Main work type (주공종) - typically first or most prominent
-        - roles: Array of job roles (담당업무, 직책) - can be multiple, extract ALL mentioned
-        - primary_role: Main job role (주담당업무) - typically first or most prominent
-
-        CRITICAL FOR DATES:
-        - Each project row has BOTH start date AND end date
-        - Look for date pairs like "2020.02.20 ~ 2021.03.15" or "2005.03.31 ~ 2005.07.29"
-        - Convert ALL dates to YYYY-MM-DD format
-        - VALIDATE: Days must be 01-31, months must be 01-12
-        - If day is invalid (e.g., "84"), correct it (e.g., use last day of month)
-
-        DATE CONVERSION RULES:
-        - "2005.03.31" → "2005-03-31"
-        - "05.03.31" → "2005-03-31" (assume 20xx for 00-23, 19xx for 24-99)
-        - "2005.04.01" → "2005-04-01"
-        - If end date is incomplete or invalid, estimate based on typical project duration
-        - NEVER output invalid dates like "2021-12-84" (day 84 doesn't exist!)
-
-        EXAMPLE OUTPUT (for 2 projects):
-        [
-        {{"engineer_name":"홍길동","project_name":"학성교가설공사","client":"울산시청","start_date":"1995-01-23","end_date":"1997-08-31","original_fields":["도로","교량"],"primary_original_field":"교량","roles":["설계","감리"],"primary_role":"설계"}},
-        {{"engineer_name":"홍길동","project_name":"번영로번영교신설공사","client":"울산광역시","start_date":"1998-03-01","end_date":"2000-12-31","original_fields":["교량"],"primary_original_field":"교량","roles":["감리"],"primary_role":"감리"}}
-        ]
-
-        CRITICAL OUTPUT RULES:
-        1. Output MUST be a JSON ARRAY starting with [ and ending with ]
-        2. NEVER output a single object - ALWAYS wrap in array brackets
-        3. Extract ALL projects from "1. 기술경력" section (typically 5-15 projects)
-        4. Each project MUST have both start_date and end_date in YYYY-MM-DD format
-        5. Dates MUST be valid (days 01-31, months must be 01-12)
-        6. Use THE SAME engineer_name for all projects
-        7. NO markdown, NO explanations, NO extra text
-        8. Output ONLY the raw JSON array
-
-        EXAMPLE - Your output MUST look like this:
-        [
-        {{"engineer_name":"정환철","project_name":"광양항서측인입철일괄임찰공사기본설계","client":"LG건설(주)","start_date":"2005-03-31","end_date":"2005-05-31","original_fields":["토목","설계"],"primary_original_field":"토목","roles":["설계"],"primary_role":"설계"}},
-        {{"engineer_name":"정환철","project_name":"군장국가상업탄지후안도로건설공사","client":"삼성물산(주)","start_date":"2005-06-01","end_date":"2005-09-20","original_fields":["토목","설계"],"primary_original_field":"토목","roles":["설계"],"primary_role":"설계"}}
-        ]
-
-        Begin extraction from "1. 기술경력" section:
-    """
-
-    raw_text = _call_ollama(prompt)
 
-    print(f"[RAG] LLM response length: {len(raw_text)} characters")
-    print(f"[RAG] LLM response preview (200 chars): {raw_text[:200]}...")
+def _unwrap_projects(objects: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Flatten wrapper objects such as {"projects": [...]} into their project items."""
+    projects: List[Dict[str, Any]] = []
+    for obj in objects:
+        if "project_name" not in obj:
+            nested = [v for value in obj.values() if isinstance(value, list) for v in value if isinstance(v, dict)]
+            if nested:
+                projects.extend(nested)
+                continue
+        projects.append(obj)
+    return projects
 
-    # Debug: Save full LLM response to file for inspection
-    debug_path = DATA_DIR / "llm_debug_response.json"
-    try:
-        with open(debug_path, "w", encoding="utf-8") as f:
-            f.write(raw_text)
-        print(f"[RAG] Full LLM response saved to: {debug_path}")
-    except Exception as e:
-        print(f"[RAG] Failed to save debug response: {e}")
 
+def _parse_projects_response(raw_text: str, model: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Parse the LLM response into a list of project dicts.
+
+    Every well-formed project object is kept (see json_stream.salvage_json_objects),
+    so markdown fences, truncation or one broken object only lose that object.
+    Skipped objects are reported.
+
+    Args:
+        raw_text: Raw LLM output
+        model: Model that produced the output (for the warning message)
+
+    Raises:
+        json.JSONDecodeError: If the output is non-empty but contains no usable object
+    """
     # Check for empty/minimal response indicating model failure
     if len(raw_text) < 10 or raw_text.strip() in ["{}", "[]", ""]:
         print("\n" + "="*70)
         print("WARNING: LLM returned empty/minimal response!")
         print("="*70)
-        print(f"Current model: {OLLAMA_MODEL}")
+        print(f"Current model: {model or OLLAMA_MODEL}")
         print("")
         print("This usually means the model is too small for this task.")
         print("The gemma3:4b model may struggle with complex Korean text extraction.")
@@ -239,57 +220,97 @@ def get_raw_project_data(query: str, top_k: int = 25) -> List[Dict[str, Any]]: #
         print("3. Restart the Streamlit app")
         print("="*70 + "\n")
 
-    # --- [수정된 파싱 로직] ---
-    sanitized = raw_text.strip()
-
-    # 간단한 마크다운 블록 제거
-    if sanitized.startswith("```json"):
-        sanitized = sanitized[7:]
-        if sanitized.endswith("```"):
-            sanitized = sanitized[:-3]
-        sanitized = sanitized.strip()
-    
-    data = None
-    try:
-        # 1. 전체 문자열 파싱 시도
-        data = json.loads(sanitized)
-    
-    except json.JSONDecodeError as e:
-        # 2. "Extra data" 오류 발생 시, 오류 지점까지만 잘라서 다시 파싱
-        print(f"[RAG] WARN: Full parse failed ({e}). Attempting partial parse.")
-        try:
-            failed_at_char = e.pos
-            sanitized_partial = sanitized[:failed_at_char].strip()
-            data = json.loads(sanitized_partial)
-            print(f"[RAG] Parsed partially (up to char {failed_at_char}).")
-        except Exception as e2:
-            # 3. 부분 파싱도 실패하면, 원본 오류를 발생시켜 streamlit에 표시
-            print(f"[RAG] ERROR: Partial parse also failed: {e2}")
-            print(f"--- Raw output from Ollama ---")
-            print(raw_text)
-            print(f"--- Sanitized partial attempt ---")
-            print(sanitized_partial)
-            print(f"---------------------------------")
-            raise e # 원본 오류(e)를 다시 발생시킴
-
-    # 4. 파싱 후 타입 체크
-    if not isinstance(data, list):
-        print(f"[RAG] ERROR: Parsed JSON is not a list as requested by prompt.")
+    objects, skipped = salvage_json_objects(raw_text)
+    data = _unwrap_projects(objects)
+
+    if skipped:
+        print(f"[RAG] WARN: Skipped {len(skipped)} malformed object(s), kept {len(data)}.")
+        for raw in skipped:
+            print(f"[RAG]   {raw[:120]!r}")
+
+    if not data and raw_text.strip() not in ("", "[]", "{}"):
+        # Nothing salvageable: surface it like the old full-parse failure
         print(f"--- Raw output from Ollama ---")
         print(raw_text)
-        print(f"--- Parsed data ---")
-        print(data)
         print(f"---------------------------------")
-        
-        # AI가 실수로 List[Dict] 대신 Dict를 반환한 경우, 리스트로 감싸줌
-        if isinstance(data, dict):
-            print("[RAG] WARN: Data was a dict, wrapping in list.")
-            data = [data]
-        else:
-            return [] # 그 외의 경우(예: 문자열, 숫자)는 빈 리스트 반환
+        raise json.JSONDecodeError("No well-formed project object in LLM output", raw_text, 0)
 
     print(f"[RAG] Parsed {len(data)} project item(s) from AI.")
+    return data
 
+
+def _is_valid_iso_date(value: str) -> bool:
+    try:
+        datetime.strptime(value, "%Y-%m-%d")
+        return True
+    except ValueError:
+        return False
+
+
+def _find_row_issues(project: Dict[str, Any]) -> List[str]:
+    """
+    Data quality checks for one extracted project.
+
+    Returns:
+        Human-readable issue descriptions (empty list if the row looks fine)
+    """
+    issues = []
+    start = str(project.get("start_date") or "").strip()
+    end = str(project.get("end_date") or "").strip()
+
+    # Check for missing end dates
+    if not end:
+        issues.append("Missing end_date")
+
+    # Check for invalid dates (e.g. day 84) and reversed ranges
+    for field, value in (("start_date", start), ("end_date", end)):
+        if value and not _is_valid_iso_date(value):
+            issues.append(f"Invalid {field} '{value}'")
+    if start and end and _is_valid_iso_date(start) and _is_valid_iso_date(end) and end < start:
+        issues.append(f"end_date {end} is before start_date {start}")
+
+    # Check for truncated engineer names (< 3 chars for Korean names)
+    eng_name = str(project.get("engineer_name") or "")
+    if eng_name and len(eng_name) < 3 and any('\uac00' <= c <= '\ud7a3' for c in eng_name):
+        issues.append(f"Engineer name '{eng_name}' seems truncated (Korean names are usually 3 characters)")
+
+    # Check for empty client
+    if not str(project.get("client") or "").strip():
+        issues.append("Missing client information")
+
+    return issues
+
+
+def _defective_fields(project: Dict[str, Any]) -> List[str]:
+    """
+    Fields of a project that fail the _find_row_issues checks.
+
+    Returns:
+        Field names to re-extract (subset of engineer_name, client,
+        start_date, end_date)
+    """
+    fields = []
+    start = str(project.get("start_date") or "").strip()
+    end = str(project.get("end_date") or "").strip()
+    start_ok = not start or _is_valid_iso_date(start)
+    end_ok = bool(end) and _is_valid_iso_date(end)
+    if start_ok and end_ok and start and end < start:
+        start_ok = end_ok = False
+
+    eng_name = str(project.get("engineer_name") or "")
+    if eng_name and len(eng_name) < 3 and any('\uac00' <= c <= '\ud7a3' for c in eng_name):
+        fields.append("engineer_name")
+    if not str(project.get("client") or "").strip():
+        fields.append("client")
+    if not start_ok:
+        fields.append("start_date")
+    if not end_ok:
+        fields.append("end_date")
+    return fields
+
+
+def _log_extraction_summary(data: List[Dict[str, Any]]) -> None:
+    """Print extracted project names and warn about common data quality issues."""
     # Debug: Print detailed extraction summary
     if data and len(data) > 0:
         first_project = data[0].get("project_name", "(no name)")
@@ -306,18 +327,8 @@ def get_raw_project_data(query: str, top_k: int = 25) -> List[Dict[str, Any]]: #
         # Validate and warn about common issues
         issues_found = []
         for i, project in enumerate(data, 1):
-            # Check for missing end dates
-            if not project.get("end_date") or project.get("end_date", "").strip() == "":
-                issues_found.append(f"  Project {i} ({project.get('project_name', 'unknown')}): Missing end_date")
-
-            # Check for truncated engineer names (< 3 chars for Korean names)
-            eng_name = project.get("engineer_name", "")
-            if eng_name and len(eng_name) < 3 and any('\uac00' <= c <= '\ud7a3' for c in eng_name):
-                issues_found.append(f"  Project {i}: Engineer name '{eng_name}' seems truncated (Korean names are usually 3 characters)")
-
-            # Check for empty client
-            if not project.get("client") or project.get("client", "").strip() == "":
-                issues_found.append(f"  Project {i}: Missing client information")
+            for issue in _find_row_issues(project):
+                issues_found.append(f"  Project {i} ({project.get('project_name', 'unknown')}): {issue}")
 
         if issues_found:
             print(f"[RAG] WARNING: Data quality issues detected:")
@@ -330,4 +341,564 @@ def get_raw_project_data(query: str, top_k: int = 25) -> List[Dict[str, Any]]: #
     else:
         print(f"[RAG] WARNING: No projects extracted!")
 
-    return data
\ No newline at end of file
+
+# Per-model cascade statistics (process-wide): how often each model's rows were accepted
+_cascade_stats: Dict[str, Dict[str, int]] = {}
+_cascade_lock = threading.Lock()
+
+
+def _record_cascade(model: str, accepted_rows: int = 0, rejected_rows: int = 0, failed_docs: int = 0) -> None:
+    with _cascade_lock:
+        stats = _cascade_stats.setdefault(
+            model, {"calls": 0, "failed_docs": 0, "accepted_rows": 0, "rejected_rows": 0}
+        )
+        stats["calls"] += 1
+        stats["failed_docs"] += failed_docs
+        stats["accepted_rows"] += accepted_rows
+        stats["rejected_rows"] += rejected_rows
+
+
+def get_cascade_stats() -> Dict[str, Dict[str, Any]]:
+    """
+    Return per-model cascade statistics.
+
+    Returns:
+        {model: {calls, failed_docs, accepted_rows, rejected_rows,
+                 doc_hit_rate, row_hit_rate}}
+    """
+    with _cascade_lock:
+        snapshot = {m: dict(s) for m, s in _cascade_stats.items()}
+    for stats in snapshot.values():
+        rows = stats["accepted_rows"] + stats["rejected_rows"]
+        stats["doc_hit_rate"] = round(1 - stats["failed_docs"] / stats["calls"], 3) if stats["calls"] else 0.0
+        stats["row_hit_rate"] = round(stats["accepted_rows"] / rows, 3) if rows else 0.0
+    return snapshot
+
+
+def cascade_enabled() -> bool:
+    """
+    True when OLLAMA_FAST_MODEL is set (and differs from OLLAMA_MODEL).
+
+    The cascade needs the whole response to validate rows, so callers use
+    get_raw_project_data instead of stream_raw_project_data while it is on.
+    """
+    return bool(OLLAMA_FAST_MODEL) and OLLAMA_FAST_MODEL != OLLAMA_MODEL
+
+
+def _name_key(project: Dict[str, Any]) -> str:
+    return re.sub(r"\s+", "", str(project.get("project_name") or ""))
+
+
+def _run_model(context_text: str, model: str) -> tuple:
+    """
+    Run the extraction prompt with one model.
+
+    Returns:
+        (raw_text, projects) - projects is None when the output is not parseable
+    """
+    raw_text = _call_ollama(_build_extraction_prompt(context_text), model=model)
+    print(f"[RAG] [{model}] LLM response length: {len(raw_text)} characters")
+    try:
+        data = _parse_projects_response(raw_text, model)
+    except json.JSONDecodeError:
+        return raw_text, None
+    return raw_text, [p for p in data if isinstance(p, dict)]
+
+
+def _extract_context(context_text: str) -> tuple:
+    """
+    Extract projects from one context, small-model-first when configured.
+
+    Without OLLAMA_FAST_MODEL this is a single OLLAMA_MODEL call. With it,
+    the fast model runs first and its rows are checked with _find_row_issues:
+    - unparseable/empty output, or more than half the rows failing, escalates
+      the whole document to OLLAMA_MODEL
+    - otherwise only failing rows are replaced by the large model's version
+      (when that one has fewer issues), and projects only the large model
+      found are appended
+
+    Returns:
+        (raw_text, projects) - raw_text is the response kept for debugging
+
+    Raises:
+        json.JSONDecodeError: If the final (large model) output is not parseable
+    """
+    if not cascade_enabled():
+        raw_text = _call_ollama(_build_extraction_prompt(context_text))
+        print(f"[RAG] LLM response length: {len(raw_text)} characters")
+        print(f"[RAG] LLM response preview (200 chars): {raw_text[:200]}...")
+        return raw_text, _parse_projects_response(raw_text)
+
+    raw_fast, fast = _run_model(context_text, OLLAMA_FAST_MODEL)
+    bad = [i for i, p in enumerate(fast or []) if _find_row_issues(p)]
+
+    if not fast or len(bad) * 2 > len(fast):
+        _record_cascade(OLLAMA_FAST_MODEL, rejected_rows=len(fast or []), failed_docs=1)
+        print(f"[RAG] Cascade: {OLLAMA_FAST_MODEL} output rejected "
+              f"({len(bad)}/{len(fast or [])} rows failed), escalating document to {OLLAMA_MODEL}")
+        raw_text = _call_ollama(_build_extraction_prompt(context_text), model=OLLAMA_MODEL)
+        data = [p for p in _parse_projects_response(raw_text, OLLAMA_MODEL) if isinstance(p, dict)]
+        large_bad = sum(1 for p in data if _find_row_issues(p))
+        _record_cascade(OLLAMA_MODEL, accepted_rows=len(data) - large_bad, rejected_rows=large_bad,
+                        failed_docs=0 if data else 1)
+        return raw_text, data
+
+    _record_cascade(OLLAMA_FAST_MODEL, accepted_rows=len(fast) - len(bad), rejected_rows=len(bad))
+    if not bad:
+        print(f"[RAG] Cascade: accepted all {len(fast)} rows from {OLLAMA_FAST_MODEL}")
+        return raw_fast, fast
+
+    print(f"[RAG] Cascade: {len(bad)}/{len(fast)} rows from {OLLAMA_FAST_MODEL} failed validation, "
+          f"escalating to {OLLAMA_MODEL}")
+    _, large = _run_model(context_text, OLLAMA_MODEL)
+    if not large:
+        _record_cascade(OLLAMA_MODEL, failed_docs=1)
+        print(f"[RAG] Cascade: {OLLAMA_MODEL} returned nothing usable, keeping {OLLAMA_FAST_MODEL} rows")
+        return raw_fast, fast
+
+    large_by_name = {_name_key(p): p for p in large}
+    merged = list(fast)
+    fixed = 0
+    for i in bad:
+        candidate = large_by_name.get(_name_key(fast[i]))
+        if candidate is not None and len(_find_row_issues(candidate)) < len(_find_row_issues(fast[i])):
+            merged[i] = candidate
+            fixed += 1
+
+    # Projects the fast model missed entirely
+    fast_names = {_name_key(p) for p in fast}
+    missing = [p for p in large if _name_key(p) not in fast_names]
+    merged.extend(missing)
+
+    _record_cascade(OLLAMA_MODEL, accepted_rows=fixed + len(missing), rejected_rows=len(bad) - fixed)
+    print(f"[RAG] Cascade: replaced {fixed}/{len(bad)} failed rows, added {len(missing)} missed project(s)")
+    return json.dumps(merged, ensure_ascii=False, indent=2), merged
+
+
+def _segment_docs(docs: List[Document], max_chars: int = MAP_REDUCE_SEGMENT_CHARS) -> List[List[Document]]:
+    """
+    Group retrieved chunks into page-aligned segments for map-reduce extraction.
+
+    Chunks are put back into document order (source, page) and packed into
+    segments of at most ``max_chars`` characters. Chunks are never split, so
+    table rows stay intact; an oversized chunk gets a segment of its own.
+
+    Args:
+        docs: Retrieved document chunks
+        max_chars: Soft character limit per segment
+
+    Returns:
+        List of segments, each a list of chunks
+    """
+    def _order(d: Document):
+        page = d.metadata.get("page", 0)
+        return (str(d.metadata.get("source", "")), page if isinstance(page, int) else 0)
+
+    segments: List[List[Document]] = []
+    current: List[Document] = []
+    current_len = 0
+    for d in sorted(docs, key=_order):
+        size = len(d.page_content or "")
+        if current and current_len + size > max_chars:
+            segments.append(current)
+            current, current_len = [], 0
+        current.append(d)
+        current_len += size
+    if current:
+        segments.append(current)
+    return segments
+
+
+def _extract_segment(index: int, total: int, docs: List[Document]) -> List[Dict[str, Any]]:
+    """Run the extraction prompt on one segment (map step)."""
+    context_text = _format_context(docs)
+    print(f"[RAG] Segment {index + 1}/{total}: {len(docs)} chunks, {len(context_text)} characters")
+    try:
+        _, projects = _extract_context(context_text)
+    except json.JSONDecodeError as e:
+        # One bad segment must not discard the others
+        print(f"[RAG] WARN: Segment {index + 1}/{total} returned unparsable JSON, skipping: {e}")
+        return []
+    return [p for p in projects if isinstance(p, dict)]
+
+
+def _project_key(project: Dict[str, Any]) -> tuple:
+    """Deduplication key: (project_name without spaces, start_date, end_date)."""
+    name = re.sub(r"\s+", "", str(project.get("project_name") or ""))
+    start = str(project.get("start_date") or "").strip()
+    end = str(project.get("end_date") or "").strip()
+    return (name, start, end)
+
+
+def _reconcile_engineer_name(projects: List[Dict[str, Any]], hints: Optional[List[str]] = None) -> str:
+    """
+    Pick the single engineer name shared by all projects.
+
+    Segments without the document header often return an empty or truncated
+    name, so complete (3+ character) names win over shorter ones, names also
+    found by the 성명 regex win over the rest, and the most frequent wins last.
+    """
+    counts = Counter(
+        str(p.get("engineer_name") or "").strip() for p in projects
+    )
+    counts.pop("", None)
+    if not counts:
+        return ""
+    hint_set = set(hints or [])
+    return max(counts, key=lambda n: (len(n) >= 3, n in hint_set, counts[n]))
+
+
+def _merge_segment_projects(
+    segment_results: List[List[Dict[str, Any]]],
+    name_hints: Optional[List[str]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Merge per-segment projects (reduce step).
+
+    Projects with the same (project_name, start_date, end_date) are merged:
+    empty scalar fields are filled from the duplicate and list fields are
+    unioned. First-seen order is kept, so the output follows document order.
+    """
+    merged: Dict[tuple, Dict[str, Any]] = {}
+    for projects in segment_results:
+        for project in projects:
+            key = _project_key(project)
+            if key not in merged:
+                merged[key] = dict(project)
+                continue
+            existing = merged[key]
+            for field, value in project.items():
+                if isinstance(value, list):
+                    current = existing.get(field)
+                    current = current if isinstance(current, list) else []
+                    existing[field] = current + [v for v in value if v not in current]
+                elif value and not existing.get(field):
+                    existing[field] = value
+
+    result = list(merged.values())
+    engineer_name = _reconcile_engineer_name(result, name_hints)
+    if engineer_name:
+        for project in result:
+            project["engineer_name"] = engineer_name
+    return result
+
+
+def _extract_map_reduce(docs: List[Document], name_hints: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+    """
+    Map-reduce extraction: one LLM call per segment, run concurrently.
+
+    Latency follows the largest segment instead of the whole context, and a
+    timeout or broken JSON only loses that segment.
+    """
+    segments = _segment_docs(docs)
+    total = len(segments)
+    workers = max(1, min(MAP_REDUCE_MAX_WORKERS, total))
+    print(f"[RAG] Map-reduce extraction: {total} segments, {workers} concurrent requests")
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_extract_segment, i, total, seg) for i, seg in enumerate(segments)]
+        segment_results = [f.result() for f in futures]
+
+    raw_count = sum(len(r) for r in segment_results)
+    data = _merge_segment_projects(segment_results, name_hints)
+    print(f"[RAG] Merged {raw_count} segment project(s) into {len(data)} unique project(s).")
+    return data
+
+
+def _chunks_mentioning(vectorstore: FAISS, project_name: str, k: int = REPAIR_TOP_K) -> List[Document]:
+    """
+    Retrieve chunks that mention a project name.
+
+    Matching ignores whitespace and accepts the first 10 characters of the
+    name, so a name wrapped over two table lines still matches.
+    """
+    key = re.sub(r"\s+", "", project_name)
+    if not key:
+        return []
+    prefix = key[:10]
+    hits = vectorstore.similarity_search(project_name, k=k)
+    return [d for d in hits if prefix in re.sub(r"\s+", "", d.page_content)]
+
+
+def _repair_row(vectorstore: FAISS, project: Dict[str, Any], fields: List[str]) -> Dict[str, Any]:
+    """
+    Ask the LLM for only the given fields of one project.
+
+    Returns:
+        {field: value} for values that pass validation (possibly empty)
+    """
+    project_name = str(project.get("project_name") or "")
+    docs = _chunks_mentioning(vectorstore, project_name)
+    if not docs:
+        print(f"[RAG] Repair: no chunk mentions {project_name!r}, skipping")
+        return {}
+
+    known = {k: v for k, v in project.items() if k not in fields and isinstance(v, str)}
+    user = ROW_REPAIR.render(
+        project=json.dumps(known, ensure_ascii=False),
+        fields=", ".join(fields),
+        context=_format_context(docs),
+    )
+    schema = {
+        "type": "object",
+        "properties": {f: {"type": "string"} for f in fields},
+        "required": fields,
+    }
+    try:
+        data = get_ollama_client().chat(
+            ROW_REPAIR.messages(user),
+            format=schema,
+            options={"temperature": 0.0, "num_ctx": OLLAMA_NUM_CTX},
+            timeout=60,
+            keep_alive=OLLAMA_KEEP_ALIVE,
+        )
+        values = json.loads(data.get("message", {}).get("content", "") or "{}")
+    except Exception as e:
+        print(f"[RAG] Repair of {project_name!r} failed: {e}")
+        return {}
+    if not isinstance(values, dict):
+        return {}
+
+    # Keep a value only if it fixes the field
+    candidate = {f: str(values.get(f) or "").strip() for f in fields}
+    candidate = {f: v for f, v in candidate.items() if v}
+    still_bad = _defective_fields({**project, **candidate})
+    return {f: v for f, v in candidate.items() if f not in still_bad}
+
+
+def _repair_defective_rows(data: List[Dict[str, Any]], workspace: Workspace) -> List[Dict[str, Any]]:
+    """
+    Targeted re-extraction of rows that fail validation.
+
+    For each defective row, only the chunks mentioning its project name are
+    retrieved and only the defective fields are requested, with the output
+    constrained by a JSON schema. Rows are updated in place of a full re-run.
+
+    Returns:
+        The project list with repaired rows (same order and length)
+    """
+    defective = [(i, _defective_fields(p)) for i, p in enumerate(data)]
+    defective = [(i, fields) for i, fields in defective if fields and data[i].get("project_name")]
+    if not defective:
+        return data
+    if len(defective) > REPAIR_MAX_ROWS:
+        print(f"[RAG] Repair: {len(defective)} defective rows, repairing the first {REPAIR_MAX_ROWS}")
+        defective = defective[:REPAIR_MAX_ROWS]
+
+    print(f"[RAG] Repair: re-extracting {sum(len(f) for _, f in defective)} field(s) "
+          f"in {len(defective)} defective row(s)")
+    vectorstore = _load_vectorstore(workspace)
+    with ThreadPoolExecutor(max_workers=MAP_REDUCE_MAX_WORKERS) as pool:
+        fixes = list(pool.map(lambda item: _repair_row(vectorstore, data[item[0]], item[1]), defective))
+
+    repaired = list(data)
+    fixed_fields = 0
+    for (i, fields), values in zip(defective, fixes):
+        if values:
+            repaired[i] = {**data[i], **values}
+            fixed_fields += len(values)
+            print(f"[RAG] Repair: {data[i].get('project_name')!r} <- {values}")
+    print(f"[RAG] Repair: fixed {fixed_fields}/{sum(len(f) for _, f in defective)} field(s)")
+    return repaired
+
+
+def repair_project_data(data: List[Dict[str, Any]], workspace_id: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Run the targeted repair pass (REPAIR_DEFECTIVE_ROWS) on extracted projects.
+
+    get_raw_project_data repairs its own result; streamed rows are yielded
+    before validation, so callers of stream_raw_project_data run this on the
+    collected list once the stream ends.
+
+    Returns:
+        The project list with repaired rows (the input list when nothing changed)
+    """
+    if not REPAIR_DEFECTIVE_ROWS or not data:
+        return data
+    return _repair_defective_rows(data, get_workspace(workspace_id))
+
+
+def _retrieve_context(query: str, top_k: int, workspace: Workspace,
+                      budget_tokens: Optional[int] = None) -> tuple:
+    """
+    Retrieve chunks for the query and build the prompt context.
+
+    Args:
+        query: Similarity search query
+        top_k: Number of chunks to retrieve
+        workspace: Workspace whose index is searched (debug files go there too)
+        budget_tokens: If given, keep only the most relevant chunks that fit
+            in this many tokens (see token_budget.select_within_budget)
+
+    Returns:
+        (docs, context_text, found_names) - docs is empty when the index has
+        no matching chunks; found_names are 성명 regex hits used as hints
+    """
+    vectorstore = _load_vectorstore(workspace)
+
+    print(f"[RAG] Searching FAISS (k={top_k}) for query: {query!r}")
+    scored_docs = vectorstore.similarity_search_with_score(query, k=top_k)
+    docs = [d for d, _ in scored_docs]
+
+    if not docs:
+        print("[RAG] WARNING: No documents found in FAISS index!")
+        print("[RAG] This means either:")
+        print("[RAG]   1. Index is empty (no PDFs were processed)")
+        print("[RAG]   2. Embeddings failed to create")
+        print("[RAG]   3. Index file is corrupted")
+        return [], "", []
+
+    print(f"[RAG] Retrieved {len(docs)} document chunks from FAISS")
+    if budget_tokens is not None:
+        docs, used = select_within_budget(scored_docs, budget_tokens, OLLAMA_MODEL)
+        print(f"[RAG] Token budget: kept {len(docs)}/{len(scored_docs)} chunks "
+              f"(~{used} / {budget_tokens} context tokens)")
+        if not docs:
+            print("[RAG] WARNING: No chunk fits in the token budget; raise OLLAMA_NUM_CTX.")
+            return [], "", []
+    print(f"[RAG] First chunk preview (100 chars): {docs[0].page_content[:100]}...")
+
+    # Debug: Show how many chunks from each source
+    source_counts = Counter(d.metadata.get('source', 'unknown') for d in docs)
+    print(f"[RAG] Chunks by source: {dict(source_counts)}")
+
+    context_text = _format_context(docs)
+
+    print(f"[RAG] Total context length: {len(context_text)} characters")
+
+    # Debug: Save context to file for inspection
+    context_debug_path = workspace.debug_dir / "llm_debug_context.txt"
+    try:
+        with open(context_debug_path, "w", encoding="utf-8") as f:
+            f.write(context_text)
+        print(f"[RAG] Context saved to: {context_debug_path}")
+    except Exception as e:
+        print(f"[RAG] Failed to save context: {e}")
+
+    # Debug: Check if engineer name pattern exists in retrieved chunks
+    name_patterns = [r'성명[:\s]*([가-힣]{2,4})', r'이름[:\s]*([가-힣]{2,4})', r'성\s*명[:\s]*([가-힣]{2,4})']
+    found_names = []
+    for pattern in name_patterns:
+        matches = re.findall(pattern, context_text)
+        if matches:
+            found_names.extend(matches)
+    if found_names:
+        print(f"[RAG] Found potential engineer names in chunks: {set(found_names)}")
+    else:
+        print(f"[RAG] WARNING: No engineer name pattern found in retrieved chunks!")
+        print(f"[RAG] This may indicate the name is not in the top chunks or uses different format.")
+        print(f"[RAG] Suggestion: Check {context_debug_path} to see what text was retrieved")
+
+    return docs, context_text, found_names
+
+
+def get_raw_project_data(
+    query: str,
+    top_k: int = 25,
+    mode: Optional[str] = None,
+    workspace_id: Optional[str] = None,
+) -> List[Dict[str, Any]]: # [수정] 반환 타입이 List[Dict], top_k 증가
+# ... 기존 코드 ...
+    """
+    Synthesizes all data into a LIST of project objects.
+
+    Args:
+        query: Similarity search query
+        top_k: Number of chunks to retrieve
+        mode: "single" (one LLM call over the whole context) or "map_reduce"
+              (concurrent per-segment calls, merged). Defaults to EXTRACTION_MODE.
+        workspace_id: Session workspace to search (default: the global index)
+    """
+    mode = mode or EXTRACTION_MODE
+    workspace = get_workspace(workspace_id)
+    # Map-reduce segments are sized by MAP_REDUCE_SEGMENT_CHARS; a single
+    # request must fit the whole context in num_ctx.
+    budget = None if mode == "map_reduce" else _context_token_budget()
+    docs, context_text, found_names = _retrieve_context(query, top_k, workspace, budget)
+    if not docs:
+        return []
+
+    if mode == "map_reduce":
+        data = _extract_map_reduce(docs, found_names)
+        raw_text = json.dumps(data, ensure_ascii=False, indent=2)
+    else:
+        raw_text, data = _extract_context(context_text)
+
+    if REPAIR_DEFECTIVE_ROWS:
+        data = _repair_defective_rows(data, workspace)
+
+    # Debug: Save full LLM response to file for inspection
+    debug_path = workspace.debug_dir / "llm_debug_response.json"
+    try:
+        with open(debug_path, "w", encoding="utf-8") as f:
+            f.write(raw_text)
+        print(f"[RAG] Full LLM response saved to: {debug_path}")
+    except Exception as e:
+        print(f"[RAG] Failed to save debug response: {e}")
+
+    _log_extraction_summary(data)
+    if cascade_enabled():
+        print(f"[RAG] Cascade stats: {get_cascade_stats()}")
+    _log_prompt_reuse()
+    return data
+
+
+def stream_raw_project_data(
+    query: str,
+    top_k: int = 25,
+    workspace_id: Optional[str] = None,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Streaming variant of get_raw_project_data (single-request mode, without
+    the fast-model cascade; see cascade_enabled).
+
+    Consumes Ollama's streamed tokens and yields each project object as soon
+    as it is closed in the JSON array, so callers can normalize and display
+    rows while the model is still generating. Objects that fail to parse are
+    skipped and logged instead of discarding the whole response. Rows are
+    not repaired here; run repair_project_data on the collected list.
+
+    Args:
+        query: Similarity search query
+        top_k: Number of chunks to retrieve
+        workspace_id: Session workspace to search (default: the global index)
+
+    Yields:
+        Project dicts in generation order
+    """
+    workspace = get_workspace(workspace_id)
+    docs, context_text, _ = _retrieve_context(query, top_k, workspace, _context_token_budget())
+    if not docs:
+        return
+
+    parser = JSONArrayStreamParser()
+    pieces: List[str] = []
+    data: List[Dict[str, Any]] = []
+    for piece in _stream_ollama(_build_extraction_prompt(context_text)):
+        pieces.append(piece)
+        for project in _unwrap_projects(parser.feed(piece)):
+            data.append(project)
+            print(f"[RAG] Streamed project {len(data)}: {project.get('project_name', '(no name)')}")
+            yield project
+    parser.close()
+
+    raw_text = "".join(pieces).strip()
+    print(f"[RAG] LLM response length: {len(raw_text)} characters")
+
+    # Debug: Save full LLM response to file for inspection
+    debug_path = workspace.debug_dir / "llm_debug_response.json"
+    try:
+        with open(debug_path, "w", encoding="utf-8") as f:
+            f.write(raw_text)
+        print(f"[RAG] Full LLM response saved to: {debug_path}")
+    except Exception as e:
+        print(f"[RAG] Failed to save debug response: {e}")
+
+    if parser.skipped:
+        print(f"[RAG] WARN: Skipped {len(parser.skipped)} malformed object(s) in streamed response.")
+        for raw in parser.skipped:
+            print(f"[RAG]   {raw[:120]!r}")
+
+    print(f"[RAG] Parsed {len(data)} project item(s) from AI stream.")
+    _log_extraction_summary(data)
+    _log_prompt_reuse()
@@ -4,13 +4,21 @@ Report generation and calculation utilities.
 This module provides:
 - Form layout definitions for UI rendering
 - Project summary text generation
-- Career calculation logic (days, months, years, scoring)
+- Career calculation logic (days, months, years, scoring), computed once
+  per project set (CareerCalculation) and rendered as the UI dict, JSON
+  and text report
 - Aggregation of multiple projects for final report
 """
-from typing import Dict, Any, List
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional
+import numpy as np
 import pandas as pd
-from rules_config import CHECKBOX_RULES
-from datetime import datetime
+from rules_config import get_rule_set
+from config import MERGE_OVERLAPPING_PERIODS
+from date_parser import parse_date_column
+from interval_union import class_days, overlapping_pairs, to_day_numbers
 
 # ---- 1. Logical form layout (mirrors the paper form) ----
 # (기존 FORM_LAYOUT... 생략)
@@ -373,9 +381,10 @@ FORM_LAYOUT = {
 def get_form_layout() -> Dict[str, Any]:
     return FORM_LAYOUT
 
-def group_rules_by_category():
+def group_rules_by_category(rules: List[dict] = None):
+    """rules: 결과를 만든 규칙 목록 (기본값: 현재 규칙 세트)"""
     grouped = {}
-    for r in CHECKBOX_RULES:
+    for r in (rules if rules is not None else get_rule_set().rules):
         cat = r.get("category", "기타")
         grp = r.get("group", "기타")
         grouped.setdefault(cat, {})
@@ -442,80 +451,6 @@ def build_project_summary_text(
 
 # --- [새로 추가된 헬퍼 함수] ---
 
-def _parse_date(date_str: str) -> datetime | None:
-    """
-    날짜 문자열을 datetime 객체로 변환
-
-    지원 형식:
-    - YYYY-MM-DD (예: 2023-01-15)
-    - YY.MM.DD (예: 95.01.23)
-    - YYYY-MM (예: 2013-11) → YYYY-MM-01로 변환
-    - YY.MM (예: 95.01) → YYYY-MM-01로 변환
-
-    Args:
-        date_str: 날짜 문자열
-
-    Returns:
-        datetime 객체 또는 None (파싱 실패시)
-    """
-    if not date_str or not isinstance(date_str, str):
-        return None
-
-    date_str = date_str.strip()
-    if not date_str:
-        return None
-
-    try:
-        # YYYY-MM-DD 형식 시도
-        return datetime.strptime(date_str, "%Y-%m-%d")
-    except ValueError:
-        try:
-            # YY.MM.DD 형식 시도 (예: 95.01.23)
-            dt = datetime.strptime(date_str, "%y.%m.%d")
-            # 19xx년과 20xx년을 구분 (70년 기준)
-            if dt.year > datetime.now().year:
-                dt = dt.replace(year=dt.year - 100)  # 19xx
-            return dt
-        except ValueError:
-            try:
-                # YYYY-MM 형식 시도 (예: 2013-11)
-                dt = datetime.strptime(date_str, "%Y-%m")
-                return dt.replace(day=1)  # 1일로 설정
-            except ValueError:
-                try:
-                    # YY.MM 형식 시도 (예: 95.01)
-                    dt = datetime.strptime(date_str, "%y.%m")
-                    if dt.year > datetime.now().year:
-                        dt = dt.replace(year=dt.year - 100)
-                    return dt.replace(day=1)
-                except ValueError:
-                    # 파싱 실패 시 로그 출력 (디버깅용)
-                    print(f"[WARN] 날짜 파싱 실패: {date_str}")
-                    return None
-
-def _calculate_days(start_str: str, end_str: str) -> int:
-    """
-    시작일과 종료일 사이의 일수 계산 (종료일 포함)
-
-    Args:
-        start_str: 시작일 문자열
-        end_str: 종료일 문자열
-
-    Returns:
-        일수 (종료일 포함, 유효하지 않은 경우 0)
-    """
-    start_date = _parse_date(start_str)
-    end_date = _parse_date(end_str)
-
-    if not start_date or not end_date:
-        return 0
-
-    if end_date < start_date:
-        print(f"[WARN] 종료일이 시작일보다 이릅니다: {start_str} ~ {end_str}")
-        return 0
-
-    return (end_date - start_date).days + 1  # 종료일 포함 +1
-
 def _days_to_months(days: int) -> int:
     """
     일수를 개월로 변환
@@ -550,29 +485,320 @@ def _days_to_year_month_str(total_days: int) -> str:
     months = total_months % 12
     return f"{years}년 {months}월"
 
+def _column(projects_df: pd.DataFrame, name: str, default: Any) -> pd.Series:
+    """열이 없으면 default로 채운 열 반환 (project_series.get(name, default)와 같은 값)"""
+    if name in projects_df.columns:
+        return projects_df[name]
+    return pd.Series([default] * len(projects_df), index=projects_df.index, dtype=object)
+
+
+def _project_periods(start_values: pd.Series, end_values: pd.Series):
+    """
+    시작일/종료일 열로 프로젝트별 기간과 일수를 한 번에 계산 (종료일 포함)
+
+    Returns:
+        (시작일 datetime64 Series, 종료일 datetime64 Series,
+         일수 int Series - 유효하지 않은 경우 0)
+    """
+    start = parse_date_column(start_values)
+    end = parse_date_column(end_values)
+    both = start.notna() & end.notna()
+
+    inverted = both & (end < start)
+    for s_val, e_val in zip(start_values[inverted], end_values[inverted]):
+        print(f"[WARN] 종료일이 시작일보다 이릅니다: {s_val} ~ {e_val}")
+
+    days = (end - start).dt.days + 1  # 종료일 포함 +1
+    return start, end, days.where(both & ~inverted, 0).astype(int)
+
+
+# --- [공통 계산 모델] ---
+
+def _career_score(total_score_months: int) -> float:
+    """환산 개월 수로 경력 평점 계산 (최대 12점)"""
+    return min(total_score_months * 0.176, 12.0)
+
+
+def _is_broad_scope(role_count: int) -> bool:
+    """프록시 로직: PDF 예제(10개)를 기준으로, 담당업무 5개 이상이면 Broad(6점)"""
+    return role_count >= 5
+
+
+def _period_totals(codes: np.ndarray, n_groups: int, start: pd.Series, end: pd.Series,
+                   days: np.ndarray, is_60: np.ndarray) -> Dict[str, Any]:
+    """
+    그룹(기술인)별 일수 합계를 한 번에 계산 (CareerCalculation과 배치 요약의 공통 계산)
+
+    MERGE_OVERLAPPING_PERIODS이고 기간이 겹치는 그룹은 겹치는 날을 한 번만 계산하고
+    (해당 분야와 60% 분야가 겹치는 날은 해당 분야로 인정), 나머지 그룹은
+    프로젝트별 일수를 그대로 합산합니다.
+
+    Args:
+        codes: 프로젝트별 그룹 번호 (0..n_groups-1)
+        start / end / days: _project_periods 결과 (days는 int array)
+        is_60: 프로젝트별 60% 분류 여부
+
+    Returns:
+        그룹별 array: relevant_days, other_days_raw, other_days_weighted, total_job_days,
+        total_score_days, union_relevant_days, union_other_days, overlap_pairs, merged
+        및 겹치는 쌍 pairs (valid 내 위치), valid (유효한 기간의 프로젝트 위치)
+    """
+    weights = np.where(is_60, 0.6, 1.0)
+    score_days = np.round(days * weights).astype(int)  # 가중치를 적용한 '환산 일수'
+
+    def per_group(values: np.ndarray) -> np.ndarray:
+        return np.bincount(codes, weights=values, minlength=n_groups).astype(np.int64)
+
+    # 기간 중복 (유효한 기간만, 정렬 후 스윕)
+    valid = np.flatnonzero(days > 0)
+    groups = codes[valid]
+    starts = to_day_numbers(start.to_numpy()[valid])
+    ends = to_day_numbers(end.to_numpy()[valid])
+    # 클래스 0 = 해당 분야(100%), 1 = 비해당 분야(60%): 겹치는 날은 0이 우선
+    per_class = class_days(groups, starts, ends, is_60[valid].astype(np.int64), n_groups, 2)
+    pairs = overlapping_pairs(groups, starts, ends)
+    overlap_pairs = np.bincount(groups[pairs["first"]], minlength=n_groups)
+    merged = (overlap_pairs > 0) & MERGE_OVERLAPPING_PERIODS
+
+    relevant = np.where(merged, per_class[:, 0], per_group(np.where(is_60, 0, days)))
+    other_raw = np.where(merged, per_class[:, 1], per_group(np.where(is_60, days, 0)))
+    other_weighted = np.round(other_raw * 0.6).astype(np.int64)
+    return {
+        "relevant_days": relevant,
+        "other_days_raw": other_raw,
+        "other_days_weighted": other_weighted,
+        # 직무분야는 100% 가중치 (실제 일수 합산)
+        "total_job_days": np.where(merged, relevant + other_raw, per_group(days)),
+        "total_score_days": np.where(merged, relevant + other_weighted, per_group(score_days)),
+        "union_relevant_days": per_class[:, 0],
+        "union_other_days": per_class[:, 1],
+        "overlap_pairs": overlap_pairs,
+        "merged": merged,
+        "score_days": score_days,
+        "overlap_days": np.bincount(groups[pairs["first"]], weights=pairs["days"], minlength=n_groups).astype(np.int64),
+        "pairs": pairs,
+        "valid": valid,
+    }
+
+
+class CareerCalculation:
+    """
+    한 기술인의 프로젝트 목록(DataFrame)에 대한 계산 결과 (중간 모델)
+
+    프로젝트별 일수/가중치/분류와 합계를 한 번만 계산해 두고,
+    UI 딕셔너리, JSON, 텍스트 리포트가 모두 이 모델에서 렌더링됩니다.
+    (날짜를 다시 파싱하지 않음)
+
+    Attributes:
+        project_names / clients / start_dates / end_dates: 프로젝트별 원본 값 (list)
+        actual_days: 프로젝트별 실제 참여 일수 (int array)
+        weights: 프로젝트별 가중치 (0.6 / 1.0 array)
+        is_60: 프로젝트별 60% 분류 여부 (bool array)
+        score_days: 프로젝트별 환산 일수 (int array)
+        total_score_days / total_job_days: 환산 일수 합계 / 실제 일수 합계
+        relevant_days / other_days_raw / other_days_weighted: 해당 / 비해당(60%) 분야 일수
+        overlaps: 기간이 겹치는 프로젝트 쌍 [(프로젝트 i, 프로젝트 j, 겹친 일수)]
+        merged: 겹치는 기간을 한 번만 계산했는지 여부 (MERGE_OVERLAPPING_PERIODS이고 겹침이 있을 때)
+        all_roles: 전체 담당업무 집합
+        first_project: 첫 번째 프로젝트 (성명/분야 대표값)
+
+    MERGE_OVERLAPPING_PERIODS이면 겹치는 기간은 한 번만 계산합니다
+    (해당 분야와 60% 분야가 겹치는 날은 해당 분야로 인정).
+    """
+
+    def __init__(self, projects_df: pd.DataFrame):
+        # 1. 프로젝트 열 준비 (AI 추출 데이터)
+        start_dates = _column(projects_df, "start_date", "")
+        end_dates = _column(projects_df, "end_date", "")
+        self.start_dates = start_dates.tolist()
+        self.end_dates = end_dates.tolist()
+        self.project_names = _column(projects_df, "project_name", "(사업명 없음)").tolist()
+        self.clients = _column(projects_df, "client_raw", "(발주처 없음)").tolist()
+
+        # 100% vs 60% 분류 로직 (규칙 기반)
+        self.is_60 = (_column(projects_df, "recognition_rate_rule", None) == "civil_60").to_numpy()
+        self.weights = np.where(self.is_60, 0.6, 1.0)
+
+        # 2. 일수 계산 및 합산 (열 단위, 기간 중복 포함 - 배치 요약과 같은 계산)
+        start, end, days = _project_periods(start_dates, end_dates)
+        self.actual_days = days.to_numpy()  # 실제 참여 일수
+        totals = _period_totals(np.zeros(len(self.actual_days), dtype=np.int64), 1,
+                                start, end, self.actual_days, self.is_60)
+        self.score_days = totals["score_days"]
+        self.total_score_days = int(totals["total_score_days"][0])
+        self.total_job_days = int(totals["total_job_days"][0])
+        self.relevant_days = int(totals["relevant_days"][0])
+        self.other_days_raw = int(totals["other_days_raw"][0])
+        self.other_days_weighted = int(totals["other_days_weighted"][0])
+        self.merged = bool(totals["merged"][0])
+        valid, pairs = totals["valid"], totals["pairs"]
+        self.overlaps = [
+            (int(valid[i]), int(valid[j]), int(d)) for i, j, d in zip(pairs["first"], pairs["second"], pairs["days"])
+        ]
+
+        self.all_roles = set()
+        for roles in _column(projects_df, "roles", []):
+            if isinstance(roles, (list, tuple, set)):
+                self.all_roles.update(roles)
+
+        self.first_project = projects_df.iloc[0]
+        self.rule_set_version = (
+            projects_df["rule_set_version"].iloc[0] if "rule_set_version" in projects_df.columns else None
+        )
+
+    @property
+    def total_score_months(self) -> int:
+        return _days_to_months(self.total_score_days)
+
+    @property
+    def job_total_months(self) -> int:
+        return _days_to_months(self.total_job_days)
+
+    @property
+    def score(self) -> float:
+        return _career_score(self.total_score_months)
+
+    @property
+    def is_broad_scope(self) -> bool:
+        return _is_broad_scope(len(self.all_roles))
+
+    @property
+    def job_field_str(self) -> str:
+        return ", ".join(sorted(self.all_roles))
+
+    def projects(self):
+        """(사업명, 발주처, 시작일, 종료일, 실제 일수, 60% 여부) 튜플을 프로젝트 순서대로 반환"""
+        return zip(self.project_names, self.clients, self.start_dates, self.end_dates,
+                   self.actual_days.tolist(), self.is_60.tolist())
+
+    def overlap_records(self) -> List[str]:
+        """겹치는 프로젝트 쌍을 'A ↔ B (N일 중복)' 문자열로 반환"""
+        return [
+            f"{self.project_names[i]} ↔ {self.project_names[j]} ({days}일 중복)"
+            for i, j, days in self.overlaps
+        ]
+
+
+_CALCULATION_CACHE_SIZE = 32
+_calculation_cache: "OrderedDict[str, CareerCalculation]" = OrderedDict()
+_calculation_cache_lock = threading.Lock()
+
+# 계산에 사용되는 열 (fingerprint 대상)
+_CALCULATION_COLUMNS = (
+    "start_date", "end_date", "project_name", "client_raw", "recognition_rate_rule",
+    "roles", "engineer_name", "primary_original_field", "rule_set_version",
+)
+
+
+def _dataframe_fingerprint(projects_df: pd.DataFrame) -> str:
+    """계산에 쓰이는 열의 내용으로 DataFrame 식별 해시 생성"""
+    digest = hashlib.sha256()
+    digest.update(str(len(projects_df)).encode())
+    for name in _CALCULATION_COLUMNS:
+        if name not in projects_df.columns:
+            continue
+        digest.update(name.encode())
+        # repr로 변환: 리스트 값도 해시 가능, None / "None" / NaN 구분
+        hashed = pd.util.hash_pandas_object(projects_df[name].map(repr), index=False, categorize=False)
+        digest.update(hashed.to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def get_career_calculation(projects_df: pd.DataFrame) -> CareerCalculation:
+    """
+    프로젝트 DataFrame의 계산 모델 반환 (같은 내용이면 캐시된 모델 재사용)
+
+    Args:
+        projects_df: 한 기술인의 프로젝트 DataFrame (비어 있지 않아야 함)
+    """
+    key = _dataframe_fingerprint(projects_df)
+    with _calculation_cache_lock:
+        calc = _calculation_cache.get(key)
+        if calc is not None:
+            _calculation_cache.move_to_end(key)
+            return calc
+
+    calc = CareerCalculation(projects_df)
+    with _calculation_cache_lock:
+        _calculation_cache[key] = calc
+        while len(_calculation_cache) > _CALCULATION_CACHE_SIZE:
+            _calculation_cache.popitem(last=False)
+    return calc
+
+
+def get_period_summary_by_engineer(projects_df: pd.DataFrame, groups: Optional[pd.Series] = None) -> pd.DataFrame:
+    """
+    여러 기술인의 프로젝트를 한 번에 처리해 기술인별 기간 요약 반환 (배치 실행용)
+
+    합계와 평점은 기술인별 CareerCalculation과 같은 계산입니다 (MERGE_OVERLAPPING_PERIODS 반영).
+
+    Args:
+        projects_df: 여러 기술인의 프로젝트 DataFrame
+        groups: 프로젝트별 그룹 키 (기본값: engineer_name). 이름이 같은 다른 기술인을 구분할 때 사용
+
+    Returns:
+        그룹 키 인덱스 DataFrame:
+        project_count, summed_days (프로젝트별 일수 단순 합), union_days (중복 제외),
+        relevant_days / other_days (중복 제외, 해당 분야 우선), overlap_pairs, overlap_days,
+        merged, total_score_days / total_job_days, total_score_months / total_job_months,
+        career_score (경력 평점), job_score (직무분야 평점)
+    """
+    if groups is None:
+        groups = _column(projects_df, "engineer_name", "").fillna("").astype(str)
+    groups = pd.Series(groups).reset_index(drop=True)
+    codes, keys = pd.factorize(groups)
+    n_groups = len(keys)
+
+    start, end, days = _project_periods(_column(projects_df, "start_date", ""), _column(projects_df, "end_date", ""))
+    is_60 = (_column(projects_df, "recognition_rate_rule", None) == "civil_60").to_numpy()
+    days = days.to_numpy()
+    totals = _period_totals(codes, n_groups, start, end, days, is_60)
+
+    roles_by_group = [set() for _ in range(n_groups)]
+    for code, roles in zip(codes, _column(projects_df, "roles", [])):
+        if isinstance(roles, (list, tuple, set)):
+            roles_by_group[code].update(roles)
+
+    total_score_months = [_days_to_months(int(d)) for d in totals["total_score_days"]]
+    return pd.DataFrame(
+        {
+            "project_count": np.bincount(codes, minlength=n_groups),
+            "summed_days": np.bincount(codes, weights=days, minlength=n_groups).astype(int),
+            "union_days": totals["union_relevant_days"] + totals["union_other_days"],
+            "relevant_days": totals["union_relevant_days"],
+            "other_days": totals["union_other_days"],
+            "overlap_pairs": totals["overlap_pairs"],
+            "overlap_days": totals["overlap_days"],
+            "merged": totals["merged"],
+            "total_score_days": totals["total_score_days"],
+            "total_job_days": totals["total_job_days"],
+            "total_score_months": total_score_months,
+            "total_job_months": [_days_to_months(int(d)) for d in totals["total_job_days"]],
+            "career_score": [f"{_career_score(m):.1f}점" for m in total_score_months],
+            "job_score": ["6점 (광범위)" if _is_broad_scope(len(r)) else "3점 (제한적)" for r in roles_by_group],
+        },
+        index=pd.Index(keys, name=groups.name or "engineer_name"),
+    )
+
+
 # --- [수정된 메인 계산 함수] ---
 
 def get_project_calculations(projects_df: pd.DataFrame) -> Dict[str, Any]:
     """
     AI가 추출한 *여러 프로젝트(DataFrame)*를 기반으로
     사용자가 요청한 PDF 양식의 계산을 *합산*하여 UI용 딕셔너리를 반환합니다.
+
+    계산은 get_career_calculation 모델을 사용합니다.
     """
     
-    # --- 1. 집계 변수 초기화 ---
-    total_score_days = 0
-    total_job_days = 0 # 직무분야는 100% 가중치
-    relevant_list = []
-    other_list = []
-    all_project_records_str = []
-    all_roles = set()
-    
     if projects_df.empty:
         # 프로젝트가 하나도 없으면 빈 템플릿 반환
         return {
             "career_details": {
                 "성명": "(정보 없음)", "분야": "(정보 없음)", "현재까지 경력": "0년 0월",
                 "평점": "0점", "total_score_months": 0, "해당분야 용역참여실적": [],
-                "해당분야 이외 참여실적": [], "classification_label": "정보 없음", "weight": 0
+                "해당분야 이외 참여실적": [], "classification_label": "정보 없음", "weight": 0,
+                "중복 참여기간": [], "중복 참여기간 처리": ""
             },
             "job_field_details": {
                 "책임건설사업관리기술인": "(정보 없음)", "직무분야": "", "현재까지 경력": "0년 0월",
@@ -580,86 +806,56 @@ def get_project_calculations(projects_df: pd.DataFrame) -> Dict[str, Any]:
             }
         }
 
-    # --- 2. DataFrame을 반복하며 모든 프로젝트 합산 ---
-    for _, project_series in projects_df.iterrows():
-        # AI 추출 데이터 가져오기
-        start_date = project_series.get("start_date", "")
-        end_date = project_series.get("end_date", "")
-        project_name = project_series.get("project_name", "(사업명 없음)")
-        client = project_series.get("client_raw", "(발주처 없음)")
-        roles = project_series.get("roles", [])
-        
-        # 100% vs 60% 분류 로직 (규칙 기반)
-        is_60_percent_rule = project_series.get("recognition_rate_rule") == "civil_60"
-        weight = 0.6 if is_60_percent_rule else 1.0
-
-        # 실제 참여 일수 계산
-        actual_days = _calculate_days(start_date, end_date)
-        
-        # 가중치를 적용한 '환산 일수'
-        score_days = round(actual_days * weight)
-        
-        # 합산
-        total_score_days += score_days
-        total_job_days += actual_days # 직무 경력은 실제 일수 합산
-        all_roles.update(roles)
-
-        # 리스트에 추가
+    calc = get_career_calculation(projects_df)
+
+    # 리스트 구성
+    relevant_list = []
+    other_list = []
+    all_project_records_str = []
+    for project_name, client, start_date, end_date, days, rule_60 in calc.projects():
         project_record = {
             "용역명": project_name,
             "발주기관": client,
-            "참여기간": f"{start_date} ~ {end_date} ({actual_days}일)"
+            "참여기간": f"{start_date} ~ {end_date} ({days}일)"
         }
-        if is_60_percent_rule:
+        if rule_60:
             other_list.append(project_record)
         else:
             relevant_list.append(project_record)
-            
         all_project_records_str.append(
-            f"{project_name} ({client}, {start_date}~{end_date}, {actual_days}일)"
+            f"{project_name} ({client}, {start_date}~{end_date}, {days}일)"
         )
 
-    # --- 3. '경력 사항' 최종 계산 ---
-    total_score_months = _days_to_months(total_score_days)
+    # '경력 사항' (환산 경력) / '직무 분야' (가중치 없이 실제 일수)
+    total_score_days = calc.total_score_days
+    total_score_months = calc.total_score_months
     total_career_str = f"{_days_to_year_month_str(total_score_days)} (환산 {total_score_days}일 = {total_score_months}개월)"
-
-    score_raw = total_score_months * 0.176
-    score = min(score_raw, 12.0) # 최대 12점
-    score_str = f"{score:.1f}점"
-
-    # --- 4. '직무 분야' 최종 계산 ---
-    # 직무분야는 가중치 없이 실제 일수 사용
-    job_total_months = _days_to_months(total_job_days)
+    total_job_days = calc.total_job_days
+    job_total_months = calc.job_total_months
     job_career_str = f"{_days_to_year_month_str(total_job_days)} ({total_job_days}일 = {job_total_months}개월)"
-    
-    job_field_str = ", ".join(sorted(list(all_roles)))
-    
-    # 직무 평점 (Broad 6점 vs Limited 3점)
-    # 프록시 로직: PDF 예제(10개)를 기준으로, 5개 이상이면 Broad(6점)
-    is_broad_scope = len(all_roles) >= 5 
-    job_score_str = "6점 (광범위)" if is_broad_scope else "3점 (제한적)"
 
-    # --- 5. 최종 결과 딕셔너리 조합 (UI 렌더링용) ---
     # 첫 번째 프로젝트에서 engineer_name 가져오기
-    engineer_name = projects_df.iloc[0].get("engineer_name", "(AI 추출)")
+    engineer_name = calc.first_project.get("engineer_name", "(AI 추출)")
 
     output = {
         "career_details": {
             "성명": engineer_name,  # AI가 추출한 실제 이름 사용
-            "분야": projects_df.iloc[0].get("primary_original_field", "정보 없음"), # 첫 번째 프로젝트의 분야를 대표로 사용
+            "분야": calc.first_project.get("primary_original_field", "정보 없음"), # 첫 번째 프로젝트의 분야를 대표로 사용
             "현재까지 경력": total_career_str, # 환산 경력
-            "평점": score_str,
+            "평점": f"{calc.score:.1f}점",
             "total_score_months": total_score_months,
             "해당분야 용역참여실적": relevant_list,
             "해당분야 이외 참여실적": other_list,
             "classification_label": "✅ 해당 분야(100%) 및 ⚪ 비해당 분야(60%) 합산",
-            "weight": weight # 마지막 프로젝트의 weight (참고용)
+            "weight": float(calc.weights[-1]), # 마지막 프로젝트의 weight (참고용)
+            "중복 참여기간": calc.overlap_records(),
+            "중복 참여기간 처리": "한 번만 인정" if calc.merged else "프로젝트별로 모두 합산"
         },
         "job_field_details": {
             "책임건설사업관리기술인": engineer_name,  # 추출된 실제 이름 사용
-            "직무분야": job_field_str,
+            "직무분야": calc.job_field_str,
             "현재까지 경력": job_career_str, # 실제 경력
-            "평점": job_score_str,
+            "평점": "6점 (광범위)" if calc.is_broad_scope else "3점 (제한적)",
             "total_job_months": job_total_months,
             "용역참여실적": all_project_records_str
         }
@@ -672,6 +868,7 @@ def get_project_calculations_as_json(projects_df: pd.DataFrame, engineer_name: s
     프로젝트 데이터를 JSON 형식으로 변환 (API/파일 출력용)
 
     Expected JSON 구조에 맞춰 데이터를 포맷팅합니다.
+    계산은 get_project_calculations와 같은 get_career_calculation 모델을 사용합니다.
 
     Args:
         projects_df: 프로젝트 DataFrame
@@ -683,67 +880,31 @@ def get_project_calculations_as_json(projects_df: pd.DataFrame, engineer_name: s
     if projects_df.empty:
         return {}
 
-    # 기존 계산 로직 재사용
-    total_score_days = 0
-    total_job_days = 0
+    calc = get_career_calculation(projects_df)
+
+    # JSON 형식으로 프로젝트 기록 생성
     relevant_list = []
     other_list = []
-    all_roles = set()
-
-    for _, project_series in projects_df.iterrows():
-        start_date = project_series.get("start_date", "")
-        end_date = project_series.get("end_date", "")
-        project_name = project_series.get("project_name", "(사업명 없음)")
-        client = project_series.get("client_raw", "(발주처 없음)")
-        roles = project_series.get("roles", [])
-
-        is_60_percent_rule = project_series.get("recognition_rate_rule") == "civil_60"
-        weight = 0.6 if is_60_percent_rule else 1.0
-
-        actual_days = _calculate_days(start_date, end_date)
-        score_days = round(actual_days * weight)
-
-        total_score_days += score_days
-        total_job_days += actual_days
-        all_roles.update(roles)
-
-        # JSON 형식으로 프로젝트 기록 생성
+    for project_name, client, start_date, end_date, days, rule_60 in calc.projects():
         project_record = {
             "project_name": project_name,
             "client": client,
             "period": f"{start_date} ~ {end_date}",
-            "days": f"{actual_days}일"
+            "days": f"{days}일"
         }
-
-        if is_60_percent_rule:
+        if rule_60:
             other_list.append(project_record)
         else:
             relevant_list.append(project_record)
 
-    # 계산
-    total_score_months = _days_to_months(total_score_days)
-    relevant_days = sum([_calculate_days(p.get("period", " ~ ").split(" ~ ")[0],
-                                         p.get("period", " ~ ").split(" ~ ")[1])
-                         for p in relevant_list])
-    relevant_months = _days_to_months(relevant_days)
-
-    other_days_raw = sum([_calculate_days(p.get("period", " ~ ").split(" ~ ")[0],
-                                          p.get("period", " ~ ").split(" ~ ")[1])
-                          for p in other_list])
-    other_days_weighted = round(other_days_raw * 0.6)
-    other_months = _days_to_months(other_days_weighted)
-
-    score_raw = total_score_months * 0.176
-    score = min(score_raw, 12.0)
-
-    job_total_months = _days_to_months(total_job_days)
-    job_field_str = ", ".join(sorted(list(all_roles)))
-    is_broad_scope = len(all_roles) >= 5
-    job_score_value = 6 if is_broad_scope else 3
+    total_score_days = calc.total_score_days
+    total_job_days = calc.total_job_days
+    job_total_months = calc.job_total_months
+    job_score_value = 6 if calc.is_broad_scope else 3
 
     # 이름 결정
-    name = engineer_name if engineer_name else projects_df.iloc[0].get("engineer_name", "(AI 추출)")
-    field = projects_df.iloc[0].get("primary_original_field", "해당 분야")
+    name = engineer_name if engineer_name else calc.first_project.get("engineer_name", "(AI 추출)")
+    field = calc.first_project.get("primary_original_field", "해당 분야")
 
     # JSON 구조 생성
     result = {
@@ -752,17 +913,25 @@ def get_project_calculations_as_json(projects_df: pd.DataFrame, engineer_name: s
             "division": "책임건설사업관리기술인",
             "name": name,
             "field": field,
-            "relevant_field_career": _days_to_year_month_str(relevant_days),
+            "relevant_field_career": _days_to_year_month_str(calc.relevant_days),
             "total_career": _days_to_year_month_str(total_score_days),
-            "total_score": f"{score:.0f}점",
+            "total_score": f"{calc.score:.0f}점",
             "total_days": f"{total_score_days:,}일",
-            "total_months": f"{total_score_months}개월",
+            "total_months": f"{calc.total_score_months}개월",
             "relevant_field_projects": relevant_list,
-            "relevant_subtotal_days": f"{relevant_days}일",
-            "relevant_subtotal_months": f"{relevant_months}개월",
+            "relevant_subtotal_days": f"{calc.relevant_days}일",
+            "relevant_subtotal_months": f"{_days_to_months(calc.relevant_days)}개월",
             "other_field_projects": other_list,
-            "other_subtotal_calculation": f"{other_days_raw}일 × 60% = {other_days_weighted}일",
-            "other_subtotal_months": f"{other_months}개월"
+            "other_subtotal_calculation": f"{calc.other_days_raw}일 × 60% = {calc.other_days_weighted}일",
+            "other_subtotal_months": f"{_days_to_months(calc.other_days_weighted)}개월",
+            "overlapping_periods_merged": calc.merged,
+            "overlapping_periods": [
+                {
+                    "projects": [calc.project_names[i], calc.project_names[j]],
+                    "overlap_days": f"{days}일",
+                }
+                for i, j, days in calc.overlaps
+            ]
         },
         "participating_engineer_job_field_history": {
             "title": "참여기술인 직무분야 실적",
@@ -772,7 +941,7 @@ def get_project_calculations_as_json(projects_df: pd.DataFrame, engineer_name: s
                 "name": name,
                 "career": _days_to_year_month_str(total_job_days),
                 "score": f"{job_score_value}점",
-                "job_fields": job_field_str,
+                "job_fields": calc.job_field_str,
                 "total_days": f"{total_job_days:,}일",
                 "total_months": f"{job_total_months}개월",
                 "projects": relevant_list + other_list  # 모든 프로젝트
@@ -782,12 +951,56 @@ def get_project_calculations_as_json(projects_df: pd.DataFrame, engineer_name: s
                 "name": name,
                 "career": _days_to_year_month_str(total_job_days),
                 "score": "3점",
-                "job_fields": job_field_str,
+                "job_fields": calc.job_field_str,
                 "total_days": f"{total_job_days:,}일",
                 "total_months": f"{job_total_months}개월",
                 "projects": relevant_list + other_list  # 모든 프로젝트
             }
         }
     }
+    # 결과를 만든 규칙 세트 버전 (규칙 변경 후 재평가 필요 여부 판단용)
+    if calc.rule_set_version is not None:
+        result["rule_set_version"] = calc.rule_set_version
+
+    return result
 
-    return result
\ No newline at end of file
+
+def build_calculation_summary_text(projects_df: pd.DataFrame) -> str:
+    """
+    경력 사항 / 직무분야 실적 계산 결과를 텍스트 리포트로 변환 (다운로드용)
+
+    get_project_calculations와 같은 계산 모델을 사용합니다.
+    """
+    data = get_project_calculations(projects_df)
+    career, job = data["career_details"], data["job_field_details"]
+    lines = [
+        "📌 참여기술인 경력 사항",
+        "",
+        f"- 성명: {career['성명']}",
+        f"- 분야: {career['분야']}",
+        f"- 현재까지 경력: {career['현재까지 경력']}",
+        f"- 평점: {career['평점']}",
+        "",
+        f"[해당분야 용역참여실적] ({len(career['해당분야 용역참여실적'])}건)",
+    ]
+    lines.extend(f"- {r['용역명']} ({r['발주기관']}, {r['참여기간']})" for r in career["해당분야 용역참여실적"])
+    lines.append("")
+    lines.append(f"[해당분야 이외 참여실적 - 60%] ({len(career['해당분야 이외 참여실적'])}건)")
+    lines.extend(f"- {r['용역명']} ({r['발주기관']}, {r['참여기간']})" for r in career["해당분야 이외 참여실적"])
+    if career["중복 참여기간"]:
+        lines.append("")
+        lines.append(f"[중복 참여기간 - {career['중복 참여기간 처리']}] ({len(career['중복 참여기간'])}건)")
+        lines.extend(f"- {record}" for record in career["중복 참여기간"])
+    lines += [
+        "",
+        "📌 참여기술인 직무분야 실적",
+        "",
+        f"- 책임건설사업관리기술인: {job['책임건설사업관리기술인']}",
+        f"- 직무분야: {job['직무분야']}",
+        f"- 현재까지 경력: {job['현재까지 경력']}",
+        f"- 평점: {job['평점']}",
+        "",
+        f"[용역참여실적] ({len(job['용역참여실적'])}건)",
+    ]
+    lines.extend(f"- {record}" for record in job["용역참여실적"])
+    return "\n".join(lines)
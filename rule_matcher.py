@@ -0,0 +1,207 @@
+"""
+Compiled matcher for checkbox rules.
+
+Instead of testing every keyword of every rule against a project, the
+rules are compiled once:
+- keyword_any rules are grouped by field, and all keywords of a field go
+  into one Aho-Corasick automaton, so a single pass over the field text
+  finds every rule it satisfies
+- field_value rules are grouped by field into {expected value: rule ids}
+
+Project fields are normalized once per project (str -> stripped and
+lowercased; list -> each item separately), giving the same results as
+rules_engine._eval_rule_logic.
+
+match_matrix() evaluates a whole batch into a (projects x rules) boolean
+matrix; identical field values are matched only once per batch.
+"""
+from collections import deque
+from typing import Any, Dict, Iterable, List, Sequence, Set
+
+import numpy as np
+
+# Joins list items so a keyword can never match across two items
+_ITEM_SEPARATOR = "\x00"
+
+
+class AhoCorasick:
+    """
+    Multi-pattern substring automaton.
+
+    Usage:
+        ac = AhoCorasick(["도로", "고속도로"])
+        ac.search("고속도로확장")  # -> {0, 1} (indices of the matched patterns)
+    """
+
+    def __init__(self, patterns: Iterable[str]):
+        self.patterns: List[str] = list(patterns)
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[Set[int]] = [set()]
+
+        for index, pattern in enumerate(self.patterns):
+            state = 0
+            for ch in pattern:
+                nxt = self._goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[state][ch] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append(set())
+                state = nxt
+            self._out[state].add(index)
+
+        # Breadth-first construction of failure links (root children fail to the root)
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                if state == 0:
+                    continue
+                fallback = self._fail[state]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[nxt] = self._goto[fallback].get(ch, 0)
+                self._out[nxt] |= self._out[self._fail[nxt]]
+
+    def search(self, text: str) -> Set[int]:
+        """Return the indices of all patterns occurring in text."""
+        found: Set[int] = set()
+        state = 0
+        goto, fail, out = self._goto, self._fail, self._out
+        for ch in text:
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if out[state]:
+                found |= out[state]
+        return found
+
+
+def normalize_field(value: Any) -> Any:
+    """
+    Normalize one project field for keyword matching.
+
+    Returns:
+        List of lowercased items for list fields, a lowercased string for
+        str/int/float values, or None for anything else (never matches)
+    """
+    if isinstance(value, list):
+        return ["" if v is None else str(v).strip().lower() for v in value]
+    if isinstance(value, (str, int, float)):
+        return str(value).strip().lower()
+    return None
+
+
+class CompiledRules:
+    """
+    Checkbox rules compiled for single-pass evaluation.
+
+    Args:
+        rules: Rule dicts in CHECKBOX_RULES format
+    """
+
+    def __init__(self, rules: List[Dict[str, Any]]):
+        self.rule_ids: List[str] = [r["id"] for r in rules]
+        self._keyword_automata: Dict[str, AhoCorasick] = {}
+        self._keyword_rules: Dict[str, List[List[str]]] = {}   # field -> pattern index -> rule ids
+        self._empty_keyword_rules: Dict[str, List[str]] = {}    # field -> rules with a "" keyword
+        self._value_rules: Dict[str, Dict[str, List[str]]] = {}  # field -> expected -> rule ids
+
+        keywords_by_field: Dict[str, Dict[str, List[str]]] = {}
+        for rule in rules:
+            logic = rule.get("logic", {})
+            if logic.get("type") == "keyword_any":
+                field_keywords = keywords_by_field.setdefault(logic["field"], {})
+                for kw in logic["keywords"]:
+                    kw = kw.lower()
+                    if kw:
+                        field_keywords.setdefault(kw, []).append(rule["id"])
+                    else:
+                        self._empty_keyword_rules.setdefault(logic["field"], []).append(rule["id"])
+            elif logic.get("type") == "field_value":
+                expected = _strip(logic.get("equals", ""))
+                self._value_rules.setdefault(logic["field"], {}).setdefault(expected, []).append(rule["id"])
+
+        for field, keyword_rules in keywords_by_field.items():
+            self._keyword_automata[field] = AhoCorasick(keyword_rules.keys())
+            self._keyword_rules[field] = list(keyword_rules.values())
+
+    @property
+    def fields(self) -> Set[str]:
+        """Project fields the rules read."""
+        return set(self._keyword_automata) | set(self._empty_keyword_rules) | set(self._value_rules)
+
+    def match(self, project: Dict[str, Any]) -> Set[str]:
+        """
+        Evaluate every rule against one project.
+
+        Returns:
+            Ids of the rules the project satisfies
+        """
+        matched: Set[str] = set()
+        for field in set(self._keyword_automata) | set(self._empty_keyword_rules):
+            value = normalize_field(project.get(field))
+            if value is None or (isinstance(value, list) and not value):
+                continue
+            text = _ITEM_SEPARATOR.join(value) if isinstance(value, list) else value
+            automaton = self._keyword_automata.get(field)
+            if automaton is not None:
+                for index in automaton.search(text):
+                    matched.update(self._keyword_rules[field][index])
+            matched.update(self._empty_keyword_rules.get(field, ()))
+
+        for field, expected_map in self._value_rules.items():
+            matched.update(expected_map.get(_strip(project.get(field, "")), ()))
+        return matched
+
+    def evaluate(self, project: Dict[str, Any]) -> Dict[str, bool]:
+        """Return {rule_id: checked} for every rule, in rule order."""
+        matched = self.match(project)
+        return {rid: rid in matched for rid in self.rule_ids}
+
+    def match_matrix(self, projects: Sequence[Dict[str, Any]]) -> np.ndarray:
+        """
+        Evaluate every rule against a batch of projects.
+
+        Args:
+            projects: Normalized project dicts (not modified)
+
+        Returns:
+            Boolean array of shape (len(projects), len(rule_ids)); column j
+            is rule_ids[j]
+        """
+        matrix = np.zeros((len(projects), len(self.rule_ids)), dtype=bool)
+        column = {rid: j for j, rid in enumerate(self.rule_ids)}
+
+        for field in set(self._keyword_automata) | set(self._empty_keyword_rules):
+            automaton = self._keyword_automata.get(field)
+            pattern_columns = [
+                np.array([column[rid] for rid in rids], dtype=np.intp)
+                for rids in self._keyword_rules.get(field, [])
+            ]
+            empty_columns = np.array([column[rid] for rid in self._empty_keyword_rules.get(field, [])], dtype=np.intp)
+            hits_by_text: Dict[str, np.ndarray] = {}
+            for i, project in enumerate(projects):
+                value = normalize_field(project.get(field))
+                if value is None or (isinstance(value, list) and not value):
+                    continue
+                text = _ITEM_SEPARATOR.join(value) if isinstance(value, list) else value
+                hits = hits_by_text.get(text)
+                if hits is None:
+                    found = [pattern_columns[index] for index in automaton.search(text)] if automaton else []
+                    hits = np.concatenate(found + [empty_columns])
+                    hits_by_text[text] = hits
+                matrix[i, hits] = True
+
+        for field, expected_map in self._value_rules.items():
+            values = np.array([_strip(project.get(field, "")) for project in projects], dtype=object)
+            for expected, rids in expected_map.items():
+                matrix[np.ix_(values == expected, [column[rid] for rid in rids])] = True
+        return matrix
+
+
+def _strip(value: Any) -> str:
+    return "" if value is None else str(value).strip()
@@ -1,195 +1,206 @@
 # rules_config.py
-CHECKBOX_RULES = [
-    # === 참여일 / 인정일 선택 (상주 / 기술지원 / 직무분야 공통) ===
-    {
-        "id": "date.use_participation",
-        "label": "참여일 사용",
-        "category": "기간",
-        "group": "참여일/인정일",
-        "logic": { "type": "field_value", "field": "use_date_type", "equals": "participation" },
-    },
-    {
-        "id": "date.use_recognition",
-        "label": "인정일 사용",
-        "category": "기간",
-        "group": "참여일/인정일",
-        "logic": { "type": "field_value", "field": "use_date_type", "equals": "recognition" },
-    },
-
-    # === 발주처 (상주 / 기술지원 / 직무분야 공통) ===
-    {
-        "id": "orderer.article2_6",
-        "label": "경력 작성 발주처 / 제2조6항",
-        "category": "발주처",
-        "group": "상주/기술지원/직무공통",
-        "logic": { "type": "keyword_any", "field": "client", "keywords": ["국가", "지방자치단체", "공공기관", "지방공기업", "광역자치단체", "기초자치단체", "정부투자기관", "국토관리청", "한국도로공사", "경기도건설본부"] },
-    },
-    {
-        "id": "orderer.private",
-        "label": "경력 작성 발주처 / 민간사업",
-        "category": "발주처",
-        "group": "상주/기술지원/직무공통",
-        "logic": { "type": "keyword_any", "field": "client", "keywords": ["민간", "민자", "주식회사", "㈜", "유한회사"] },
-    },
-    { "id": "orderer.blank", "label": "경력 작성 발주처 / 발주처 빈칸", "category": "발주처", "group": "직무분야 공통", "logic": { "type": "field_value", "field": "client_raw", "equals": "" } },
-
-    # === 상주 해당분야 / 2.1. 제2조6항 선택시 ===
-    { "id": "sangju.orderer.gov_100", "label": "상주 / 제2조6항 발주처 100%", "category": "상주 해당분야", "group": "발주처 세부", "logic": { "type": "keyword_any", "field": "client", "keywords": ["국가", "지방자치단체", "공공기관", "지방공기업", "광역자치단체", "경기도건설본부"] } },
-    { "id": "sangju.orderer.local_gov", "label": "상주 / 광역자치단체100%, 기초자치단체60%", "category": "상주 해당분야", "group": "발주처 세부", "logic": { "type": "keyword_any", "field": "client", "keywords": ["광역자치단체", "기초자치단체", "경기도건설본부"] } },
-    { "id": "sangju.orderer.gov_invest_60", "label": "상주 / 정부투자기관 60%", "category": "상주 해당분야", "group": "발주처 세부", "logic": { "type": "keyword_any", "field": "client", "keywords": ["정부투자기관"] } },
-
-    # === 상주 해당분야 / 3. 공종 (대분류) ===
-    # --- FIX: Check the 'original_fields' list ---
-    { "id": "sangju.field.road", "label": "상주 해당분야 / 공종 / 도로", "category": "상주 해당분야", "group": "공종", "logic": { "type": "keyword_any", "field": "original_fields", "keywords": ["도로"] } },
-    { "id": "sangju.field.river", "label": "상주 해당분야 / 공종 / 하천", "category": "상주 해당분야", "group": "공종", "logic": { "type": "keyword_any", "field": "original_fields", "keywords": ["하천"] } },
-    { "id": "sangju.field.water_supply", "label": "상주 해당분야 / 공종 / 상수도", "category": "상주 해당분야", "group": "공종", "logic": { "type": "keyword_any", "field": "original_fields", "keywords": ["상수도"] } },
-    { "id": "sangju.field.water_sewage", "label": "상주 해당분야 / 공종 / 하수도", "category": "상주 해당분야", "group": "공종", "logic": { "type": "keyword_any", "field": "original_fields", "keywords": ["하수도"] } },
-    { "id": "sangju.field.railway", "label": "상주 해당분야 / 공종 / 철도", "category": "상주 해당분야", "group": "공종", "logic": { "type": "keyword_any", "field": "original_fields", "keywords": ["철도"] } },
-    { "id": "sangju.field.complex", "label": "상주 해당분야 / 공종 / 단지", "category": "상주 해당분야", "group": "공종", "logic": { "type": "keyword_any", "field": "original_fields", "keywords": ["단지"] } },
-    { "id": "sangju.field.port", "label": "상주 해당분야 / 공종 / 항만", "category": "상주 해당분야", "group": "공종", "logic": { "type": "keyword_any", "field": "original_fields", "keywords": ["항만"] } },
-    { "id": "sangju.field.military", "label": "상주 해당분야 / 공종 / 군부대시설", "category": "상주 해당분야", "group": "공종", "logic": { "type": "keyword_any", "field": "original_fields", "keywords": ["군부대시설"] } },
-    { "id": "sangju.field.landscape", "label": "상주 해당분야 / 공종 / 조경", "category": "상주 해당분야", "group": "공종", "logic": { "type": "keyword_any", "field": "original_fields", "keywords": ["조경"] } },
-    { "id": "sangju.field.civil_etc", "label": "상주 해당분야 / 공종 / 기타토목", "category": "상주 해당분야", "group": "공종", "logic": { "type": "keyword_any", "field": "original_fields", "keywords": ["기타토목"] } },
-    { "id": "sangju.field.power_conduit", "label": "상주 해당분야 / 공종 / 전력구", "category": "상주 해당분야", "group": "공종", "logic": { "type": "keyword_any", "field": "original_fields", "keywords": ["전력구"] } },
-    { "id": "sangju.field.airport", "label": "상주 해당분야 / 공종 / 공항", "category": "상주 해당분야", "group": "공종", "logic": { "type": "keyword_any", "field": "original_fields", "keywords": ["공항"] } },
-
-    # === 상주 해당분야 / 3.1. 분야별 세부공종 (도로) ===
-    # (These check project_name - this is correct)
-    { "id": "sangju.field.road.detail.road", "label": "상주 / 도로 / 도로", "category": "상주 해당분야", "group": "도로 세부공종", "logic": { "type": "keyword_any", "field": "project_name", "keywords": ["도로"] } },
-    { "id": "sangju.field.road.detail.national_road", "label": "상주 / 도로 / 국도", "category": "상주 해당분야", "group": "도로 세부공종", "logic": { "type": "keyword_any", "field": "project_name", "keywords": ["국도"] } },
-    { "id": "sangju.field.road.detail.local_road", "label": "상주 / 도로 / 지방도", "category": "상주 해당분야", "group": "도로 세부공종", "logic": { "type": "keyword_any", "field": "project_name", "keywords": ["지방도"] } },
-    { "id": "sangju.field.road.detail.gukjido", "label": "상주 / 도로 / 국지도", "category": "상주 해당분야", "group": "도로 세부공종", "logic": { "type": "keyword_any", "field": "project_name", "keywords": ["국지도"] } },
-    { "id": "sangju.field.road.detail.expressway", "label": "상주 / 도로 / 고속국도(고속도로)", "category": "상주 해당분야", "group": "도로 세부공종", "logic": { "type": "keyword_any", "field": "project_name", "keywords": ["고속국도", "고속도로"] } },
-    { "id": "sangju.field.road.detail.underpass", "label": "상주 / 도로 / 지하차도", "category": "상주 해당분야", "group": "도로 세부공종", "logic": { "type": "keyword_any", "field": "project_name", "keywords": ["지하차도"] } },
-    { "id": "sangju.field.road.detail.pavement", "label": "상주 / 도로 / 포장", "category": "상주 해당분야", "group": "도로 세부공종", "logic": { "type": "keyword_any", "field": "project_name", "keywords": ["포장"] } },
-    { "id": "sangju.field.road.detail.bridge", "label": "상주 / 도로 / 교량", "category": "상주 해당분야", "group": "도로 세부공종", "logic": { "type": "keyword_any", "field": "project_name", "keywords": ["교량"] } },
-    { "id": "sangju.field.road.detail.general_bridge", "label": "상주 / 도로 / 일반교량", "category": "상주 해당분야", "group": "도로 세부공종", "logic": { "type": "keyword_any", "field": "project_name", "keywords": ["일반교량"] } },
-    { "id": "sangju.field.road.detail.tunnel", "label": "상주 / 도로 / 터널", "category": "상주 해당분야", "group": "도로 세부공종", "logic": { "type": "keyword_any", "field": "project_name", "keywords": ["터널"] } },
-    { "id": "sangju.field.road.detail.overpass", "label": "상주 / 도로 / 보도육교", "category": "상주 해당분야", "group": "도로 세부공종", "logic": { "type": "keyword_any", "field": "project_name", "keywords": ["보도육교"] } },
-    { "id": "sangju.field.road.detail.expansion", "label": "상주 / 도로 / 확포장도로", "category": "상주 해당분야", "group": "도로 세부공종", "logic": { "type": "keyword_any", "field": "project_name", "keywords": ["확포장도로", "도로확포장"] } },
-    { "id": "sangju.field.road.detail.civil_60", "label": "상주 / 도로 / 토목분야(체크공종제외)60%", "category": "상주 해당분야", "group": "도로 세부공종", "logic": { "type": "field_value", "field": "recognition_rate_rule", "equals": "civil_60" } },
-
-    # === 상주 해당분야 / 3.1. 분야별 세부공종 (하천) ===
-    # ... (all other 3.x sub-fields remain the same, checking project_name or recognition_rate_rule) ...
-    { "id": "sangju.field.river.detail.civil_60", "label": "상주 / 하천 / 토목분야(체크공종제외)60%", "category": "상주 해당분야", "group": "하천 세부공종", "logic": { "type": "field_value", "field": "recognition_rate_rule", "equals": "civil_60" } },
-    { "id": "sangju.field.water.detail.sewer_pipe", "label": "상주 / 하수도 / 하수관로", "category": "상주 해당분야", "group": "상하수도 세부공종", "logic": { "type": "keyword_any", "field": "project_name", "keywords": ["하수관로"] } }, 
-    { "id": "sangju.field.water.detail.civil_60", "label": "상주 / 상하수도 / 토목분야(체크공종제외)60%", "category": "상주 해당분야", "group": "상하수도 세부공종", "logic": { "type": "field_value", "field": "recognition_rate_rule", "equals": "civil_60" } }, 
-    { "id": "sangju.field.railway.detail.civil_60", "label": "상주 / 철도 / 토목분야(체크공종제외)60%", "category": "상주 해당분야", "group": "철도 세부공종", "logic": { "type": "field_value", "field": "recognition_rate_rule", "equals": "civil_60" } },
-    { "id": "sangju.field.complex.detail.civil_etc_60", "label": "상주 / 단지 / 토목분야(기타)60%", "category": "상주 해당분야", "group": "단지 세부공종", "logic": { "type": "field_value", "field": "recognition_rate_rule", "equals": "civil_etc_60" } },
-    { "id": "sangju.field.port.detail.civil_etc_60", "label": "상주 / 항만 / 토목분야(기타)60%", "category": "상주 해당분야", "group": "항만 세부공종", "logic": { "type": "field_value", "field": "recognition_rate_rule", "equals": "civil_etc_60" } },
-
-    # === 상주 해당분야 / 4. 담당업무 ===
-    # --- FIX: Check the 'roles' list ---
-    { "id": "sangju.duty.cmc_support", "label": "담당업무 / 건설사업관리(기술지원)", "category": "상주 해당분야", "group": "담당업무", "logic": { "type": "keyword_any", "field": "roles", "keywords": ["건설사업관리(기술지원)"] } },
-    { "id": "sangju.duty.construction", "label": "담당업무 / 시공", "category": "상주 해당분야", "group": "담당업무", "logic": { "type": "keyword_any", "field": "roles", "keywords": ["시공"] } },
-    { "id": "sangju.duty.supervision", "label": "담당업무 / 감리", "category": "상주 해당분야", "group": "담당업무", "logic": { "type": "keyword_any", "field": "roles", "keywords": ["감리", "시공감리"] } },
-    { "id": "sangju.duty.cmc_resident", "label": "담당업무 / 건설사업관리(상주)", "category": "상주 해당분야", "group": "담당업무", "logic": { "type": "keyword_any", "field": "roles", "keywords": ["건설사업관리(상주)", "건설사업관리"] } },
-    { "id": "sangju.duty.cmc_design_phase", "label": "담당업무 / 건설사업관리(설계단계)", "category": "상주 해당분야", "group": "담당업무", "logic": { "type": "keyword_any", "field": "roles", "keywords": ["건설사업관리(설계단계)"] } },
-    { "id": "sangju.duty.director_supervision", "label": "담당업무 / 감독관리감독", "category": "상주 해당분야", "group": "담당업무", "logic": { "type": "keyword_any", "field": "roles", "keywords": ["감독관리감독", "감독", "관리감독", "감독권한대행"] } },
-    { "id": "sangju.duty.construction_supervision", "label": "담당업무 / 공사감독설계감독", "category": "상주 해당분야", "group": "담당업무", "logic": { "type": "keyword_any", "field": "roles", "keywords": ["공사감독설계감독", "공사감독", "설계감독"] } },
-    { "id": "sangju.duty.construction_management", "label": "담당업무 / 시공총괄", "category": "상주 해당분야", "group": "담당업무", "logic": { "type": "keyword_any", "field": "roles", "keywords": ["시공총괄"] } },
-    { "id": "sangju.duty.site_admin", "label": "담당업무 / 현장공무", "category": "상주 해당분야", "group": "담당업무", "logic": { "type": "keyword_any", "field": "roles", "keywords": ["현장공무"] } },
-    { "id": "sangju.duty.site_management_planning", "label": "담당업무 / 현장총괄계획", "category": "상주 해당분야", "group": "담당업무", "logic": { "type": "keyword_any", "field": "roles", "keywords": ["현장총괄계획", "현장총괄", "계획"] } },
-    { "id": "sangju.duty.test_inspection", "label": "담당업무 / 시험검사", "category": "상주 해당분야", "group": "담당업무", "logic": { "type": "keyword_any", "field": "roles", "keywords": ["시험검사", "시험", "검사"] } },
-    { "id": "sangju.duty.maintenance", "label": "담당업무 / 유지관리", "category": "상주 해당분야", "group": "담당업무", "logic": { "type": "keyword_any", "field": "roles", "keywords": ["유지관리"] } },
-    { "id": "sangju.duty.design", "label": "담당업무 / 설계", "category": "상주 해당분야", "group": "담당업무", "logic": { "type": "keyword_any", "field": "roles", "keywords": ["설계"] } },
-    { "id": "sangju.duty.basic_design", "label": "담당업무 / 기본설계", "category": "상주 해당분야", "group": "담당업무", "logic": { "type": "keyword_any", "field": "roles", "keywords": ["기본설계"] } },
-    { "id": "sangju.duty.safety_check", "label": "담당업무 / 정밀안전진단", "category": "상주 해당분야", "group": "담당업무", "logic": { "type": "keyword_any", "field": "roles", "keywords": ["정밀안전진단"] } },
-
-    # === 기술지원 해당분야 ===
-    { "id": "tech.eval.same_as_sangju", "label": "기술지원 / 상주 평가 방식과 동일", "category": "기술지원 해당분야", "group": "평가 방법", "logic": { "type": "field_value", "field": "tech_eval_method", "equals": "same_as_sangju" } },
-    { "id": "tech.eval.use_specialty", "label": "기술지원 / 참여분야의 전문분야 작성", "category": "기술지원 해당분야", "group": "평가 방법", "logic": { "type": "field_value", "field": "tech_eval_method", "equals": "use_specialty" } },
-    { "id": "tech.field.road_airport", "label": "기술지원 / 공종 / 도로및공항", "category": "기술지원 해당분야", "group": "공종", "logic": { "type": "keyword_any", "field": "specialty", "keywords": ["도로및공항"] } },
-    { "id": "tech.field.structure", "label": "기술지원 / 공종 / 토목구조", "category": "기술지원 해당분야", "group": "공종", "logic": { "type": "keyword_any", "field": "specialty", "keywords": ["토목구조"] } },
-    { "id": "tech.field.geotech", "label": "기술지원 / 공종 / 토질지질", "category": "기술지원 해당분야", "group": "공종", "logic": { "type": "keyword_any", "field": "specialty", "keywords": ["토질지질"] } },
-    { "id": "tech.field.safety", "label": "기술지원 / 공종 / 건설안전", "category": "기술지원 해당분야", "group": "공종", "logic": { "type": "keyword_any", "field": "specialty", "keywords": ["건설안전"] } },
-    { "id": "tech.field.landscape", "label": "기술지원 / 공종 / 조경계획", "category": "기술지원 해당분야", "group": "공종", "logic": { "type": "keyword_any", "field": "specialty", "keywords": ["조경계획"] } },
-    { "id": "tech.field.port", "label": "기술지원 / 공종 / 항만및해안", "category": "기술지원 해당분야", "group": "공종", "logic": { "type": "keyword_any", "field": "specialty", "keywords": ["항만및해안"] } },
-    { "id": "tech.field.survey", "label": "기술지원 / 공종 / 측량및지형공간정보", "category": "기술지원 해당분야", "group": "공종", "logic": { "type": "keyword_any", "field": "specialty", "keywords": ["측량및지형공간정보"] } },
-    { "id": "tech.field.quality", "label": "기술지원 / 공종 / 토목품질시험", "category": "기술지원 해당분야", "group": "공종", "logic": { "type": "keyword_any", "field": "specialty", "keywords": ["토목품질시험"] } },
-    { "id": "tech.field.ground", "label": "기술지원 / 공종 / 지질및지반", "category": "기술지원 해당분야", "group": "공종", "logic": { "type": "keyword_any", "field": "specialty", "keywords": ["지질및지반"] } },
-    { "id": "tech.field.arch_structure", "label": "기술지원 / 공종 / 건축구조", "category": "기술지원 해당분야", "group": "공종", "logic": { "type": "keyword_any", "field": "specialty", "keywords": ["건축구조"] } },
-    { "id": "tech.field.arch_mech", "label": "기술지원 / 공종 / 건축기계설비", "category": "기술지원 해당분야", "group": "공종", "logic": { "type": "keyword_any", "field": "specialty", "keywords": ["건축기계설비"] } },
-    { "id": "tech.field.arch_construct", "label": "기술지원 / 공종 / 건축시공", "category": "기술지원 해당분야", "group": "공종", "logic": { "type": "keyword_any", "field": "specialty", "keywords": ["건축시공"] } },
-    { "id": "tech.field.arch_quality", "label": "기술지원 / 공종 / 건축품질시험", "category": "기술지원 해당분야", "group": "공종", "logic": { "type": "keyword_any", "field": "specialty", "keywords": ["건축품질시험"] } },
-    { "id": "tech.field.transport", "label": "기술지원 / 공종 / 교통", "category": "기술지원 해당분야", "group": "공종", "logic": { "type": "keyword_any", "field": "specialty", "keywords": ["교통"] } },
-    { "id": "tech.field.urban", "label": "기술지원 / 공종 / 도시계획", "category": "기술지원 해당분야", "group": "공종", "logic": { "type": "keyword_any", "field": "specialty", "keywords": ["도시계획"] } },
-    { "id": "tech.field.civil_construct", "label": "기술지원 / 공종 / 토목시공", "category": "기술지원 해당분야", "group": "공종", "logic": { "type": "keyword_any", "field": "specialty", "keywords": ["토목시공"] } },
-    { "id": "tech.field.railway", "label": "기술지원 / 공종 / 철도삭도", "category": "기술지원 해당분야", "group": "공종", "logic": { "type": "keyword_any", "field": "specialty", "keywords": ["철도삭도"] } },
-    { "id": "tech.field.water", "label": "기술지원 / 공종 / 상하수도", "category": "기술지원 해당분야", "group": "공종", "logic": { "type": "keyword_any", "field": "specialty", "keywords": ["상하수도"] } },
-    { "id": "tech.field.water_resource", "label": "기술지원 / 공종 / 수자원개발", "category": "기술지원 해당분야", "group": "공종", "logic": { "type": "keyword_any", "field": "specialty", "keywords": ["수자원개발"] } },
-    { "id": "tech.field.machine", "label": "기술지원 / 공종 / 기계", "category": "기술지원 해당분야", "group": "공종", "logic": { "type": "keyword_any", "field": "specialty", "keywords": ["기계"] } },
-    { "id": "tech.field.construct_machine", "label": "기술지원 / 공종 / 건설기계", "category": "기술지원 해당분야", "group": "공종", "logic": { "type": "keyword_any", "field": "specialty", "keywords": ["건설기계"] } },
-    { "id": "tech.field.hvac", "label": "기술지원 / 공종 / 공조냉동기계", "category": "기술지원 해당분야", "group": "공종", "logic": { "type": "keyword_any", "field": "specialty", "keywords": ["공조냉동기계"] } },
-    { "id": "tech.field.agri_civil", "label": "기술지원 / 공종 / 농어업토목", "category": "기술지원 해당분야", "group": "공종", "logic": { "type": "keyword_any", "field": "specialty", "keywords": ["농어업토목"] } },
-
-    # === 상주 직무분야1 ===
-    { "id": "duty_field1.eval.by_duty", "label": "직무분야1 / 직무분야로 평가", "category": "상주 직무분야1", "group": "평가 방법", "logic": { "type": "field_value", "field": "duty_field1_eval_method", "equals": "by_duty" } },
-    { "id": "duty_field1.eval.same_as_sangju", "label": "직무분야1 / 상주 해당분야 평가 방식과 동일", "category": "상주 직무분야1", "group": "평가 방법", "logic": { "type": "field_value", "field": "duty_field1_eval_method", "equals": "same_as_sangju" } },
-    { "id": "duty_field1.field.civil", "label": "직무분야1 / 직무 / 토목", "category": "상주 직무분야1", "group": "직무분야", "logic": { "type": "keyword_any", "field": "duty_field1", "keywords": ["토목"] } },
-    { "id": "duty_field1.field.architecture", "label": "직무분야1 / 직무 / 건축", "category": "상주 직무분야1", "group": "직무분야", "logic": { "type": "keyword_any", "field": "duty_field1", "keywords": ["건축"] } },
-    { "id": "duty_field1.field.machine", "label": "직무분야1 / 직무 / 기계", "category": "상주 직무분야1", "group": "직무분야", "logic": { "type": "keyword_any", "field": "duty_field1", "keywords": ["기계"] } },
-    { "id": "duty_field1.field.safety", "label": "직무분야1 / 직무 / 안전관리", "category": "상주 직무분야1", "group": "직무분야", "logic": { "type": "keyword_any", "field": "duty_field1", "keywords": ["안전관리"] } },
-    
-    # --- FIX: Check the 'roles' list ---
-    { "id": "duty_field1.duty.cmc_resident", "label": "직무분야1 / 담당업무 / 건설사업관리(상주)", "category": "상주 직무분야1", "group": "담당업무", "logic": { "type": "keyword_any", "field": "roles", "keywords": ["건설사업관리(상주)", "건설사업관리"] } },
-    { "id": "duty_field1.duty.cmc_design_phase", "label": "직무분야1 / 담당업무 / 건설사업관리(설계단계)", "category": "상주 직무분야1", "group": "담당업무", "logic": { "type": "keyword_any", "field": "roles", "keywords": ["건설사업관리(설계단계)"] } },
-    { "id": "duty_field1.duty.cmc_support", "label": "직무분야1 / 담당업무 / 건설사업관리(기술지원)", "category": "상주 직무분야1", "group": "담당업무", "logic": { "type": "keyword_any", "field": "roles", "keywords": ["건설사업관리(기술지원)"] } },
-    { "id": "duty_field1.duty.supervision", "label": "직무분야1 / 담당업무 / 시공감리", "category": "상주 직무분야1", "group": "담당업무", "logic": { "type": "keyword_any", "field": "roles", "keywords": ["시공감리"] } },
-    { "id": "duty_field1.duty.director_supervision", "label": "직무분야1 / 담당업무 / 감독관리감독", "category": "상주 직무분야1", "group": "담당업무", "logic": { "type": "keyword_any", "field": "roles", "keywords": ["감독관리감독", "감독", "관리감독", "감독권한대행"] } },
-    { "id": "duty_field1.duty.construction_supervision", "label": "직무분야1 / 담당업무 / 공사감독설계감독", "category": "상주 직무분야1", "group": "담당업무", "logic": { "type": "keyword_any", "field": "roles", "keywords": ["공사감독설계감독"] } },
-    { "id": "duty_field1.duty.construction", "label": "직무분야1 / 담당업무 / 시공", "category": "상주 직무분야1", "group": "담당업무", "logic": { "type": "keyword_any", "field": "roles", "keywords": ["시공"] } },
-    { "id": "duty_field1.duty.construction_mgmt", "label": "직무분야1 / 담당업무 / 시공총괄", "category": "상주 직무분야1", "group": "담당업무", "logic": { "type": "keyword_any", "field": "roles", "keywords": ["시공총괄"] } },
-    { "id": "duty_field1.duty.site_admin", "label": "직무분야1 / 담당업무 / 현장공무", "category": "상주 직무분야1", "group": "담당업무", "logic": { "type": "keyword_any", "field": "roles", "keywords": ["현장공무"] } },
-    { "id": "duty_field1.duty.site_planning", "label": "직무분야1 / 담당업무 / 현장총괄계획", "category": "상주 직무분야1", "group": "담당업무", "logic": { "type": "keyword_any", "field": "roles", "keywords": ["현장총괄계획"] } },
-    { "id": "duty_field1.duty.test_inspection", "label": "직무분야1 / 담당업무 / 시험검사", "category": "상주 직무분야1", "group": "담당업무", "logic": { "type": "keyword_any", "field": "roles", "keywords": ["시험검사"] } },
-    { "id": "duty_field1.duty.maintenance", "label": "직무분야1 / 담당업무 / 유지관리", "category": "상주 직무분야1", "group": "담당업무", "logic": { "type": "keyword_any", "field": "roles", "keywords": ["유지관리"] } },
-    { "id": "duty_field1.duty.design", "label": "직무분야1 / 담당업무 / 설계", "category": "상주 직무분야1", "group": "담당업무", "logic": { "type": "keyword_any", "field": "roles", "keywords": ["설계"] } },
-    { "id": "duty_field1.duty.basic_design", "label": "직무분야1 / 담당업무 / 기본설계", "category": "상주 직무분야1", "group": "담당업무", "logic": { "type": "keyword_any", "field": "roles", "keywords": ["기본설계"] } },
-    { "id": "duty_field1.duty.detailed_design", "label": "직무분야1 / 담당업무 / 실시설계", "category": "상주 직무분야1", "group": "담당업무", "logic": { "type": "keyword_any", "field": "roles", "keywords": ["실시설계"] } },
-    { "id": "duty_field1.duty.feasibility_study", "label": "직무분야1 / 담당업무 / 타당성조사", "category": "상주 직무분야1", "group": "담당업무", "logic": { "type": "keyword_any", "field": "roles", "keywords": ["타당성조사"] } },
-    { "id": "duty_field1.duty.technical_advice", "label": "직무분야1 / 담당업무 / 기술자문", "category": "상주 직무분야1", "group": "담당업무", "logic": { "type": "keyword_any", "field": "roles", "keywords": ["기술자문"] } },
-    { "id": "duty_field1.duty.safety_inspection", "label": "직무분야1 / 담당업무 / 안전점검", "category": "상주 직무분야1", "group": "담당업무", "logic": { "type": "keyword_any", "field": "roles", "keywords": ["안전점검"] } },
-    { "id": "duty_field1.duty.detailed_safety", "label": "직무분야1 / 담당업무 / 정밀안전진단", "category": "상주 직무분야1", "group": "담당업무", "logic": { "type": "keyword_any", "field": "roles", "keywords": ["정밀안전진단"] } },
-    { "id": "duty_field1.recognition.include_blank_field", "label": "직무분야1 / 공종 빈칸도 적용", "category": "상주 직무분야1", "group": "경력 인정사항", "logic": { "type": "field_value", "field": "duty_field1_recognition_rule", "equals": "include_blank_field" } },
-    { "id": "duty_field1.recognition.include_blank_duty", "label": "직무분야1 / 담당업무 빈칸도 적용", "category": "상주 직무분야1", "group": "경력 인정사항", "logic": { "type": "field_value", "field": "duty_field1_recognition_rule", "equals": "include_blank_duty" } },
-    { "id": "duty_field1.recognition.only_filled", "label": "직무분야1 / 공종 및 담당업무 기재 된 사업만 적용", "category": "상주 직무분야1", "group": "경력 인정사항", "logic": { "type": "field_value", "field": "duty_field1_recognition_rule", "equals": "only_filled" } },
-
-    # === 상주 직무분야2 ===
-    { "id": "duty_field2.eval.by_duty", "label": "직무분야2 / 직무분야로 평가", "category": "상주 직무분야2", "group": "평가 방법", "logic": { "type": "field_value", "field": "duty_field2_eval_method", "equals": "by_duty" } },
-    { "id": "duty_field2.eval.same_as_sangju", "label": "직무분야2 / 상주 해당분야 평가 방식과 동일", "category": "상주 직무분야2", "group": "평가 방법", "logic": { "type": "field_value", "field": "duty_field2_eval_method", "equals": "same_as_sangju" } },
-    { "id": "duty_field2.field.civil", "label": "직무분야2 / 직무 / 토목", "category": "상주 직무분야2", "group": "직무분야", "logic": { "type": "keyword_any", "field": "duty_field2", "keywords": ["토목"] } },
-    { "id": "duty_field2.field.architecture", "label": "직무분야2 / 직무 / 건축", "category": "상주 직무분야2", "group": "직무분야", "logic": { "type": "keyword_any", "field": "duty_field2", "keywords": ["건축"] } },
-    { "id": "duty_field2.field.machine", "label": "직무분야2 / 직무 / 기계", "category": "상주 직무분야2", "group": "직무분야", "logic": { "type": "keyword_any", "field": "duty_field2", "keywords": ["기계"] } },
-    { "id": "duty_field2.field.landscape", "label": "직무분야2 / 직무 / 조경", "category": "상주 직무분야2", "group": "직무분야", "logic": { "type": "keyword_any", "field": "duty_field2", "keywords": ["조경"] } },
-    { "id": "duty_field2.field.safety", "label": "직무분야2 / 직무 / 안전관리", "category": "상주 직무분야2", "group": "직무분야", "logic": { "type": "keyword_any", "field": "duty_field2", "keywords": ["안전관리"] } },
-    
-    # --- FIX: Check the 'roles' list ---
-    { "id": "duty_field2.duty.cmc_resident", "label": "직무분야2 / 담당업무 / 건설사업관리(상주)", "category": "상주 직무분야2", "group": "담당업무", "logic": { "type": "keyword_any", "field": "roles", "keywords": ["건설사업관리(상주)", "건설사업관리"] } },
-    { "id": "duty_field2.duty.cmc_design_phase", "label": "직무분야2 / 담당업무 / 건설사업관리(설계단계)", "category": "상주 직무분야2", "group": "담당업무", "logic": { "type": "keyword_any", "field": "roles", "keywords": ["건설사업관리(설계단계)"] } },
-    { "id": "duty_field2.duty.cmc_support", "label": "직무분야2 / 담당업무 / 건설사업관리(기술지원)", "category": "상주 직무분야2", "group": "담당업무", "logic": { "type": "keyword_any", "field": "roles", "keywords": ["건설사업관리(기술지원)"] } },
-    { "id": "duty_field2.duty.supervision", "label": "직무분야2 / 담당업무 / 시공감리", "category": "상주 직무분야2", "group": "담당업무", "logic": { "type": "keyword_any", "field": "roles", "keywords": ["시공감리"] } },
-    { "id": "duty_field2.duty.director", "label": "직무분야2 / 담당업무 / 감독", "category": "상주 직무분야2", "group": "담당업무", "logic": { "type": "keyword_any", "field": "roles", "keywords": ["감독", "감독권한대행"] } },
-    { "id": "duty_field2.duty.mgmt_supervision", "label": "직무분야2 / 담당업무 / 관리감독", "category": "상주 직무분야2", "group": "담당업무", "logic": { "type": "keyword_any", "field": "roles", "keywords": ["관리감독"] } },
-    { "id": "duty_field2.duty.construction_supervision", "label": "직무분야2 / 담당업무 / 공사감독", "category": "상주 직무분야2", "group": "담당업무", "logic": { "type": "keyword_any", "field": "roles", "keywords": ["공사감독"] } },
-    { "id": "duty_field2.duty.design_supervision", "label": "직무분야2 / 담당업무 / 설계감독", "category": "상주 직무분야2", "group": "담당업무", "logic": { "type": "keyword_any", "field": "roles", "keywords": ["설계감독"] } },
-    { "id": "duty_field2.duty.construction", "label": "직무분야2 / 담당업무 / 시공", "category": "상주 직무분야2", "group": "담당업무", "logic": { "type": "keyword_any", "field": "roles", "keywords": ["시공"] } },
-    { "id": "duty_field2.duty.construction_mgmt", "label": "직무분야2 / 담당업무 / 시공총괄", "category": "상주 직무분야2", "group": "담당업무", "logic": { "type": "keyword_any", "field": "roles", "keywords": ["시공총괄"] } },
-    { "id": "duty_field2.duty.site_admin", "label": "직무분야2 / 담당업무 / 현장공무", "category": "상주 직무분야2", "group": "담당업무", "logic": { "type": "keyword_any", "field": "roles", "keywords": ["현장공무"] } },
-    { "id": "duty_field2.duty.site_mgmt", "label": "직무분야2 / 담당업무 / 현장총괄", "category": "상주 직무분야2", "group": "담당업무", "logic": { "type": "keyword_any", "field": "roles", "keywords": ["현장총괄"] } },
-    { "id": "duty_field2.duty.planning", "label": "직무분야2 / 담당업무 / 계획", "category": "상주 직무분야2", "group": "담당업무", "logic": { "type": "keyword_any", "field": "roles", "keywords": ["계획"] } },
-    { "id": "duty_field2.duty.test", "label": "직무분야2 / 담당업무 / 시험", "category": "상주 직무분야2", "group": "담당업무", "logic": { "type": "keyword_any", "field": "roles", "keywords": ["시험"] } },
-    { "id": "duty_field2.duty.inspection", "label": "직무분야2 / 담당업무 / 검사", "category": "상주 직무분야2", "group": "담당업무", "logic": { "type": "keyword_any", "field": "roles", "keywords": ["검사"] } },
-    { "id": "duty_field2.duty.maintenance", "label": "직무분야2 / 담당업무 / 유지관리", "category": "상주 직무분야2", "group": "담당업무", "logic": { "type": "keyword_any", "field": "roles", "keywords": ["유지관리"] } },
-    { "id": "duty_field2.duty.design", "label": "직무분야2 / 담당업무 / 설계", "category": "상주 직무분야2", "group": "담당업무", "logic": { "type": "keyword_any", "field": "roles", "keywords": ["설계"] } },
-    { "id": "duty_field2.duty.basic_design", "label": "직무분야2 / 담당업무 / 기본설계", "category": "상주 직무분야2", "group": "담당업무", "logic": { "type": "keyword_any", "field": "roles", "keywords": ["기본설계"] } },
-    { "id": "duty_field2.duty.detailed_design", "label": "직무분야2 / 담당업무 / 실시설계", "category": "상주 직무분야2", "group": "담당업무", "logic": { "type": "keyword_any", "field": "roles", "keywords": ["실시설계"] } },
-    { "id": "duty_field2.duty.feasibility_study", "label": "직무분야2 / 담당업무 / 타당성조사", "category": "상주 직무분야2", "group": "담당업무", "logic": { "type": "keyword_any", "field": "roles", "keywords": ["타당성조사"] } },
-    { "id": "duty_field2.duty.technical_advice", "label": "직무분야2 / 담당업무 / 기술자문", "category": "상주 직무분야2", "group": "담당업무", "logic": { "type": "keyword_any", "field": "roles", "keywords": ["기술자문"] } },
-    { "id": "duty_field2.duty.safety_inspection", "label": "직무분야2 / 담당업무 / 안전점검", "category": "상주 직무분야2", "group": "담당업무", "logic": { "type": "keyword_any", "field": "roles", "keywords": ["안전점검"] } },
-    { "id": "duty_field2.duty.detailed_safety", "label": "직무분야2 / 담당업무 / 정밀안전진단", "category": "상주 직무분야2", "group": "담당업무", "logic": { "type": "keyword_any", "field": "roles", "keywords": ["정밀안전진단"] } },
-
-    { "id": "duty_field2.recognition.include_blank_field", "label": "직무분야2 / 공종 빈칸도 적용", "category": "상주 직무분야2", "group": "경력 인정사항", "logic": { "type": "field_value", "field": "duty_field2_recognition_rule", "equals": "include_blank_field" } },
-    { "id": "duty_field2.recognition.include_blank_duty", "label": "직무분야2 / 담당업무 빈칸도 적용", "category": "상주 직무분야2", "group": "경력 인정사항", "logic": { "type": "field_value", "field": "duty_field2_recognition_rule", "equals": "include_blank_duty" } },
-    { "id": "duty_field2.recognition.only_filled", "label": "직무분야2 / 공종 및 담당업무 기재 된 사업만 적용", "category": "상주 직무분야2", "group": "경력 인정사항", "logic": { "type": "field_value", "field": "duty_field2_recognition_rule", "equals": "only_filled" } },
-]
\ No newline at end of file
+"""
+Checkbox rule set loading.
+
+The rules live in a versioned data file (RULES_PATH, checkbox_rules.json):
+
+    {"version": "2026.10.1", "rules": [{"id": ..., "label": ..., "category": ...,
+     "group": ..., "logic": {"type": "keyword_any", "field": ..., "keywords": [...]}}, ...]}
+
+The file is validated on load and compiled into a rule_matcher.CompiledRules.
+Compiled matchers are cached on disk under RULES_CACHE_DIR by content hash,
+so an unchanged file is never recompiled. get_rule_set() re-checks the file
+at most every RULES_RELOAD_CHECK_SECONDS and swaps in the new rule set as a
+whole; an invalid file is reported and the previous rule set stays active.
+"""
+import hashlib
+import json
+import os
+import pickle
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from config import RULES_PATH, RULES_CACHE_DIR, RULES_RELOAD_CHECK_SECONDS
+from rule_matcher import CompiledRules
+
+# Bump when CompiledRules changes shape so old cache files are not unpickled
+_COMPILED_FORMAT = 1
+_LOGIC_TYPES = ("keyword_any", "field_value")
+
+
+class RuleSetError(ValueError):
+    """Raised when a rule file is missing, unreadable or fails validation."""
+
+
+class RuleSet:
+    """
+    One loaded rule file.
+
+    Attributes:
+        version: "version" from the rule file (stamped on every result)
+        content_hash: SHA-256 of the file content
+        rules: Rule dicts, in file order
+        compiled: CompiledRules for the rules
+    """
+
+    def __init__(self, version: str, content_hash: str, rules: List[Dict[str, Any]], compiled: CompiledRules):
+        self.version = version
+        self.content_hash = content_hash
+        self.rules = rules
+        self.compiled = compiled
+
+
+def validate_rule_data(data: Any) -> None:
+    """
+    Check a parsed rule file against the rule schema.
+
+    Raises:
+        RuleSetError: Listing every problem found
+    """
+    errors: List[str] = []
+    if not isinstance(data, dict):
+        raise RuleSetError("Rule file must be an object with 'version' and 'rules'")
+    if not isinstance(data.get("version"), str) or not data["version"].strip():
+        errors.append("'version' must be a non-empty string")
+    rules = data.get("rules")
+    if not isinstance(rules, list) or not rules:
+        errors.append("'rules' must be a non-empty list")
+        rules = []
+
+    seen = set()
+    for i, rule in enumerate(rules):
+        where = f"rules[{i}]"
+        if not isinstance(rule, dict):
+            errors.append(f"{where}: must be an object")
+            continue
+        rid = rule.get("id")
+        if not isinstance(rid, str) or not rid:
+            errors.append(f"{where}: 'id' must be a non-empty string")
+        elif rid in seen:
+            errors.append(f"{where}: duplicate id {rid!r}")
+        else:
+            seen.add(rid)
+            where = f"rules[{i}] ({rid})"
+        for key in ("label", "category", "group"):
+            if key in rule and not isinstance(rule[key], str):
+                errors.append(f"{where}: '{key}' must be a string")
+        if not isinstance(rule.get("label"), str):
+            errors.append(f"{where}: 'label' is required")
+
+        logic = rule.get("logic")
+        if not isinstance(logic, dict):
+            errors.append(f"{where}: 'logic' must be an object")
+            continue
+        if logic.get("type") not in _LOGIC_TYPES:
+            errors.append(f"{where}: logic type must be one of {_LOGIC_TYPES}")
+        if not isinstance(logic.get("field"), str) or not logic.get("field"):
+            errors.append(f"{where}: logic 'field' must be a non-empty string")
+        if logic.get("type") == "keyword_any":
+            keywords = logic.get("keywords")
+            if not isinstance(keywords, list) or not keywords or not all(isinstance(k, str) for k in keywords):
+                errors.append(f"{where}: 'keywords' must be a non-empty list of strings")
+        if logic.get("type") == "field_value" and not isinstance(logic.get("equals", ""), str):
+            errors.append(f"{where}: 'equals' must be a string")
+
+    if errors:
+        raise RuleSetError("Invalid rule file:\n  " + "\n  ".join(errors))
+
+
+def _compile_cached(content_hash: str, rules: List[Dict[str, Any]]) -> CompiledRules:
+    """Load the compiled matcher for this content from disk, or compile and store it."""
+    cache_path = RULES_CACHE_DIR / f"{content_hash}.v{_COMPILED_FORMAT}.pickle"
+    try:
+        with open(cache_path, "rb") as f:
+            return pickle.load(f)
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        print(f"[RULES] WARN: Ignoring unreadable compiled cache {cache_path.name}: {e}")
+
+    compiled = CompiledRules(rules)
+    try:
+        RULES_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        tmp_path = cache_path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_path, "wb") as f:
+            pickle.dump(compiled, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, cache_path)
+    except OSError as e:
+        print(f"[RULES] WARN: Could not write compiled cache: {e}")
+    return compiled
+
+
+def load_rule_set(path: Path = RULES_PATH) -> RuleSet:
+    """
+    Load, validate and compile a rule file.
+
+    Args:
+        path: Rule file (JSON)
+
+    Returns:
+        The loaded RuleSet
+
+    Raises:
+        RuleSetError: If the file cannot be read, parsed or validated
+    """
+    try:
+        content = Path(path).read_bytes()
+        data = json.loads(content.decode("utf-8"))
+    except (OSError, UnicodeDecodeError, json.JSONDecodeError) as e:
+        raise RuleSetError(f"Cannot load rule file {path}: {e}") from e
+
+    validate_rule_data(data)
+    content_hash = hashlib.sha256(content).hexdigest()
+    rules = data["rules"]
+    compiled = _compile_cached(content_hash, rules)
+    print(f"[RULES] Loaded rule set {data['version']} ({len(rules)} rules, {content_hash[:12]})")
+    return RuleSet(data["version"], content_hash, rules, compiled)
+
+
+_rule_set: Optional[RuleSet] = None
+_rule_file_stamp = None
+_next_check = 0.0
+_lock = threading.Lock()
+
+
+def get_rule_set() -> RuleSet:
+    """
+    Return the current rule set, reloading it if RULES_PATH changed.
+
+    Callers should fetch the rule set once per batch and use it throughout,
+    so one batch is never evaluated against two versions.
+
+    Raises:
+        RuleSetError: If no valid rule set has been loaded yet
+    """
+    global _rule_set, _rule_file_stamp, _next_check
+    if _rule_set is not None and time.monotonic() < _next_check:
+        return _rule_set
+
+    with _lock:
+        _next_check = time.monotonic() + RULES_RELOAD_CHECK_SECONDS
+        try:
+            st = os.stat(RULES_PATH)
+            stamp = (st.st_mtime_ns, st.st_size)
+        except OSError:
+            stamp = None
+        if _rule_set is not None and stamp == _rule_file_stamp:
+            return _rule_set
+
+        try:
+            new_rule_set = load_rule_set(RULES_PATH)
+        except RuleSetError as e:
+            if _rule_set is None:
+                raise
+            print(f"[RULES] WARN: Keeping rule set {_rule_set.version}: {e}")
+            _rule_file_stamp = stamp  # Do not retry until the file changes again
+            return _rule_set
+
+        if _rule_set is not None and new_rule_set.version == _rule_set.version \
+                and new_rule_set.content_hash != _rule_set.content_hash:
+            print(f"[RULES] WARN: Rule file changed but version is still {new_rule_set.version}; "
+                  f"bump 'version' so stale results can be detected")
+        _rule_set = new_rule_set
+        _rule_file_stamp = stamp
+        return _rule_set
@@ -1,14 +1,23 @@
 """
 Rules engine for evaluating project eligibility criteria.
 
-Applies checkbox rules from rules_config.py to normalized project data,
-determining which career recognition criteria each project meets.
+Applies the checkbox rule set (checkbox_rules.json, loaded by rules_config.py)
+to normalized project data, determining which career recognition criteria
+each project meets. Every result row carries the rule set version that
+produced it (rule_set_version).
 """
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple
 import copy
+import numpy as np
 import pandas as pd
 
-from rules_config import CHECKBOX_RULES
+from rules_config import RuleSet, get_rule_set
+from rule_matcher import CompiledRules
+
+
+def get_compiled_rules() -> CompiledRules:
+    """Return the compiled matcher of the current rule set."""
+    return get_rule_set().compiled
 
 
 def _normalize_text(value: Any) -> str:
@@ -25,6 +34,9 @@ def _eval_rule_logic(project: Dict[str, Any], logic: Dict[str, Any]) -> bool:
     """
     Checks if a project dictionary matches a given rule logic.
     Handles both single strings and lists of strings.
+
+    Reference implementation for one rule; apply_all_checkbox_rules uses
+    the compiled matcher, which gives the same results in one pass.
     """
     logic_type = logic.get("type")
 
@@ -75,16 +87,65 @@ def apply_all_checkbox_rules(normalized_project: Dict[str, Any]) -> pd.Series:
 
     row = copy.deepcopy(normalized_project)
     checked_ids = []
+    rule_set = get_rule_set()
 
-    for rule in CHECKBOX_RULES:
-        rid = rule["id"]
-        # This call to _eval_rule_logic requires _normalize_text to exist
-        is_checked = _eval_rule_logic(row, rule["logic"])
+    for rid, is_checked in rule_set.compiled.evaluate(row).items():
         col_name = f"rule__{rid}"
-        row[col_name] = bool(is_checked)
+        row[col_name] = is_checked
         if is_checked:
             checked_ids.append(rid)
 
     row["checked_rule_ids"] = ", ".join(checked_ids)
+    row["rule_set_version"] = rule_set.version
     
-    return pd.Series(row)
\ No newline at end of file
+    return pd.Series(row)
+
+def evaluate_checkbox_rules_batch(
+    normalized_projects: List[Dict[str, Any]],
+    rule_set: Optional[RuleSet] = None,
+) -> Tuple[np.ndarray, List[str]]:
+    """
+    Evaluates every rule against N projects in one call.
+
+    Args:
+        normalized_projects: Project dicts (already normalized, not modified)
+        rule_set: Rule set to apply (default: the current one)
+
+    Returns:
+        (boolean matrix of shape (N, number of rules), rule ids in column order)
+    """
+    compiled = (rule_set or get_rule_set()).compiled
+    return compiled.match_matrix(normalized_projects), compiled.rule_ids
+
+
+def apply_checkbox_rules_batch(
+    normalized_projects: List[Dict[str, Any]],
+    rule_set: Optional[RuleSet] = None,
+) -> pd.DataFrame:
+    """
+    Batch version of apply_all_checkbox_rules.
+
+    Args:
+        normalized_projects: Project dicts (already normalized, not modified)
+        rule_set: Rule set to apply (default: the current one)
+
+    Returns:
+        DataFrame with one row per project: original fields + rule__* columns
+        + checked_rule_ids + rule_set_version (same columns as the per-project Series)
+    """
+    if not normalized_projects:
+        return pd.DataFrame()
+
+    rule_set = rule_set or get_rule_set()
+    matrix, rule_ids = evaluate_checkbox_rules_batch(normalized_projects, rule_set)
+    base = pd.DataFrame(normalized_projects)
+    base = base.drop(columns=[
+        c for c in base.columns
+        if c.startswith("rule__") or c in ("checked_rule_ids", "rule_set_version")
+    ])
+    flags = pd.DataFrame(matrix, columns=[f"rule__{rid}" for rid in rule_ids], index=base.index)
+
+    ids = np.array(rule_ids, dtype=object)
+    flags["checked_rule_ids"] = [", ".join(ids[row]) for row in matrix]
+    flags["rule_set_version"] = rule_set.version
+    return pd.concat([base, flags], axis=1)
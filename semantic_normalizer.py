@@ -1,4 +1,8 @@
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Union
+
+import pandas as pd
+
+from client_classifier import get_client_classifier
 
 def _norm(text) -> str:
     """
@@ -19,92 +23,126 @@ def classify_client_type(client_raw: str) -> str:
     """
     발주처 이름으로부터 발주처 유형을 분류
 
+    등록된 기관명은 레지스트리(client_registry.json)에서 바로 찾고,
+    그 외에는 유형별 키워드로 분류합니다 (client_classifier 참고).
+
     Args:
         client_raw: 발주처 원본 이름
 
     Returns:
         발주처 분류 (국가, 광역자치단체, 기초자치단체, 정부투자기관, 민간, 기타)
     """
-    if not client_raw:
-        return "기타"
-    s = client_raw.replace(" ", "") 
-
-    if any(k in s for k in ["기초자치단체", "시청", "구청", "군청", "군"]): 
-        return "기초자치단체"
-    if any(k in s for k in ["광역자치단체", "도청", "특별시", "광역시", "경기도", "경기도건설본부"]):
-        return "광역자치단체"
-    if any(k in s for k in ["정부투자기관", "공사", "공단", "한국도로공사"]):
-        return "정부투자기관"
-    if any(k in s for k in ["국토교통부", "국토관리청", "국가", "환경부"]):
-        return "국가"
-    if any(k in s for k in ["주식회사", "(주)", "㈜", "유한회사"]):
-        return "민간"
-    return "기타"
+    return get_client_classifier().classify(client_raw)
 
 # --- 2) 공종(대분류) 추론 (이제 사용되지 않음, AI가 직접 제공) ---
 # infer_original_field 함수는 AI 프롬프트가 개선되어 더 이상 필요하지 않습니다.
 
 # --- 3) 평가 방식 및 규칙 추론 (DEMO LOGIC) ---
-def infer_logic_fields(project: Dict[str, Any]) -> Dict[str, Any]:
-    """
-    AI가 제공한 'primary' 필드를 기반으로 논리 필드를 설정
 
-    프로젝트의 주요 공종(primary_original_field)을 기반으로
-    직무분야, 전문분야, 평가방법 등을 자동으로 추론합니다.
+# '직무분야' (Duty Field) 매핑: 토목 계열 공종
+_CIVIL_FIELDS = frozenset(["도로", "하천", "상수도", "하수도", "철도", "단지", "항만", "기타토목", "토목"])
 
-    Args:
-        project: 정규화된 프로젝트 딕셔너리
+# '전문분야' (Specialty) 매핑
+_SPECIALTY_MAP = {
+    "도로": "도로및공항",
+    "철도": "철도삭도",
+    "상수도": "상하수도",
+    "하수도": "상하수도",
+    "항만": "항만및해안",
+    "하천": "수자원개발",
+    "토목": "토목시공",
+}
 
-    Returns:
-        추론된 논리 필드 딕셔너리
-    """
+# 발주처 60% 규칙 대상
+_CLIENT_TYPES_60 = frozenset(["기초자치단체", "정부투자기관"])
+
+
+def _logic_fields_for(primary_field: Any, client_type: Any) -> Dict[str, Any]:
+    """(주 공종, 발주처 유형)에 대한 논리 필드 (입력이 같으면 결과도 같음)"""
     logic_fields = {}
-    
-    # --- FIX: AI가 제공한 'primary' 필드를 기반으로 추론 ---
-    primary_field = project.get("primary_original_field", "기타토목")
-    
-    # 1. '직무분야' (Duty Field) 매핑
-    civil_fields = ["도로", "하천", "상수도", "하수도", "철도", "단지", "항만", "기타토목", "토목"]
-    if primary_field in civil_fields:
+
+    # 1. '직무분야' 매핑
+    if primary_field in _CIVIL_FIELDS:
         duty_field_map = "토목"
     elif primary_field == "조경":
         duty_field_map = "조경"
     else:
         duty_field_map = "토목" # 기본값
 
-    # 2. '전문분야' (Specialty) 매핑
-    specialty_map = {
-        "도로": "도로및공항",
-        "철도": "철도삭도",
-        "상수도": "상하수도",
-        "하수도": "상하수도",
-        "항만": "항만및해안",
-        "하천": "수자원개발",
-        "토목": "토목시공",
-    }
-    
-    # 3. 양식의 기본값 설정
+    # 2. 양식의 기본값 설정
     logic_fields["use_date_type"] = "participation"
     logic_fields["duty_field1_eval_method"] = "by_duty"
     logic_fields["duty_field1"] = duty_field_map 
     logic_fields["duty_field2_eval_method"] = "same_as_sangju"
     logic_fields["duty_field2"] = duty_field_map
     logic_fields["tech_eval_method"] = "use_specialty"
-    logic_fields["specialty"] = specialty_map.get(primary_field, "토목시공") 
+    logic_fields["specialty"] = _SPECIALTY_MAP.get(primary_field, "토목시공") 
     logic_fields["duty_field1_recognition_rule"] = "only_filled"
     logic_fields["duty_field2_recognition_rule"] = "only_filled"
 
-    # 4. 발주처 60% 규칙 적용
-    client_type = project.get("client_type", "기타")
-    if client_type in ["기초자치단체", "정부투자기관"]:
+    # 3. 발주처 60% 규칙 적용
+    if client_type in _CLIENT_TYPES_60:
         logic_fields["recognition_rate_rule"] = "civil_60" 
     
     return logic_fields
 
+
+def infer_logic_fields(project: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    AI가 제공한 'primary' 필드를 기반으로 논리 필드를 설정
+
+    프로젝트의 주요 공종(primary_original_field)을 기반으로
+    직무분야, 전문분야, 평가방법 등을 자동으로 추론합니다.
+
+    Args:
+        project: 정규화된 프로젝트 딕셔너리
+
+    Returns:
+        추론된 논리 필드 딕셔너리
+    """
+    return _logic_fields_for(
+        project.get("primary_original_field", "기타토목"),
+        project.get("client_type", "기타"),
+    )
+
 # --- 4) 메인 정규화 함수 ---
+def _as_list(value: Any) -> List[Any]:
+    """리스트 필드 값을 새 리스트로 반환 (입력 리스트는 변경하지 않음)"""
+    if value is None:
+        return []
+    if isinstance(value, (list, tuple, set)):
+        return list(value)
+    return [value]
+
+
+def _merge_primary(values: Any, primary: Any) -> List[str]:
+    """목록에 primary 값을 더하고 정규화/중복 제거 (순서 유지)"""
+    items = _as_list(values)
+    if primary and primary not in items:
+        items.append(primary)
+    return list(dict.fromkeys(n for n in (_norm(v) for v in items) if n))
+
+
+def _merge_primary_column(values: pd.Series, primaries: pd.Series) -> List[List[str]]:
+    """_merge_primary를 열 전체에 적용 (같은 (목록, primary) 조합은 한 번만 계산, 행마다 새 리스트)"""
+    memo: Dict[Any, List[str]] = {}
+    merged = []
+    for value, primary in zip(values.tolist(), primaries.tolist()):
+        try:
+            key = (tuple(_as_list(value)), primary)
+            result = memo.get(key)
+            if result is None:
+                result = memo[key] = _merge_primary(value, primary)
+        except TypeError:  # 해시 불가능한 항목
+            result = _merge_primary(value, primary)
+        merged.append(list(result))
+    return merged
+
+
 def normalize_project(raw_project: Dict[str, Any]) -> Dict[str, Any]:
     """
     AI가 추출한 원본 데이터를 받아 규칙 엔진이 사용하기 쉽도록 정제하고 보강합니다.
+    (입력 딕셔너리와 그 안의 리스트는 변경하지 않음)
     """
     if not raw_project:
         return {}
@@ -121,26 +159,116 @@ def normalize_project(raw_project: Dict[str, Any]) -> Dict[str, Any]:
     # 2. 공종 및 역할 필드 정규화 (리스트로 처리)
     # AI가 'original_field' 대신 'original_fields'와 'primary_original_field'를 반환합니다.
     # rules_engine이 'original_fields' 리스트를 직접 사용할 수 있도록 정규화합니다.
-    raw_fields = p_norm.get("original_fields", [])
     primary_field = p_norm.get("primary_original_field")
-    if primary_field and primary_field not in raw_fields:
-        raw_fields.append(primary_field)
-    p_norm["original_fields"] = list(set([_norm(f) for f in raw_fields if _norm(f)]))
+    p_norm["original_fields"] = _merge_primary(p_norm.get("original_fields"), primary_field)
 
     # 역할(roles)에 대해서도 동일하게 처리
-    raw_roles = p_norm.get("roles", [])
     primary_role = p_norm.get("primary_role")
-    if primary_role and primary_role not in raw_roles:
-        raw_roles.append(primary_role)
-    p_norm["roles"] = list(set([_norm(r) for r in raw_roles if _norm(r)]))
+    p_norm["roles"] = _merge_primary(p_norm.get("roles"), primary_role)
 
     # 'original_field'는 'primary_original_field'로 대체 (하위 호환성)
     p_norm["original_field"] = _norm(primary_field)
     p_norm["role"] = _norm(primary_role)
 
     # 3. 논리 필드 추가 (primary_field 기준)
-    logic_fields = infer_logic_fields(p_norm)
-    p_norm.update(logic_fields) 
-    
-    print(f"[Normalizer] Enriched 1 project with logic fields.")
-    return p_norm
\ No newline at end of file
+    p_norm.update(infer_logic_fields(p_norm))
+    return p_norm
+
+
+def _map_unique(values: pd.Series, func) -> pd.Series:
+    """값 종류마다 func를 한 번만 호출해 열 전체에 적용 (결측값은 None으로 전달)"""
+    codes, uniques = pd.factorize(values, use_na_sentinel=True)
+    mapped = pd.Series([func(v) for v in uniques] + [func(None)], dtype=object)  # 코드 -1 (결측) -> 마지막 값
+    return pd.Series(mapped.to_numpy()[codes], index=values.index, dtype=object)
+
+
+def _logic_frame(primary_fields: pd.Series, client_types: pd.Series) -> pd.DataFrame:
+    """(주 공종, 발주처 유형) 고유 조합마다 논리 필드를 한 번 계산하고 행에 병합"""
+    keys = pd.DataFrame({"_field": primary_fields, "_client_type": client_types}, index=primary_fields.index)
+    pairs = keys.drop_duplicates(ignore_index=True)
+    profiles = pd.DataFrame(
+        [_logic_fields_for(f, t) for f, t in zip(pairs["_field"], pairs["_client_type"])], dtype=object
+    )
+    merged = keys.merge(pd.concat([pairs, profiles], axis=1), on=["_field", "_client_type"], how="left")
+    merged.index = keys.index
+    return merged.drop(columns=["_field", "_client_type"])
+
+
+def normalize_projects(raw_projects: Union[List[Dict[str, Any]], pd.DataFrame]) -> Union[List[Dict[str, Any]], pd.DataFrame]:
+    """
+    여러 프로젝트를 한 번에 정규화 (normalize_project의 배치 버전)
+
+    열 단위로 처리합니다: 발주처/공종/역할 문자열은 고유값마다 한 번만
+    정규화·분류하고, 논리 필드는 (주 공종, 발주처 유형) 고유 조합마다 한 번
+    계산해 병합합니다. original_fields/roles는 셀마다 리스트라 행별로
+    새 리스트를 만듭니다. 입력은 변경하지 않으며, 로그는 요약 한 줄만 출력합니다.
+
+    Args:
+        raw_projects: 원본 프로젝트 리스트 또는 DataFrame
+
+    Returns:
+        입력과 같은 형태 (리스트 -> 리스트, DataFrame -> DataFrame)의 정규화된 프로젝트
+        (빈 프로젝트는 리스트 입력에서 {}로 유지)
+    """
+    is_frame = isinstance(raw_projects, pd.DataFrame)
+    if is_frame:
+        index = raw_projects.index
+
+        def column(name: str, default: Any = None) -> pd.Series:
+            if name not in raw_projects.columns:
+                return pd.Series(default, index=index, dtype=object)
+            values = raw_projects[name].astype(object)
+            return values.where(values.notna(), None)  # NaN -> None ("nan" 문자열 방지)
+    else:
+        records = [p for p in raw_projects if p]
+        index = pd.RangeIndex(len(records))
+
+        def column(name: str, default: Any = None) -> pd.Series:
+            return pd.Series([p.get(name, default) for p in records], index=index, dtype=object)
+
+    # 1. 발주처 정규화 (고유값마다 한 번 분류)
+    client_raw = _map_unique(column("client"), _norm)
+    client_type = _map_unique(client_raw, classify_client_type)
+
+    # 2. 공종 및 역할
+    primary_field = column("primary_original_field")
+    primary_role = column("primary_role")
+    new_columns = pd.DataFrame({
+        "client_raw": client_raw,
+        "client_type": client_type,
+        "client": client_raw + " " + client_type,
+        "original_fields": _merge_primary_column(column("original_fields"), primary_field),
+        "roles": _merge_primary_column(column("roles"), primary_role),
+        "original_field": _map_unique(primary_field, _norm),
+        "role": _map_unique(primary_role, _norm),
+    }, index=index)
+
+    # 3. 논리 필드 (primary_original_field가 없는 행은 "기타토목" 기준)
+    logic = _logic_frame(column("primary_original_field", "기타토목"), client_type)
+    new_columns = pd.concat([new_columns, logic], axis=1)
+
+    print(f"[Normalizer] Enriched {len(index)} project(s) with logic fields "
+          f"({client_raw.nunique()} distinct clients, {len(logic.drop_duplicates())} distinct logic profiles).")
+
+    if is_frame:
+        normalized = raw_projects.copy()
+        for name in new_columns.columns:
+            normalized[name] = new_columns[name]
+        return normalized
+
+    # 리스트 입력: 원본 키는 그대로 두고 새 필드만 덮어씀 (없는 논리 필드는 키를 만들지 않음)
+    optional = "recognition_rate_rule"  # 일부 행에만 있는 논리 필드 (병합 후 나머지는 NaN)
+    names = [name for name in new_columns.columns if name != optional]
+    rows = zip(*(new_columns[name].tolist() for name in names))
+    rules = new_columns[optional].tolist() if optional in new_columns.columns else [None] * len(index)
+
+    normalized = []
+    for p, row, rule in zip(records, rows, rules):
+        p_norm = {**p, **dict(zip(names, row))}
+        if isinstance(rule, str):
+            p_norm[optional] = rule
+        normalized.append(p_norm)
+    if len(normalized) == len(raw_projects):
+        return normalized
+    filled = iter(normalized)
+    return [next(filled) if p else {} for p in raw_projects]
@@ -0,0 +1,104 @@
+"""
+Prompt token estimation and budgeted chunk selection.
+
+Ollama silently drops the start of a prompt that does not fit in num_ctx,
+so the extraction context is assembled against an explicit token budget:
+chunks are added in relevance order while they fit, and every call logs
+the estimated prompt size against the budget.
+
+Token counts are estimated from character classes (no tokenizer download
+needed). The per-model factors are deliberately conservative so the
+estimate errs on the side of overcounting.
+"""
+import re
+from typing import Any, List, Optional, Sequence, Tuple
+
+# Approximate tokens per character for each script (SentencePiece/BPE vocabularies)
+_HANGUL_TOKENS_PER_CHAR = 1.0
+_CJK_TOKENS_PER_CHAR = 1.2
+_OTHER_TOKENS_PER_CHAR = 0.3   # ASCII words, digits, punctuation
+_MESSAGE_OVERHEAD_TOKENS = 8   # Chat template markers per message
+
+# Multipliers for tokenizers that split Korean more finely than Gemma's
+MODEL_TOKEN_FACTORS = {
+    "gemma": 1.0,
+    "qwen": 1.1,
+    "llama": 1.3,
+    "mistral": 1.4,
+}
+
+_HANGUL_RE = re.compile(r"[가-힣ㄱ-ㅎㅏ-ㅣ]")
+_CJK_RE = re.compile(r"[぀-ヿ一-鿿]")
+_SPACE_RE = re.compile(r"\s+")
+
+
+def _model_factor(model: Optional[str]) -> float:
+    name = (model or "").lower()
+    for family, factor in MODEL_TOKEN_FACTORS.items():
+        if family in name:
+            return factor
+    return max(MODEL_TOKEN_FACTORS.values())
+
+
+def estimate_tokens(text: str, model: Optional[str] = None) -> int:
+    """
+    Estimate the number of tokens in a text for the given model.
+
+    Args:
+        text: Prompt text
+        model: Ollama model name (selects the tokenizer factor)
+
+    Returns:
+        Estimated token count (rounded up)
+    """
+    if not text:
+        return 0
+    hangul = len(_HANGUL_RE.findall(text))
+    cjk = len(_CJK_RE.findall(text))
+    other = len(_SPACE_RE.sub("", text)) - hangul - cjk
+    tokens = (
+        hangul * _HANGUL_TOKENS_PER_CHAR
+        + cjk * _CJK_TOKENS_PER_CHAR
+        + other * _OTHER_TOKENS_PER_CHAR
+    ) * _model_factor(model)
+    return int(tokens) + 1
+
+
+def estimate_messages_tokens(messages: List[dict], model: Optional[str] = None) -> int:
+    """Estimate the prompt tokens of a chat message list."""
+    return sum(estimate_tokens(m.get("content", ""), model) + _MESSAGE_OVERHEAD_TOKENS for m in messages)
+
+
+def select_within_budget(
+    scored_docs: Sequence[Tuple[Any, float]],
+    budget_tokens: int,
+    model: Optional[str] = None,
+    separator_tokens: int = 8,
+) -> Tuple[List[Any], int]:
+    """
+    Greedily pick chunks by relevance until the token budget is spent.
+
+    Chunks that do not fit are skipped (a smaller, less relevant chunk may
+    still fit after them).
+
+    Args:
+        scored_docs: (Document, score) pairs from similarity_search_with_score;
+            lower score = more relevant (FAISS L2 distance)
+        budget_tokens: Tokens available for the chunk context
+        model: Ollama model name
+        separator_tokens: Per-chunk overhead of the "[CHUNK n from ...]" header
+            and "---" separator, on top of the source name
+
+    Returns:
+        (selected documents in relevance order, estimated tokens used)
+    """
+    selected: List[Any] = []
+    used = 0
+    for doc, _score in sorted(scored_docs, key=lambda pair: pair[1]):
+        source = str((doc.metadata or {}).get("source", "unknown"))
+        cost = estimate_tokens(doc.page_content, model) + estimate_tokens(source, model) + separator_tokens
+        if used + cost > budget_tokens:
+            continue
+        selected.append(doc)
+        used += cost
+    return selected, used
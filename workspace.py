@@ -0,0 +1,169 @@
+"""
+Per-session workspaces.
+
+Each Streamlit session gets its own directory under WORKSPACES_DIR with
+its uploaded PDFs, FAISS index, UUID name map and LLM debug files, so
+concurrent users never clear or overwrite each other's data.
+
+Idle workspaces are evicted from disk:
+- older than WORKSPACE_TTL_HOURS since last use
+- least recently used beyond WORKSPACE_MAX_COUNT
+- least recently used until the total size is under WORKSPACE_MAX_DISK_MB
+Workspaces used within WORKSPACE_MIN_IDLE_SECONDS are never evicted; job
+workers mark a job's workspace as used on every heartbeat, and the app keeps
+the workspaces of queued/running jobs (JobQueue.active_workspaces).
+
+The default workspace (workspace id None) maps to the original global
+paths (PDF_DIR, INDEX_DIR, DATA_DIR) for command-line use.
+"""
+import re
+import shutil
+import time
+import uuid
+from pathlib import Path
+from typing import Iterable, List, Optional
+
+from config import (
+    DATA_DIR, PDF_DIR, INDEX_DIR, WORKSPACES_DIR, WORKSPACE_TTL_HOURS,
+    WORKSPACE_MAX_COUNT, WORKSPACE_MAX_DISK_MB, WORKSPACE_MIN_IDLE_SECONDS,
+)
+
+_WORKSPACE_ID_RE = re.compile(r"^[0-9a-f]{32}$")
+_LAST_USED_FILE = ".last_used"
+
+
+class Workspace:
+    """
+    Directory layout of one workspace.
+
+    Attributes:
+        workspace_id: Id (None for the default workspace)
+        root: Workspace directory
+        pdf_dir: Uploaded PDFs (UUID file names)
+        index_dir: FAISS index
+        debug_dir: llm_debug_context.txt / llm_debug_response.json
+        name_map_path: uuid_name_map.json (UUID file name -> original name)
+    """
+
+    def __init__(self, workspace_id: Optional[str], root: Path, pdf_dir: Path, index_dir: Path, debug_dir: Path):
+        self.workspace_id = workspace_id
+        self.root = root
+        self.pdf_dir = pdf_dir
+        self.index_dir = index_dir
+        self.debug_dir = debug_dir
+        self.name_map_path = root / "uuid_name_map.json"
+
+    @classmethod
+    def default(cls) -> "Workspace":
+        return cls(None, DATA_DIR, PDF_DIR, INDEX_DIR, DATA_DIR)
+
+    @classmethod
+    def for_id(cls, workspace_id: str) -> "Workspace":
+        if not _WORKSPACE_ID_RE.match(workspace_id or ""):
+            raise ValueError(f"Invalid workspace id: {workspace_id!r}")
+        root = WORKSPACES_DIR / workspace_id
+        return cls(workspace_id, root, root / "pdfs", root / "faiss_index", root)
+
+    def ensure(self) -> "Workspace":
+        self.pdf_dir.mkdir(parents=True, exist_ok=True)
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+        self.debug_dir.mkdir(parents=True, exist_ok=True)
+        return self
+
+    def touch(self) -> None:
+        """Mark the workspace as used now (for TTL/LRU eviction)."""
+        if self.workspace_id is not None:
+            (self.root / _LAST_USED_FILE).touch()
+
+
+def _last_used(root: Path) -> float:
+    marker = root / _LAST_USED_FILE
+    try:
+        return marker.stat().st_mtime
+    except OSError:
+        return root.stat().st_mtime
+
+
+def _dir_size(root: Path) -> int:
+    total = 0
+    for f in root.rglob("*"):
+        try:
+            if f.is_file():
+                total += f.stat().st_size
+        except OSError:
+            pass  # Deleted concurrently
+    return total
+
+
+def new_workspace_id() -> str:
+    return uuid.uuid4().hex
+
+
+def get_workspace(workspace_id: Optional[str] = None) -> Workspace:
+    """
+    Return a workspace (created if missing) and mark it as used.
+
+    Args:
+        workspace_id: Session workspace id, or None for the default workspace
+
+    Raises:
+        ValueError: If the id is not a workspace id (e.g. tampered URL)
+    """
+    workspace = Workspace.for_id(workspace_id) if workspace_id else Workspace.default()
+    workspace.ensure().touch()
+    return workspace
+
+
+def evict_workspaces(keep: Iterable[str] = ()) -> List[str]:
+    """
+    Delete idle workspaces by TTL, count and total disk use.
+
+    Args:
+        keep: Workspace ids that must not be evicted (e.g. the caller's own)
+
+    Returns:
+        Ids of the deleted workspaces
+    """
+    now = time.time()
+    keep = set(keep)
+    entries = []
+    for root in WORKSPACES_DIR.iterdir():
+        if root.is_dir() and _WORKSPACE_ID_RE.match(root.name):
+            entries.append([root, _last_used(root), _dir_size(root)])
+    entries.sort(key=lambda e: e[1])  # Least recently used first
+
+    def evictable(entry) -> bool:
+        root, last_used, _ = entry
+        return root.name not in keep and now - last_used >= WORKSPACE_MIN_IDLE_SECONDS
+
+    victims = []
+    ttl = WORKSPACE_TTL_HOURS * 3600
+    for entry in entries:
+        if evictable(entry) and now - entry[1] >= ttl:
+            victims.append(entry)
+    remaining = [e for e in entries if e not in victims]
+
+    max_bytes = WORKSPACE_MAX_DISK_MB * 1024 * 1024
+    total = sum(e[2] for e in remaining)
+    for entry in list(remaining):
+        if len(remaining) <= WORKSPACE_MAX_COUNT and total <= max_bytes:
+            break
+        if evictable(entry):
+            victims.append(entry)
+            remaining.remove(entry)
+            total -= entry[2]
+
+    removed = []
+    for root, _, size in victims:
+        try:
+            shutil.rmtree(root)
+            removed.append(root.name)
+        except OSError as e:
+            print(f"[WORKSPACE] Failed to delete {root}: {e}")
+    if removed:
+        print(f"[WORKSPACE] Evicted {len(removed)} idle workspace(s), "
+              f"{len(remaining)} left ({total / (1024 * 1024):.1f} MB)")
+    if total > max_bytes:
+        print(f"[WORKSPACE] WARN: Active workspaces use {total / (1024 * 1024):.1f} MB, "
+              f"above WORKSPACE_MAX_DISK_MB={WORKSPACE_MAX_DISK_MB}")
+    return removed